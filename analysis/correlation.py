@@ -0,0 +1,213 @@
+# === analysis/correlation.py ===
+#
+# Rolling return correlation / beta matrices across the ticker universe, per
+# timeframe, for rotation and cross-asset flow calls.
+#
+# RollingCorrelation keeps the last `window` return vectors in a ring plus
+# running pairwise sums over the bars where both tickers have a return:
+#
+#   nobs[i, j] = Σ v_i v_j        sx[i, j]  = Σ x_i v_j
+#   sxy[i, j]  = Σ x_i x_j        sxx[i, j] = Σ x_i² v_j      (x = 0 where missing)
+#
+# so a new bar is a handful of rank-1 updates – O(N²) – instead of a
+# recompute over the window; the sums are rebuilt exactly once per lap of the
+# ring to bound drift (as incremental.py's _Ring does). Correlations are
+# pairwise-complete, like DataFrame.corr(min_periods=…).
+#
+# CorrelationBook holds one RollingCorrelation per timeframe across runs:
+# a daemon refresh re-pushes the last bar it saw – that bar may still have
+# been forming, so its return was provisional – and then pushes the bars
+# that came after it.
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.config import CORRELATION_WINDOWS, CORRELATION_MIN_PERIODS, CORRELATION_TOP_PAIRS
+
+
+class RollingCorrelation:
+    def __init__(self, tickers: List[str], window: int, min_periods: Optional[int] = None):
+        self.tickers = list(tickers)
+        self.window = window
+        self.min_periods = min_periods if min_periods is not None else max(3, window // 2)
+        n = len(self.tickers)
+        self.buf = np.zeros((window, n))
+        self.valid = np.zeros((window, n), dtype=bool)
+        self.count = 0
+        self.nobs = np.zeros((n, n))
+        self.sx = np.zeros((n, n))
+        self.sxx = np.zeros((n, n))
+        self.sxy = np.zeros((n, n))
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.window
+
+    def _resync(self) -> None:
+        rows = slice(None) if self.full else slice(0, self.count)
+        x, v = self.buf[rows], self.valid[rows].astype("float64")
+        self.nobs = v.T @ v
+        self.sx = x.T @ v
+        self.sxx = (x * x).T @ v
+        self.sxy = x.T @ x
+
+    def _add(self, x: np.ndarray, v: np.ndarray, sign: float) -> None:
+        self.nobs += sign * np.outer(v, v)
+        self.sx += sign * np.outer(x, v)
+        self.sxx += sign * np.outer(x * x, v)
+        self.sxy += sign * np.outer(x, x)
+
+    def push(self, returns: np.ndarray) -> None:
+        """One bar's returns (NaN where a ticker has none)."""
+        returns = np.asarray(returns, dtype="float64")
+        v = ~np.isnan(returns)
+        x = np.where(v, returns, 0.0)
+        i = self.count % self.window
+        if self.full:
+            self._add(self.buf[i], self.valid[i].astype("float64"), -1.0)
+        self.buf[i], self.valid[i] = x, v
+        self.count += 1
+        if self.count % self.window == 0:
+            self._resync()
+            return
+        self._add(x, v.astype("float64"), 1.0)
+
+    def replace_last(self, returns: np.ndarray) -> None:
+        """Swap the newest bar's returns for `returns` (it was pushed while still forming)."""
+        if not self.count:
+            self.push(returns)
+            return
+        returns = np.asarray(returns, dtype="float64")
+        v = ~np.isnan(returns)
+        x = np.where(v, returns, 0.0)
+        i = (self.count - 1) % self.window
+        self._add(self.buf[i], self.valid[i].astype("float64"), -1.0)
+        self.buf[i], self.valid[i] = x, v
+        self._add(x, v.astype("float64"), 1.0)
+
+    def fill(self, returns: np.ndarray) -> None:
+        """State after pushing every row of `returns` (time × tickers); only the last `window` are kept."""
+        returns = np.asarray(returns, dtype="float64").reshape(-1, len(self.tickers))
+        self.count = len(returns)
+        tail = returns[-self.window:]
+        slots = np.arange(self.count - len(tail), self.count) % self.window
+        self.valid[slots] = ~np.isnan(tail)
+        self.buf[slots] = np.where(self.valid[slots], tail, 0.0)
+        self._resync()
+
+    def _moments(self):
+        n = self.nobs
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = n * self.sxy - self.sx * self.sx.T                 # n²·cov(i, j)
+            var = n * self.sxx - self.sx * self.sx                   # n²·var(i) over the pair's bars
+        enough = n >= self.min_periods
+        return cov, np.maximum(var, 0.0), enough
+
+    def correlation(self) -> np.ndarray:
+        cov, var, enough = self._moments()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = np.clip(cov / np.sqrt(var * var.T), -1.0, 1.0)
+        return np.where(enough, corr, np.nan)
+
+    def beta(self) -> np.ndarray:
+        """beta[i, j]: slope of ticker i's returns on ticker j's."""
+        cov, var, enough = self._moments()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(enough, cov / var.T, np.nan)
+
+    def correlation_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.correlation(), index=self.tickers, columns=self.tickers)
+
+    def beta_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.beta(), index=self.tickers, columns=self.tickers)
+
+    def top_pairs(self, k: int = CORRELATION_TOP_PAIRS) -> Dict[str, pd.DataFrame]:
+        """{"CoMoving": k most correlated pairs, "Diverging": k most anti-correlated} – A, B, Correlation, Beta (A on B)."""
+        corr, beta = self.correlation(), self.beta()
+        a, b = np.triu_indices(len(self.tickers), 1)
+        values = corr[a, b]
+        ok = np.flatnonzero(~np.isnan(values))
+        out = {}
+        for kind, key in (("CoMoving", -values[ok]), ("Diverging", values[ok])):
+            m = min(k, len(ok))
+            if m:
+                pick = np.argpartition(key, m - 1)[:m]
+                pick = pick[np.argsort(key[pick], kind="stable")]
+            else:
+                pick = np.empty(0, dtype="int64")
+            i, j = a[ok[pick]], b[ok[pick]]
+            out[kind] = pd.DataFrame({
+                "A": [self.tickers[x] for x in i], "B": [self.tickers[x] for x in j],
+                "Correlation": corr[i, j], "Beta": beta[i, j],
+            })
+        return out
+
+
+def close_panel(frames: Dict[str, pd.DataFrame], tickers: List[str]) -> pd.DataFrame:
+    """(time × ticker) Close prices on the union of bar times."""
+    closes = {t: frames[t]["Close"] for t in tickers if t in frames and not frames[t].empty}
+    return pd.DataFrame(closes).sort_index() if closes else pd.DataFrame()
+
+
+class CorrelationBook:
+    """One RollingCorrelation per timeframe label, advanced by the bars since (and including) the last one it saw."""
+
+    def __init__(self, windows: Optional[Dict[str, int]] = None):
+        self.windows = windows if windows is not None else CORRELATION_WINDOWS
+        self.states: Dict[str, RollingCorrelation] = {}
+        self._last_ts: Dict[str, pd.Timestamp] = {}
+
+    def update(self, label: str, closes: pd.DataFrame) -> Optional[RollingCorrelation]:
+        """Feed a timeframe's Close panel; returns its state (None if too few bars / tickers)."""
+        if closes.shape[0] < 2 or closes.shape[1] < 2:
+            return self.states.get(label)
+        returns = closes.pct_change(fill_method=None)
+        state, last = self.states.get(label), self._last_ts.get(label)
+        if state is not None and state.tickers == list(closes.columns) and last in closes.index:
+            # The last bar seen may have been in progress: replace its provisional return
+            state.replace_last(returns.loc[last].to_numpy(dtype="float64", na_value=np.nan))
+            new = returns[returns.index > last]
+            for row in new.to_numpy(dtype="float64", na_value=np.nan):
+                state.push(row)
+        else:
+            state = RollingCorrelation(list(closes.columns), self.windows.get(label.lower(), 60), CORRELATION_MIN_PERIODS)
+            state.fill(returns.iloc[1:].to_numpy(dtype="float64", na_value=np.nan))
+            self.states[label] = state
+        self._last_ts[label] = closes.index[-1]
+        return state
+
+    def pair_summary(self, k: int = CORRELATION_TOP_PAIRS) -> Dict[str, Dict[str, list]]:
+        """{label: {"CoMoving_Pairs": [...], "Diverging_Pairs": [...]}} in the indicatorSummary cell format."""
+        cells = {}
+        for label, state in self.states.items():
+            cells[label] = {
+                f"{kind}_Pairs": [
+                    {"Pair": f"{a}/{b}", "Correlation": round(float(c), 4), "Beta": round(float(beta), 4)}
+                    for a, b, c, beta in pairs.itertuples(index=False)
+                ]
+                for kind, pairs in state.top_pairs(k).items()
+            }
+        return cells
+
+
+def add_pairs_to_summary(summary_df: pd.DataFrame, cells: Dict[str, Dict[str, list]]) -> pd.DataFrame:
+    """Append CoMoving_Pairs / Diverging_Pairs columns to the per-timeframe summary rows."""
+    if summary_df.empty or not cells:
+        return summary_df
+    summary_df = summary_df.copy()
+    for column in ("CoMoving_Pairs", "Diverging_Pairs"):
+        summary_df[column] = [cells.get(label, {}).get(column, []) for label in summary_df["Timeframe"]]
+    return summary_df
+
+
+_book: Optional[CorrelationBook] = None
+
+
+def get_correlation_book() -> CorrelationBook:
+    """The process-wide book, kept across daemon refreshes."""
+    global _book
+    if _book is None:
+        _book = CorrelationBook()
+    return _book
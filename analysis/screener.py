@@ -0,0 +1,261 @@
+# === analysis/screener.py ===
+#
+# In-memory screening over the per-timeframe snapshots.
+#
+#   screener = Screener(snapshots)                     # {label: snapshot}
+#   screener.screen("RSI_Z_1D > 2 and CMF_Z_1H < -1")  # → DataFrame of matches
+#
+# Snapshot columns already carry their timeframe label (RSI_Z_1D, CMF_Z_1H …),
+# so one namespace covers every timeframe. Each column referenced by a query
+# gets a sorted index on first use – its non-NaN values ascending plus the
+# matching ticker ids – so a range predicate is two binary searches and a
+# slice. `and` / `or` / `not` are set intersection / union / complement on
+# sorted id arrays (smallest operand first for `and`).
+#
+# Filter expressions:
+#   <column> <op> <number>        op: > >= < <= == != (= is ==)
+#   <number> <op> <column>
+#   <column> between <lo> and <hi>    (inclusive)
+#   not …, … and …, … or …, ( … )     keywords are case-insensitive
+# NaN satisfies no comparison; `not` complements over every ticker.
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+      | (?P<op>>=|<=|==|!=|>|<|=)
+      | (?P<paren>[()])
+      | (?P<name>[A-Za-z_][\w.]*)
+    )""", re.VERBOSE)
+_KEYWORDS = {"and", "or", "not", "between"}
+_FLIP = {">": "<", ">=": "<=", "<": ">", "<=": ">=", "==": "==", "!=": "!="}
+
+
+@dataclass(frozen=True)
+class Predicate:
+    column: str
+    op: str                     # > >= < <= == != between
+    value: float
+    upper: Optional[float] = None
+
+
+Node = Union[Predicate, Tuple]   # ("and" | "or", left, right) / ("not", node)
+
+
+# ── Parsing ────────────────────────────────────────────────────────────────
+def _tokenize(expression: str) -> List[Tuple[str, str]]:
+    tokens, pos = [], 0
+    expression = expression.rstrip()
+    while pos < len(expression):
+        match = _TOKEN.match(expression, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(f"Cannot parse filter at: {expression[pos:]!r}")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "name" and text.lower() in _KEYWORDS:
+            kind, text = "keyword", text.lower()
+        tokens.append((kind, text))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent: or_expr := and_expr (or and_expr)*; and_expr := unary (and unary)*."""
+
+    def __init__(self, expression: str):
+        self.tokens = _tokenize(expression)
+        self.pos = 0
+
+    def peek(self, kind: str, text: Optional[str] = None) -> bool:
+        if self.pos >= len(self.tokens):
+            return False
+        k, t = self.tokens[self.pos]
+        return k == kind and (text is None or t == text)
+
+    def take(self, kind: str, text: Optional[str] = None) -> str:
+        if not self.peek(kind, text):
+            found = self.tokens[self.pos][1] if self.pos < len(self.tokens) else "end of filter"
+            raise ValueError(f"Expected {text or kind}, found {found!r}")
+        self.pos += 1
+        return self.tokens[self.pos - 1][1]
+
+    def parse(self) -> Node:
+        node = self.or_expr()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected {self.tokens[self.pos][1]!r}")
+        return node
+
+    def or_expr(self) -> Node:
+        node = self.and_expr()
+        while self.peek("keyword", "or"):
+            self.pos += 1
+            node = ("or", node, self.and_expr())
+        return node
+
+    def and_expr(self) -> Node:
+        node = self.unary()
+        while self.peek("keyword", "and"):
+            self.pos += 1
+            node = ("and", node, self.unary())
+        return node
+
+    def unary(self) -> Node:
+        if self.peek("keyword", "not"):
+            self.pos += 1
+            return ("not", self.unary())
+        if self.peek("paren", "("):
+            self.pos += 1
+            node = self.or_expr()
+            self.take("paren", ")")
+            return node
+        return self.comparison()
+
+    def comparison(self) -> Predicate:
+        if self.peek("number"):
+            value = float(self.take("number"))
+            op = self.take("op")
+            column = self.take("name")
+            return Predicate(column, _FLIP[_canonical(op)], value)
+        column = self.take("name")
+        if self.peek("keyword", "between"):
+            self.pos += 1
+            lower = float(self.take("number"))
+            self.take("keyword", "and")
+            return Predicate(column, "between", lower, float(self.take("number")))
+        op = self.take("op")
+        return Predicate(column, _canonical(op), float(self.take("number")))
+
+
+def _canonical(op: str) -> str:
+    return "==" if op == "=" else op
+
+
+def parse_filter(expression: str) -> Node:
+    """Filter expression → predicate tree (Predicate leaves, ("and"|"or", l, r) / ("not", n) nodes)."""
+    return _Parser(expression).parse()
+
+
+def predicate_columns(node: Node) -> List[str]:
+    if isinstance(node, Predicate):
+        return [node.column]
+    return list(dict.fromkeys(c for child in node[1:] for c in predicate_columns(child)))
+
+
+# ── Index ──────────────────────────────────────────────────────────────────
+class Screener:
+    def __init__(self, snapshots: Dict[str, pd.DataFrame]):
+        # Ticker ids: order of first appearance across the snapshots
+        tickers = []
+        for df in snapshots.values():
+            tickers.extend(df["Ticker"].astype(str))
+        self.tickers = np.array(list(dict.fromkeys(tickers)), dtype=object)
+        self._ids = {t: i for i, t in enumerate(self.tickers)}
+        self._all = np.arange(len(self.tickers))
+
+        # Dense per-column values by ticker id (NaN where a timeframe lacks the ticker)
+        self.columns: Dict[str, np.ndarray] = {}
+        for df in snapshots.values():
+            ids = np.array([self._ids[t] for t in df["Ticker"].astype(str)], dtype="int64")
+            for col in df.columns:
+                if col in ("Ticker", "Timeframe", "Date", "Time", "Epoch") or col in self.columns:
+                    continue
+                values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+                dense = np.full(len(self.tickers), np.nan)
+                dense[ids] = values
+                self.columns[col] = dense
+        self._indexes: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def index(self, column: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(values ascending, ticker ids) for `column`, NaNs dropped – built on first use."""
+        if column not in self._indexes:
+            if column not in self.columns:
+                raise KeyError(f"Unknown column {column!r}")
+            dense = self.columns[column]
+            ids = np.flatnonzero(~np.isnan(dense))
+            order = np.argsort(dense[ids], kind="stable")
+            self._indexes[column] = (dense[ids][order], ids[order])
+        return self._indexes[column]
+
+    def build_indexes(self, columns: Optional[List[str]] = None) -> None:
+        for column in columns or list(self.columns):
+            self.index(column)
+
+    # ── evaluation ──
+    def _match(self, p: Predicate) -> np.ndarray:
+        values, ids = self.index(p.column)
+        if p.op == "between":
+            lo, hi = np.searchsorted(values, p.value, "left"), np.searchsorted(values, p.upper, "right")
+        elif p.op == ">":
+            lo, hi = np.searchsorted(values, p.value, "right"), len(values)
+        elif p.op == ">=":
+            lo, hi = np.searchsorted(values, p.value, "left"), len(values)
+        elif p.op == "<":
+            lo, hi = 0, np.searchsorted(values, p.value, "left")
+        elif p.op == "<=":
+            lo, hi = 0, np.searchsorted(values, p.value, "right")
+        elif p.op == "==":
+            lo, hi = np.searchsorted(values, p.value, "left"), np.searchsorted(values, p.value, "right")
+        elif p.op == "!=":
+            lo, hi = np.searchsorted(values, p.value, "left"), np.searchsorted(values, p.value, "right")
+            return np.sort(np.concatenate([ids[:lo], ids[hi:]]))
+        else:
+            raise ValueError(f"Unknown operator {p.op!r}")
+        return np.sort(ids[lo:max(lo, hi)])
+
+    def _evaluate(self, node: Node) -> np.ndarray:
+        if isinstance(node, Predicate):
+            return self._match(node)
+        if node[0] == "not":
+            return np.setdiff1d(self._all, self._evaluate(node[1]), assume_unique=True)
+        if node[0] == "and":
+            # Flatten a chain of ands and intersect smallest first
+            operands, stack = [], [node]
+            while stack:
+                n = stack.pop()
+                if isinstance(n, tuple) and n[0] == "and":
+                    stack.extend(n[1:])
+                else:
+                    operands.append(self._evaluate(n))
+            operands.sort(key=len)
+            result = operands[0]
+            for ids in operands[1:]:
+                if not len(result):
+                    break
+                result = np.intersect1d(result, ids, assume_unique=True)
+            return result
+        return np.union1d(self._evaluate(node[1]), self._evaluate(node[2]))
+
+    def query(self, expression: str) -> np.ndarray:
+        """Tickers matching `expression`, in snapshot order."""
+        return self.tickers[self._evaluate(parse_filter(expression))]
+
+    def screen(self, expression: str, columns: Optional[List[str]] = None,
+               sort: Optional[str] = None, ascending: bool = False) -> pd.DataFrame:
+        """Matching tickers with the filter's columns (plus `columns`), optionally sorted by `sort`."""
+        tree = parse_filter(expression)
+        ids = self._evaluate(tree)
+        shown = list(dict.fromkeys(predicate_columns(tree) + list(columns or []) + ([sort] if sort else [])))
+        unknown = [c for c in shown if c not in self.columns]
+        if unknown:
+            raise KeyError(f"Unknown column(s): {', '.join(unknown)}")
+        out = pd.DataFrame({"Ticker": self.tickers[ids], **{c: self.columns[c][ids] for c in shown}})
+        if sort:
+            out = out.sort_values(sort, ascending=ascending, na_position="last", kind="stable")
+        return out.reset_index(drop=True)
+
+
+def load_snapshots(market_dir: Path, labels: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+    """Saved marketData_<TF>.csv snapshots ({label: frame}); all found when `labels` is None."""
+    market_dir = Path(market_dir)
+    if labels is None:
+        paths = sorted(market_dir.glob("marketData_*.csv"))
+    else:
+        paths = [market_dir / f"marketData_{label.upper()}.csv" for label in labels]
+    return {p.stem.split("_", 1)[1]: pd.read_csv(p) for p in paths if p.exists()}
@@ -1,49 +1,134 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
 import pandas as pd
 from config.config import SUMMARY_INDICATORS, SUMMARY_TOP_N, SUMMARY_INCLUDE_TOP_BOTTOM_ONLY
 
+# === Top / Bottom k Engine ===
+# Every (timeframe, indicator) column of the snapshots is stacked into one
+# (tickers × columns) float64 block, NaN-padded where a timeframe has fewer
+# rows. One argpartition per side picks each column's k extremes in O(N);
+# only those k × columns candidates are sorted. NaNs are never ranked, so a
+# column with fewer than k values simply has fewer entries.
+
+@dataclass
+class TopBottom:
+    """Ranked entries, one per (timeframe, indicator, side, rank) – columnar."""
+    timeframe: np.ndarray       # str
+    indicator: np.ndarray       # str
+    side: np.ndarray            # "Top" | "Bottom"
+    rank: np.ndarray            # int64, 1 = most extreme
+    ticker: np.ndarray          # str
+    value: np.ndarray           # float64
+
+    def __len__(self) -> int:
+        return len(self.value)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "Timeframe": self.timeframe, "Indicator": self.indicator, "Side": self.side,
+            "Rank": self.rank, "Ticker": self.ticker, "Value": self.value,
+        })
+
+
+def _extremes(block: np.ndarray, k: int, largest: bool):
+    """(k × columns) row indices of each column's k largest / smallest values, most extreme first, and a validity mask."""
+    n = len(block)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((0, block.shape[1]), dtype="int64"), np.empty((0, block.shape[1]), dtype=bool)
+    missing = np.isnan(block)
+    key = np.where(missing, np.inf, -block if largest else block)      # ascending key, NaN last
+    candidates = np.sort(np.argpartition(key, k - 1, axis=0)[:k], axis=0)   # row order breaks ties
+    order = np.argsort(np.take_along_axis(key, candidates, axis=0), axis=0, kind="stable")
+    rows = np.take_along_axis(candidates, order, axis=0)
+    return rows, ~np.take_along_axis(missing, rows, axis=0)
+
+
+def rank_top_bottom(
+    snapshots: Dict[str, pd.DataFrame],
+    indicators: Optional[List[str]] = None,
+    k: Optional[int] = None,
+) -> TopBottom:
+    """Top and bottom `k` tickers for each indicator (label-free names) in each snapshot."""
+    indicators = SUMMARY_INDICATORS if indicators is None else indicators
+    k = SUMMARY_TOP_N if k is None else k
+
+    # Stack every available (timeframe, indicator) column into one block
+    columns, tickers, blocks = [], [], []
+    for label, df in snapshots.items():
+        for indicator in indicators:
+            col_name = f"{indicator}_{label}"
+            if col_name not in df.columns:
+                print(f"⚠️ Missing: {col_name}")
+                continue
+            columns.append((label, indicator))
+            tickers.append(df["Ticker"].to_numpy(dtype=object))
+            blocks.append(pd.to_numeric(df[col_name], errors="coerce").to_numpy(dtype="float64", na_value=np.nan))
+    depth = max((len(b) for b in blocks), default=0)
+    block = np.full((depth, len(blocks)), np.nan)
+    names = np.full((depth, len(blocks)), None, dtype=object)
+    for j, (values, names_j) in enumerate(zip(blocks, tickers)):
+        block[:len(values), j] = values
+        names[:len(values), j] = names_j
+
+    parts = []
+    for side, largest in (("Top", True), ("Bottom", False)):
+        rows, valid = _extremes(block, k, largest)
+        rank, col = np.nonzero(valid)
+        row = rows[rank, col]
+        parts.append((side, col, rank + 1, names[row, col], block[row, col]))
+
+    # Order: timeframe / indicator as given, Top before Bottom, then rank
+    side = np.concatenate([np.full(len(p[1]), p[0], dtype=object) for p in parts])
+    col = np.concatenate([p[1] for p in parts]).astype("int64")
+    rank = np.concatenate([p[2] for p in parts]).astype("int64")
+    order = np.lexsort((rank, side != "Top", col))
+    labels = np.array([c[0] for c in columns], dtype=object)
+    inds = np.array([c[1] for c in columns], dtype=object)
+    return TopBottom(
+        timeframe=labels[col[order]],
+        indicator=inds[col[order]],
+        side=side[order],
+        rank=rank[order],
+        ticker=np.concatenate([p[3] for p in parts])[order],
+        value=np.concatenate([p[4] for p in parts]).astype("float64")[order],
+    )
+
+
 # === Summarize Top/Bottom ETFs Dynamically by Indicator ===
 def summarize_top_bottom_indicators(
-    snapshots: dict[str, pd.DataFrame]
+    snapshots: dict[str, pd.DataFrame],
+    indicators: Optional[List[str]] = None,
+    k: Optional[int] = None,
 ) -> pd.DataFrame:
-    
-    def extract_sorted_dicts(df, value_col, indicator_name, n):
-        df_sorted = df.sort_values(by=value_col, ascending=False, na_position='last')
-        top = [
-            {
-                "Ticker": row["Ticker"],
-                "Indicator": indicator_name,
-                "Value": round(row[value_col], 4)
-            }
-            for _, row in df_sorted.head(n).iterrows()
-        ]
-        bottom = [
-            {
-                "Ticker": row["Ticker"],
-                "Indicator": indicator_name,
-                "Value": round(row[value_col], 4)
-            }
-            for _, row in df_sorted.tail(n).iloc[::-1].iterrows()
-        ]
-        return top, bottom
+    """
+    indicatorSummary.csv layout: one row per timeframe, `<Indicator>_Top` /
+    `<Indicator>_Bottom` cells holding [{"Ticker", "Indicator", "Value"}, …]
+    lists, built from rank_top_bottom().
+    """
+    indicators = SUMMARY_INDICATORS if indicators is None else indicators
+    ranked = rank_top_bottom(snapshots, indicators, k)
 
-    summary = []
+    cells: Dict[tuple, list] = {}
+    for label, indicator, side, ticker, value in zip(
+        ranked.timeframe, ranked.indicator, ranked.side, ranked.ticker, ranked.value
+    ):
+        cells.setdefault((label, indicator, side), []).append(
+            {"Ticker": ticker, "Indicator": indicator, "Value": round(float(value), 4)}
+        )
 
+    summary = []
     for label, df in snapshots.items():
         snapshot_summary = {"Timeframe": label}
 
-        for indicator in SUMMARY_INDICATORS:
+        for indicator in indicators:
             col_name = f"{indicator}_{label}"
             if col_name not in df.columns:
-                print(f"⚠️ Missing: {col_name}")
-                continue
-
-            try:
-                top, bottom = extract_sorted_dicts(df, col_name, indicator, SUMMARY_TOP_N)
-                snapshot_summary[f"{indicator}_Top"] = top
-                snapshot_summary[f"{indicator}_Bottom"] = bottom
-            except Exception as e:
-                print(f"❌ Error summarizing {indicator} on {label}: {e}")
                 continue
+            snapshot_summary[f"{indicator}_Top"] = cells.get((label, indicator, "Top"), [])
+            snapshot_summary[f"{indicator}_Bottom"] = cells.get((label, indicator, "Bottom"), [])
 
             if not SUMMARY_INCLUDE_TOP_BOTTOM_ONLY:
                 for suffix in ["Avg", "Slope"]:
@@ -1,14 +1,189 @@
 # === analysis/support_resistance.py ===
+#
+# Volume-profile support / resistance, batched over many (ticker, timeframe)
+# bar series at once.
+#
+# Each series gets `bins` equal-width price bins between its lowest and
+# highest price. Bars of all series are binned together: a series' bins
+# occupy their own slice of one flat profile, so a single np.bincount fills
+# every profile. Bins are half-open like np.histogram (the top price falls
+# in the last bin), so no bar is counted twice.
+#
+#   spread="close"   each bar's volume sits at its Close
+#   spread="range"   each bar's volume is spread evenly over its Low–High
+#                    range; per bin this is the integral of the summed bar
+#                    densities, from prefix sums over the sorted range ends
+#                    (O((n + bins) log n), no per-bin pass over the bars)
+#
+# The `top` highest-volume bins are the levels; those below the last Close
+# are support, those above resistance, nearest first – the first `strong`
+# of each side are "strong", the rest "weak". Levels and Close are compared
+# at the cent, so a level at the close itself is neither.
 
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Tuple
+
+import numpy as np
 import pandas as pd
 
-def get_support_resistance(df: pd.DataFrame, bins: int = 30) -> dict:
+from config.config import SR_BINS, SR_TOP_LEVELS, SR_STRONG_LEVELS, SR_VOLUME_SPREAD
+
+
+@dataclass
+class VolumeProfiles:
+    keys: List[Hashable]
+    low: np.ndarray             # (G,) bottom of each profile's price range
+    step: np.ndarray            # (G,) bin width
+    volume: np.ndarray          # (G, bins)
+    last_close: np.ndarray      # (G,)
+
+    def midpoints(self) -> np.ndarray:
+        bins = self.volume.shape[1]
+        return self.low[:, None] + (np.arange(bins) + 0.5) * self.step[:, None]
+
+
+def _range_profile(group, lo, hi, volume, n_groups: int, bins: int) -> np.ndarray:
+    """
+    Volume spread uniformly over [lo, hi] (positions in bin units, 0..bins)
+    integrated over each bin. F(e) = Σ_{lo<e} d·(e-lo) − Σ_{hi<e} d·(e-hi)
+    with d = volume / (hi - lo), evaluated at the bin edges of every group.
+    """
+    d = volume / (hi - lo)
+    span = bins + 2.0                                   # keeps groups apart on one sorted axis
+    edges = np.arange(bins + 1, dtype="float64")
+    edge_keys = (np.arange(n_groups)[:, None] * span + edges[None, :]).ravel()
+
+    def partial_sums(pos):
+        keys = group * span + pos
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        cum_d = np.concatenate([[0.0], np.cumsum(d[order])])
+        cum_dp = np.concatenate([[0.0], np.cumsum((d * pos)[order])])
+        at = np.searchsorted(keys, edge_keys, side="left")
+        start = np.repeat(np.searchsorted(keys, np.arange(n_groups) * span, side="left"), bins + 1)
+        return cum_d[at] - cum_d[start], cum_dp[at] - cum_dp[start]
+
+    d_lo, dp_lo = partial_sums(lo)
+    d_hi, dp_hi = partial_sums(hi)
+    e = np.tile(edges, n_groups)
+    cumulative = (e * (d_lo - d_hi) - (dp_lo - dp_hi)).reshape(n_groups, bins + 1)
+    return np.diff(cumulative, axis=1)
+
+
+def volume_profiles(
+    frames: Dict[Hashable, pd.DataFrame],
+    bins: int = SR_BINS,
+    spread: str = SR_VOLUME_SPREAD,
+) -> VolumeProfiles:
+    """Volume-by-price profile for every bar series in `frames` (needs Close / Volume; High / Low for "range")."""
+    if spread not in ("close", "range"):
+        raise ValueError(f"Unknown volume spread {spread!r} (choose from close, range)")
+    keys = [key for key, df in frames.items() if df is not None and not df.empty]
+    n_groups = len(keys)
+    if not n_groups:
+        return VolumeProfiles([], np.empty(0), np.empty(0), np.empty((0, bins)), np.empty(0))
+
+    lengths = np.array([len(frames[k]) for k in keys])
+    group = np.repeat(np.arange(n_groups), lengths)
+
+    def stacked(col: str) -> np.ndarray:
+        return np.concatenate([frames[k][col].to_numpy(dtype="float64") for k in keys])
+
+    close, volume = stacked("Close"), np.nan_to_num(stacked("Volume"))
+    if spread == "range":
+        low, high = np.fmin(stacked("Low"), close), np.fmax(stacked("High"), close)
+    else:
+        low = high = close
+    valid = ~(np.isnan(low) | np.isnan(high))
+
+    # Per-series price range → bin width (a flat series gets one cent of bins centred on its price)
+    floor = np.full(n_groups, np.inf)
+    ceil = np.full(n_groups, -np.inf)
+    np.minimum.at(floor, group[valid], low[valid])
+    np.maximum.at(ceil, group[valid], high[valid])
+    floor[np.isinf(floor)] = 0.0
+    ceil = np.maximum(ceil, floor)
+    flat = ceil <= floor
+    floor = np.where(flat, floor - 0.005, floor)
+    step = np.where(flat, 0.01 / bins, (ceil - floor) / bins)
+
+    lo = (low - floor[group]) / step[group]
+    hi = (high - floor[group]) / step[group]
+    point = valid & ((spread == "close") | (hi <= lo))   # bars with no range are point masses
+    ranged = valid & ~point
+
+    profile = np.zeros((n_groups, bins))
+    if point.any():
+        slot = np.clip(np.floor(lo[point]).astype("int64"), 0, bins - 1)
+        flat = group[point] * bins + slot
+        profile += np.bincount(flat, weights=volume[point], minlength=n_groups * bins).reshape(n_groups, bins)
+    if ranged.any():
+        profile += _range_profile(group[ranged], lo[ranged], hi[ranged], volume[ranged], n_groups, bins)
+
+    last_close = np.array([frames[k]["Close"].to_numpy(dtype="float64")[-1] for k in keys])
+    return VolumeProfiles(keys, floor, step, profile, last_close)
+
+
+def support_resistance_levels(
+    frames: Dict[Tuple[str, str], pd.DataFrame],
+    bins: int = SR_BINS,
+    top: int = SR_TOP_LEVELS,
+    strong: int = SR_STRONG_LEVELS,
+    spread: str = SR_VOLUME_SPREAD,
+) -> pd.DataFrame:
+    """
+    Levels for every {(ticker, timeframe): bars} series as one long frame:
+    Ticker, Timeframe, Close, Kind (strong_support … weak_resistance),
+    Rank (1 = nearest the close), Price (bin midpoint), Volume.
+    """
+    columns = ["Ticker", "Timeframe", "Close", "Kind", "Rank", "Price", "Volume"]
+    profiles = volume_profiles(frames, bins, spread)
+    n_groups = len(profiles.keys)
+    if not n_groups:
+        return pd.DataFrame(columns=columns)
+
+    # Highest-volume bins per series (empty bins are never levels)
+    top = min(top, bins)
+    volume = profiles.volume
+    picks = np.argpartition(-volume, top - 1, axis=1)[:, :top]
+    price = np.round(np.take_along_axis(profiles.midpoints(), picks, axis=1), 2)
+    level_volume = np.take_along_axis(volume, picks, axis=1)
+    close = np.round(profiles.last_close[:, None], 2)
+    is_level = level_volume > 0
+
+    rows = []
+    for side, mask, nearest_first in (
+        ("support", is_level & (price < close), -price),
+        ("resistance", is_level & (price > close), price),
+    ):
+        key = np.where(mask, nearest_first, np.inf)
+        order = np.argsort(key, axis=1, kind="stable")
+        rank = np.argsort(order, axis=1) + 1                # 1 = nearest the close
+        g, j = np.nonzero(mask)
+        r = rank[g, j]
+        rows.append(pd.DataFrame({
+            "Ticker": [profiles.keys[i][0] for i in g],
+            "Timeframe": [profiles.keys[i][1] for i in g],
+            "Close": profiles.last_close[g],
+            "Kind": np.where(r <= strong, f"strong_{side}", f"weak_{side}"),
+            "Rank": r,
+            "Price": price[g, j],
+            "Volume": level_volume[g, j],
+            "_group": g,
+            "_side": 0 if side == "support" else 1,
+        }))
+    out = pd.concat(rows, ignore_index=True).sort_values(["_group", "_side", "Rank"], kind="stable")
+    return out[columns].reset_index(drop=True)
+
+
+def get_support_resistance(df: pd.DataFrame, bins: int = SR_BINS, spread: str = "close") -> dict:
     """
     Estimate support and resistance using volume-weighted price bins.
 
     Parameters:
-        df (pd.DataFrame): Must contain 'Close' and 'Volume'
+        df (pd.DataFrame): Must contain 'Close' and 'Volume' ('High' / 'Low' for spread="range")
         bins (int): Number of price levels to segment
+        spread (str): "close" puts each bar's volume at its Close, "range" spreads it over High–Low
 
     Returns:
         dict: Strong/weak support and resistance levels
@@ -16,32 +191,8 @@ def get_support_resistance(df: pd.DataFrame, bins: int = 30) -> dict:
     if "Close" not in df.columns or "Volume" not in df.columns:
         raise ValueError("DataFrame must include 'Close' and 'Volume' columns")
 
-    # Create volume-by-price profile
-    min_price = df["Close"].min()
-    max_price = df["Close"].max()
-    price_range = max_price - min_price
-    step = price_range / bins
-
-    volume_profile = {}
-    for i in range(bins):
-        lower = min_price + i * step
-        upper = lower + step
-        mask = df["Close"].between(lower, upper)
-        volume = df.loc[mask, "Volume"].sum()
-        volume_profile[round((lower + upper) / 2, 2)] = volume
-
-    # Sort by volume and pick top clusters
-    sorted_levels = sorted(volume_profile.items(), key=lambda x: x[1], reverse=True)
-    top_levels = [price for price, vol in sorted_levels[:5]]
-
-    # Split into support and resistance based on current price
-    current_price = df["Close"].iloc[-1]
-    support = sorted([lvl for lvl in top_levels if lvl < current_price], reverse=True)
-    resistance = sorted([lvl for lvl in top_levels if lvl > current_price])
-
-    return {
-        "strong_support": support[:2],
-        "weak_support": support[2:],
-        "strong_resistance": resistance[:2],
-        "weak_resistance": resistance[2:]
-    }
+    levels = support_resistance_levels({("", ""): df}, bins=bins, spread=spread)
+    result = {kind: [] for kind in ("strong_support", "weak_support", "strong_resistance", "weak_resistance")}
+    for kind, price in zip(levels["Kind"], levels["Price"]):
+        result[kind].append(float(price))
+    return result
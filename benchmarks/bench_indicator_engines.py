@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Per-ticker vs panel indicator engine on synthetic bars.
+
+    python benchmarks/bench_indicator_engines.py --tickers 60 500 2000 --bars 500
+
+For each universe size this times _snapshot_row() over every ticker (the
+"ticker" engine) against one panel_snapshot() call, and reports the largest
+relative difference between the two results so speed-ups never hide drift.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+
+from indicators.build_snapshots import _snapshot_row
+from indicators.data_providers import SyntheticProvider, synthetic_tickers
+from indicators.panel_indicators import panel_snapshot
+
+
+def bench(n_tickers: int, n_bars: int, interval: str, seed: int) -> dict:
+    provider = SyntheticProvider(n_bars=n_bars, seed=seed)
+    frames = {t: provider.generate(t, interval) for t in synthetic_tickers(n_tickers)}
+
+    start = time.perf_counter()
+    per_ticker = pd.concat([_snapshot_row(df, t, interval) for t, df in frames.items()], ignore_index=True)
+    ticker_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    panel = panel_snapshot(frames, interval)
+    panel_s = time.perf_counter() - start
+
+    numeric = [c for c in per_ticker.columns if c in panel.columns and pd.api.types.is_float_dtype(per_ticker[c])]
+    a = per_ticker[numeric].to_numpy(dtype="float64")
+    b = panel[numeric].to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel = np.abs(a - b) / np.maximum(np.abs(a), np.finfo(float).eps)
+    rel[np.isnan(a) & np.isnan(b)] = 0.0
+
+    return {
+        "tickers": n_tickers,
+        "bars": n_bars,
+        "ticker_s": round(ticker_s, 3),
+        "panel_s": round(panel_s, 3),
+        "speedup": round(ticker_s / panel_s, 1),
+        "max_rel_diff": float(np.nanmax(rel)) if rel.size else 0.0,
+        "missing_cols": sorted(set(per_ticker.columns) ^ set(panel.columns)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickers", type=int, nargs="+", default=[60, 500])
+    parser.add_argument("--bars", type=int, default=500)
+    parser.add_argument("--interval", default="1d")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    results = [bench(n, args.bars, args.interval, args.seed) for n in args.tickers]
+    print(pd.DataFrame(results).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
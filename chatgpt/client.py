@@ -1,6 +1,4 @@
 import logging
-from config.credentials import OPENAI_API_KEY
-from openai import OpenAI
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Union
 
@@ -50,13 +48,24 @@ MODEL_CONFIGS = {
     }
 }
 
-# Initialize client once
+# Singleton client, created on first use so importing this module (e.g. from
+# the GUI for MODEL_CONFIGS) does not load the OpenAI SDK or read credentials
+_client = None
+
 def get_client():
-    """Returns an initialized OpenAI client"""
-    return OpenAI(api_key=OPENAI_API_KEY)
+    """Returns the shared OpenAI client, initializing it on first call"""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        from config.credentials import OPENAI_API_KEY
+        _client = OpenAI(api_key=OPENAI_API_KEY)
+    return _client
 
-# Create a singleton client instance
-client = get_client()
+def __getattr__(name: str):
+    # Backwards compatibility for `from chatgpt.client import client`
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_prompt(prompt_type: str = DEFAULT_CONFIG["prompt_type"]) -> str:
     """Get the prompt template by type
@@ -157,12 +166,12 @@ def get_narration(
             if model_config["supports_reasoning"]:
                 params["reasoning"] = {"effort": "medium"}
             
-            response = client.responses.create(**params)
+            response = get_client().responses.create(**params)
             narration = response.output[1].content[0].text
             
         else:
             # Handle Chat Completions API for chat models
-            response = client.chat.completions.create(
+            response = get_client().chat.completions.create(
                 model=model,
                 messages=build_messages_chat(csv_blob, prompt_type),
                 temperature=temperature
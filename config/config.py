@@ -144,6 +144,26 @@ tickers = [
 # === Tickers for Support Resistance Price Volume Data ===
 SR_tickers = []
 
+# === Support / Resistance Levels ===
+# Volume-profile levels for SR_tickers on every run's timeframes, written to
+# marketData/supportResistance_<TF>.csv (analysis/support_resistance.py).
+# "close" puts each bar's volume at its Close; "range" spreads it over High–Low.
+SR_BINS = 30
+SR_TOP_LEVELS = 5               # highest-volume bins kept as levels
+SR_STRONG_LEVELS = 2            # nearest levels on each side labelled "strong"
+SR_VOLUME_SPREAD = "close"
+
+# === Rotation / Correlation ===
+# Rolling correlation / beta of bar returns between every pair of tickers, per
+# timeframe, over the last CORRELATION_WINDOWS bars (analysis/correlation.py).
+# The most co-moving and most diverging pairs go into indicatorSummary.csv.
+# A pair needs CORRELATION_MIN_PERIODS shared returns (None: half the window).
+# Universes above CORRELATION_MAX_TICKERS are skipped (the matrices are N × N).
+CORRELATION_WINDOWS = {"5m": 78, "1h": 35, "1d": 60, "1wk": 52, "1mo": 24}
+CORRELATION_MIN_PERIODS = None
+CORRELATION_TOP_PAIRS = 3
+CORRELATION_MAX_TICKERS = 500
+
 # === Indicator Parameters ===
 DEFAULT_CMF_LENGTH = 20
 DEFAULT_RSI_LENGTH = 14
@@ -165,6 +185,123 @@ INTERVAL_PERIOD_MAP = {
 
 }
 
+# === Data Provider ===
+# Where OHLCV bars come from (indicators/data_providers.py):
+#   "alpaca"    – live Alpaca API (needs config/credentials.py)
+#   "replay"    – recorded bars in REPLAY_DATA_DIR (<TICKER>_<TF>.csv or .parquet)
+#   "synthetic" – seeded random walks, SYNTHETIC_BARS bars per ticker
+# Override per run with `main.py --provider`. DATA_PROVIDERS lists the names
+# data_providers.PROVIDERS registers (the CLI reads it without importing pandas).
+DATA_PROVIDERS = ("alpaca", "replay", "synthetic")
+DATA_PROVIDER = "alpaca"
+REPLAY_DATA_DIR = "data/priceVolume"
+SYNTHETIC_BARS = 500
+SYNTHETIC_SEED = 42
+SYNTHETIC_TICKERS = 60
+
+# === Local Bar Store ===
+# Fetched OHLCV bars are persisted as Parquet under BAR_STORE_DIR, keyed by
+# (ticker, interval). Refreshes only request bars after the last stored one.
+# Relative to the run's output directory (`main.py -o`, default data/); code
+# that imports the fetch layer directly gets <repo>/data/.
+BAR_STORE_ENABLED = True
+BAR_STORE_DIR = "barStore"
+
+# === In-process Bar Cache ===
+# Upper bound on OHLCV bytes held in memory and shared across pipeline stages
+# (indicators/bar_cache.py). Least-recently-used frames are evicted first.
+BAR_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# === Fetch Engine ===
+# Rate limiting and retry policy for the async fetch engine (indicators/async_fetch.py).
+# Alpaca's free plan allows 200 requests per minute. The rate and the timeout
+# apply to each HTTP call – a batched bar request may be paginated into many.
+FETCH_REQUESTS_PER_MINUTE = 200
+FETCH_MAX_CONCURRENCY = 8
+FETCH_MAX_RETRIES = 5
+FETCH_BACKOFF_BASE_SECONDS = 1.0
+FETCH_BACKOFF_MAX_SECONDS = 60.0
+FETCH_TIMEOUT_SECONDS = 30.0
+FETCH_BATCH_SIZE = 200          # tickers per batched bar request (Alpaca symbol-list / URL limit)
+
+# === Indicator Engine ===
+# "ticker" runs the pandas_ta functions per ticker as bars arrive; "panel"
+# computes a whole timeframe in one vectorized pass (indicators/panel_indicators.py).
+INDICATOR_ENGINE = "ticker"
+
+# Worker processes for the "ticker" engine (`--workers N`); 1 computes in-process.
+# Bars reach the workers through shared memory (indicators/parallel_compute.py).
+COMPUTE_WORKERS = 1
+
+# === Indicator Result Cache ===
+# Indicator and enhancer results are cached in SQLite keyed by a hash of their
+# inputs – the (ticker, timeframe) bars plus the registry entry – so a rerun on
+# unchanged bars (after the close, offline providers) skips the compute
+# (indicators/result_cache.py). During market hours every timeframe's last bar
+# is still forming, so intraday runs rarely hit. Least-recently-used entries are evicted past
+# RESULT_CACHE_MAX_BYTES. `--no-result-cache` turns it off for a run.
+# RESULT_CACHE_PATH is relative to the output directory, like BAR_STORE_DIR.
+RESULT_CACHE_ENABLED = True
+RESULT_CACHE_PATH = "resultCache/results.sqlite"
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# === Daemon Mode ===
+# `main.py --daemon` refreshes each timeframe when one of its bars closes on the
+# US-equity session calendar (data_processing/market_calendar.py). The refresh
+# waits this long after the close so the provider has published the bar.
+DAEMON_SETTLE_SECONDS = 20
+
+# === Streaming ===
+# `main.py --stream` subscribes to one-minute bars on the Alpaca market-data
+# websocket, rolls them up into STREAM_TIMEFRAMES and rewrites those snapshots
+# as each bar closes (indicators/stream_ingest.py); history is fetched once,
+# at start-up. A bucket whose last minute never arrives is closed
+# STREAM_IDLE_SECONDS after its end. `--stream-replay` replays the provider's
+# last session of minute bars from a local stand-in server instead
+# (indicators/stream_replay.py), STREAM_REPLAY_SPEED times faster than real time.
+# A dropped live connection is retried after STREAM_RECONNECT_BASE_SECONDS,
+# doubling per failed attempt up to STREAM_RECONNECT_MAX_SECONDS.
+STREAM_URL = "wss://stream.data.alpaca.markets/v2/iex"
+STREAM_TIMEFRAMES = ["5m", "1h"]
+STREAM_IDLE_SECONDS = 5
+STREAM_REPLAY_SPEED = 60.0
+STREAM_RECONNECT_BASE_SECONDS = 1.0
+STREAM_RECONNECT_MAX_SECONDS = 60.0
+
+# === As-of Backfill ===
+# `main.py --backfill` rebuilds the snapshot every past run would have produced,
+# at every historical bar, and writes one long (AsOf, Ticker) panel per
+# timeframe to BACKFILL_DIR/asof_<TF>.parquet (data_processing/asof_backfill.py).
+# Rows are written in Parquet row groups of BACKFILL_ROW_GROUP timestamps.
+# BACKFILL_DIR is relative to the output directory, like BAR_STORE_DIR.
+BACKFILL_DIR = "backfill"
+BACKFILL_ROW_GROUP = 500
+
+# === Compact Memory Mode ===
+# With `--compact`, cached bars are float32 prices + int64 volume and snapshots
+# use float32 columns, categorical Ticker / Timeframe and an int64 Epoch column
+# (indicators/compact.py). A float32 result further than this relative error
+# from its float64 twin is logged as a warning.
+COMPACT_MODE = False
+COMPACT_ACCURACY_TOLERANCE = 1e-4
+
+# === Universe Runs ===
+# `--universe-file` streams tickers from a holdings CSV (e.g. IWM_holdings.csv)
+# through the pipeline in chunks, checkpointing each chunk (indicators/universe.py).
+# UNIVERSE_CHECKPOINT_DIR is relative to the output directory, like BAR_STORE_DIR.
+UNIVERSE_CHUNK_SIZE = 200
+UNIVERSE_CHECKPOINT_DIR = "checkpoints"
+UNIVERSE_ASSET_CLASSES = ("Equity",)
+
+# === Derived Timeframes ===
+# With `--derive-timeframes`, only the base series is fetched and these
+# timeframes are resampled locally from it (see indicators/resample_bars.py).
+DERIVED_TIMEFRAME_BASES = {
+    "1h": "5m",
+    "1wk": "1d",
+    "1mo": "1d",
+}
+
 
 # === INDICATOR_REGISTRY ===
 # This registry defines all base indicators used in the system and maps them to their corresponding
@@ -180,9 +317,11 @@ INTERVAL_PERIOD_MAP = {
 # - "params": Dict of parameters passed to the ta function
 # - "with_avg": If True, appends a rolling average (e.g. RSI_1H_Avg)
 # - "with_slope": If True, appends a simple diff-based slope (e.g. OBV_1D_Slope)
+# - "outputs": Column names (minus label) for functions returning several columns; defaults
+#   to the registry key. The column planner uses it to map e.g. BBP_20_2.0 back to BB_POS.
 #
 # IMPORTANT:
-# - These functions are evaluated dynamically using `eval()` or `getattr()` in compute_indicators.py
+# - These functions are resolved once into the indicator table (indicators/indicator_table.py)
 # - This is the only place that defines which raw indicators are computed — enhancements come later
 #
 # If you're adding a new ta indicator, define it here first before building any enhancements.
@@ -196,7 +335,8 @@ INDICATOR_REGISTRY = {
     # ─── Momentum & Oscillators ───
     "RSI":  {"func": "ta.rsi",  "columns": ["Close"], "params": {"length": 14},
              "with_avg": True, "with_slope": True},
-    "MACD": {"func": "ta.macd", "columns": ["Close"], "params": {}},
+    "MACD": {"func": "ta.macd", "columns": ["Close"], "params": {},
+             "outputs": ["MACD_12_26_9", "MACDh_12_26_9", "MACDs_12_26_9"]},
 
     # ─── Volatility / Range ───
     "ATR":  {"func": "ta.atr",  "columns": ["High", "Low", "Close"],
@@ -206,11 +346,20 @@ INDICATOR_REGISTRY = {
     "VWAP": {"func": "series_vwap", "columns": ["High", "Low", "Close", "Volume"],
              "params": {"window": 20}},
     "BB_POS": {"func": "ta.bbands", "columns": ["Close"],
-               "params": {"length": 20, "std": 2, "append": False}}
+               "params": {"length": 20, "std": 2, "append": False},
+               "outputs": ["BBL_20_2.0", "BBM_20_2.0", "BBU_20_2.0", "BBB_20_2.0", "BBP_20_2.0"]}
 }
 
 
 
+# === Indicator Plugins ===
+# Extra indicator modules imported when the indicator table is compiled
+# (indicators/indicator_table.py). Each module defines register(table) and
+# calls table.register(name, func, columns, params), or decorates functions
+# with @register_indicator(...). Outputs are named <name>_<LABEL>.
+INDICATOR_PLUGINS = []
+
+
 # === INDICATOR_ENHANCERS ===
 # This dictionary defines which post-processing functions should be applied to each indicator
 # after the base values are computed via `compute_indicators()`.
@@ -274,4 +423,11 @@ PASSTHROUGH_REGISTRY = {
 # === Summary Output Indicators ===
 SUMMARY_INDICATORS = ["CMF", "RSI_Z", "CMF_Z", "OBV_Z", "MACDh_12_26_9_Z", "VWAP_Z", "sumZZ"]
 SUMMARY_TOP_N = 2
-SUMMARY_INCLUDE_TOP_BOTTOM_ONLY = True
\ No newline at end of file
+SUMMARY_INCLUDE_TOP_BOTTOM_ONLY = True
+
+# === Column Planner ===
+# Columns kept in the marketData_<TF>.csv snapshots, minus label (e.g. "RSI",
+# "VOLUME_Avg", "OBV_Trend"). The planner (indicators/column_planner.py) computes
+# these plus BASE_FEATURES and SUMMARY_INDICATORS and whatever they depend on –
+# nothing else. None keeps every column the registries can produce.
+SNAPSHOT_COLUMNS = None
\ No newline at end of file
@@ -5,13 +5,14 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-def archive_good_enough_files(source_dir: Path, archive_subdir: str = "historicalGoodEnoughData") -> int:
+def archive_good_enough_files(source_dir: Path, archive_subdir: str = "historicalGoodEnoughData", labels=None) -> int:
     """
     Archive goodEnough CSV files to a historical storage folder with timestamps.
     
     Args:
         source_dir: Directory containing the goodEnough files
         archive_subdir: Subdirectory name for the archived files
+        labels: Only archive these timeframes (e.g. ["5M"]); None archives every file
         
     Returns:
         int: Number of files archived
@@ -28,6 +29,8 @@ def archive_good_enough_files(source_dir: Path, archive_subdir: str = "historica
     for source_file in source_dir.glob("goodEnough_*.csv"):
         # Extract timeframe from filename (e.g., "goodEnough_1D.csv" → "1D")
         timeframe = source_file.stem.split("_")[1]
+        if labels is not None and timeframe not in labels:
+            continue
         
         # Create destination filename with timestamp
         dest_filename = f"goodEnough_{timeframe}_{timestamp}.csv"
@@ -0,0 +1,195 @@
+# === asof_backfill.py ===
+#
+# Historical "as-of" snapshots for ML training sets.
+#
+# archive_good_enough_files() keeps one snapshot per pipeline run; this
+# rebuilds the snapshot every run *would* have produced at every historical
+# bar, for every ticker, in one pass per timeframe:
+#
+#   1. indicators + passthroughs over each ticker's full history (one
+#      compute_indicators / compute_passthroughs call per ticker – they are
+#      causal, so row t equals the last row of the history cut at t)
+#   2. as-of alignment onto the union of bar times: one (time × ticker)
+#      array per column where each ticker carries its latest bar at or
+#      before t, and tickers without a bar yet are absent, not zero
+#   3. the cross-sectional steps of enhance_snapshot() – enhancers, sumZZ,
+#      slope_sumZZ – run over the ticker axis for all timestamps at once
+#      (BLOCK_FUNC_MAP kernels on a (ticker × time) block). Row-order
+#      enhancers see exactly the live snapshot's rows: timestamps are grouped
+#      by which tickers are present and each group is one kernel call.
+#
+# The output is a long panel (AsOf, Ticker, Timeframe, BarTime, features…)
+# written to Parquet in row groups of BACKFILL_ROW_GROUP timestamps.
+
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.config import BACKFILL_DIR, BACKFILL_ROW_GROUP, INDICATOR_ENHANCERS
+from data_processing.market_calendar import MARKET_TZ
+from indicators.column_planner import get_column_plan
+from indicators.compute_indicators import compute_indicators
+from indicators.compute_passthroughs import compute_passthroughs
+from indicators.enhance_indicators import BLOCK_FUNC_MAP, ENHANCER_SUFFIXES, FUNC_MAP
+from indicators.post_indicator_proccessing_functions import rolling_slope
+
+logger = logging.getLogger(__name__)
+
+# Under the repo's data/ – not the cwd – unless main.py points it at the run's output directory
+DEFAULT_OUTPUT_DIR = Path(__file__).resolve().parents[1] / "data" / BACKFILL_DIR
+
+
+class AsOfCube:
+    """Feature values as of each timestamp in `grid`: {column: (time × ticker) array}."""
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], tf: str, plan=None, start=None):
+        self.tickers = list(frames)
+        self.label = tf.upper()
+        plan = plan or get_column_plan()
+
+        # 1. Full-history features per ticker
+        features: Dict[str, pd.DataFrame] = {}
+        for ticker, bars in frames.items():
+            if bars is None or bars.empty:
+                continue
+            features[ticker] = pd.concat(
+                [compute_indicators(bars, tf, plan.indicators), compute_passthroughs(bars, tf, plan.passthroughs)],
+                axis=1,
+            )
+
+        # 2. As-of alignment onto the union of bar times
+        grid = pd.DatetimeIndex([])
+        if features:
+            stamps = np.unique(np.concatenate([f.index.as_unit("ns").asi8 for f in features.values()]))
+            grid = pd.to_datetime(stamps, unit="ns", utc=True)
+        if start is not None:
+            start = pd.Timestamp(start)
+            grid = grid[grid >= (start.tz_localize(MARKET_TZ) if start.tz is None else start)]
+        self.grid = grid
+        shape = (len(grid), len(self.tickers))
+        self.present = np.zeros(shape, dtype=bool)
+        self.bar_time = np.zeros(shape, dtype="int64")
+        # Column order = first appearance in ticker order, as in the live snapshot
+        self.data: Dict[str, np.ndarray] = {}
+        for j, ticker in enumerate(self.tickers):
+            frame = features.get(ticker)
+            if frame is None:
+                continue
+            stamps = frame.index.as_unit("ns").asi8
+            pos = np.searchsorted(stamps, grid.asi8, side="right") - 1
+            ok = pos >= 0
+            self.present[:, j] = ok
+            self.bar_time[ok, j] = stamps[pos[ok]]
+            block = frame.to_numpy(dtype="float64", na_value=np.nan)[pos[ok]]
+            for k, col in enumerate(frame.columns):
+                if col not in self.data:
+                    self.data[col] = np.full(shape, np.nan)
+                self.data[col][ok, j] = block[:, k]
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.data)
+
+    # ── cross-sectional steps ──
+    def _by_presence(self, data: np.ndarray, kernel) -> np.ndarray:
+        """kernel((present tickers × timestamps) block) per presence pattern → (time × ticker)."""
+        out = np.full(data.shape, np.nan)
+        patterns, groups = np.unique(self.present, axis=0, return_inverse=True)
+        for p, pattern in enumerate(patterns):
+            rows, cols = np.flatnonzero(groups.ravel() == p), np.flatnonzero(pattern)
+            if len(cols):
+                out[np.ix_(rows, cols)] = kernel(data[np.ix_(rows, cols)].T).T
+        return out
+
+    def enhance(self, enhancers_by_indicator: Dict[str, List[str]], sum_zz: bool = True,
+                slope_sum_zz: bool = True, trend_window: int = 20) -> None:
+        """apply_derived_features + add_sumZZ + slope_sumZZ, at every timestamp."""
+        label = self.label
+        for base_name, enhancers in enhancers_by_indicator.items():
+            input_col = f"{base_name}_{label}"
+            if input_col not in self.columns:
+                continue
+            for enhancer in enhancers:
+                output_col = f"{base_name}_{ENHANCER_SUFFIXES.get(enhancer, enhancer)}_{label}"
+                kernel = BLOCK_FUNC_MAP.get(enhancer)
+                if kernel is None:
+                    func = FUNC_MAP[enhancer]
+                    kernel = lambda b, f=func: np.column_stack([np.asarray(f(pd.Series(c))) for c in b.T])
+                try:
+                    self.data[output_col] = self._by_presence(self.data[input_col], kernel)
+                except Exception as e:
+                    print(f"❌ Error enhancing {input_col} with {enhancer}: {e}")
+
+        if sum_zz:
+            features = [key for key, enh in INDICATOR_ENHANCERS.items() if "z_score" in enh]
+            z_cols = [f"{feat}_Z_{label}" for feat in features if f"{feat}_Z_{label}" in self.data]
+            total = np.zeros(self.present.shape)
+            for col in z_cols:
+                total += np.nan_to_num(self.data[col])
+            self.data[f"sumZZ_{label}"] = np.where(self.present, total, np.nan)
+            if slope_sum_zz:
+                self.data[f"slope_sumZZ_{label}"] = self._by_presence(total, lambda b: rolling_slope(b, trend_window))
+
+    # ── output ──
+    def frames(self, row_group: int = BACKFILL_ROW_GROUP) -> Iterator[pd.DataFrame]:
+        """Long (AsOf, Ticker) rows, `row_group` timestamps at a time."""
+        tickers = pd.Categorical(self.tickers)
+        for t0 in range(0, len(self.grid), row_group):
+            t1 = min(t0 + row_group, len(self.grid))
+            present = self.present[t0:t1]
+            t_idx, n_idx = np.nonzero(present)
+            out = {
+                "AsOf": self.grid[t0:t1][t_idx],
+                "Ticker": tickers[n_idx],
+                "Timeframe": self.label,
+                "BarTime": pd.to_datetime(self.bar_time[t0:t1][t_idx, n_idx], unit="ns", utc=True),
+            }
+            out.update((col, values[t0:t1][t_idx, n_idx]) for col, values in self.data.items())
+            yield pd.DataFrame(out)
+
+
+def write_backfill(frames: Iterator[pd.DataFrame], path: Path) -> int:
+    """Stream row groups into one Parquet file (atomically replaced); returns rows written."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    writer, rows = None, 0
+    try:
+        for frame in frames:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema)
+            writer.write_table(table)
+            rows += len(frame)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is not None:
+        tmp.replace(path)
+    return rows
+
+
+def backfill_timeframe(
+    frames: Dict[str, pd.DataFrame],
+    tf: str,
+    output_dir: Path = DEFAULT_OUTPUT_DIR,
+    plan=None,
+    trend_window: int = 20,
+    start=None,
+) -> Optional[Path]:
+    """As-of snapshots of `frames` ({ticker: bars}) at every bar → <output_dir>/asof_<TF>.parquet."""
+    plan = plan or get_column_plan()
+    cube = AsOfCube(frames, tf, plan, start)
+    if not len(cube.grid):
+        logger.warning(f"No bars to backfill for {tf.upper()}")
+        return None
+    cube.enhance(plan.enhancers, plan.sum_zz, plan.slope_sum_zz, trend_window)
+    path = Path(output_dir) / f"asof_{cube.label}.parquet"
+    rows = write_backfill(cube.frames(), path)
+    logger.info(f"Backfilled {cube.label}: {len(cube.grid)} timestamps × {len(cube.tickers)} tickers → {rows} rows in {path}")
+    return path
@@ -0,0 +1,188 @@
+# === market_calendar.py ===
+#
+# US-equity (NYSE / Nasdaq) regular-session calendar and bar-close times.
+#
+# Sessions run 09:30–16:00 America/New_York, 09:30–13:00 on early-close days
+# (July 3, the day after Thanksgiving, Christmas Eve). Exchange holidays are
+# generated from their rules, with the usual weekend observance: Saturday →
+# Friday, Sunday → Monday (a Saturday New Year's Day is not observed).
+#
+# Bar closes follow the buckets of the bars actually in use:
+#   Nm   every N minutes from the session open (5m: 09:35, 09:40 …), plus a
+#        shorter last bucket at the close when N does not divide the session
+#   1h   fetched (the providers' clock-hour bars, extended hours included):
+#        every full hour from 05:00 to 20:00 (17:00 on early-close days)
+#        derived (`--derive-timeframes`, resample_bars.py's session buckets):
+#        10:30, 11:30 … 15:30, then the (shorter) last bucket at the close
+#   1d   the session close
+#   1wk  the close of the last session of the week
+#   1mo  the close of the last session of the month
+
+import re
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+MARKET_TZ = ZoneInfo("America/New_York")
+SESSION_OPEN = time(9, 30)
+SESSION_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+EXTENDED_OPEN = time(4, 0)          # pre-market
+EXTENDED_CLOSE = time(20, 0)        # after-hours
+EARLY_EXTENDED_CLOSE = time(17, 0)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th `weekday` (Mon=0) of the month; n=-1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(day: date) -> date:
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=None)
+def holidays(year: int) -> frozenset:
+    days = {
+        _nth_weekday(year, 1, 0, 3),                # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),                # Washington's Birthday
+        _easter(year) - timedelta(days=2),          # Good Friday
+        _nth_weekday(year, 5, 0, -1),               # Memorial Day
+        _observed(date(year, 7, 4)),                # Independence Day
+        _nth_weekday(year, 9, 0, 1),                # Labor Day
+        _nth_weekday(year, 11, 3, 4),               # Thanksgiving
+        _observed(date(year, 12, 25)),              # Christmas
+    }
+    if date(year, 1, 1).weekday() != 5:             # Saturday New Year's Day is not observed
+        days.add(_observed(date(year, 1, 1)))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))      # Juneteenth
+    return frozenset(days)
+
+
+@lru_cache(maxsize=None)
+def early_closes(year: int) -> frozenset:
+    days = {
+        date(year, 7, 3),
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24),
+    }
+    return frozenset(d for d in days if d.weekday() < 5 and d not in holidays(year))
+
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def session(day: date) -> Optional[Tuple[datetime, datetime]]:
+    """(open, close) as tz-aware New York datetimes, or None on a non-trading day."""
+    if not is_trading_day(day):
+        return None
+    close = EARLY_CLOSE if day in early_closes(day.year) else SESSION_CLOSE
+    return (datetime.combine(day, SESSION_OPEN, MARKET_TZ), datetime.combine(day, close, MARKET_TZ))
+
+
+def extended_session(day: date) -> Optional[Tuple[datetime, datetime]]:
+    """(pre-market open, after-hours close) as tz-aware New York datetimes, or None on a non-trading day."""
+    if not is_trading_day(day):
+        return None
+    close = EARLY_EXTENDED_CLOSE if day in early_closes(day.year) else EXTENDED_CLOSE
+    return (datetime.combine(day, EXTENDED_OPEN, MARKET_TZ), datetime.combine(day, close, MARKET_TZ))
+
+
+def next_trading_day(day: date) -> date:
+    day += timedelta(days=1)
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return day
+
+
+def _minute_bars(interval: str) -> Optional[int]:
+    """N for an "Nm" interval, else None."""
+    match = re.fullmatch(r"(\d+)m", interval)
+    return int(match.group(1)) if match and int(match.group(1)) > 0 else None
+
+
+def has_bar_closes(interval: str) -> bool:
+    """Whether bar_closes() has a schedule for `interval`."""
+    return interval in ("1h", "1d", "1wk", "1mo") or _minute_bars(interval) is not None
+
+
+def bar_closes(interval: str, day: date, derived: bool = False) -> List[datetime]:
+    """
+    Every `interval` bar that closes during `day`'s session (empty on non-trading
+    days). `derived`: 1h bars are resampled from 5m (`--derive-timeframes`)
+    rather than fetched.
+    """
+    hours = session(day)
+    if hours is None:
+        return []
+    open_, close = hours
+    minutes = _minute_bars(interval)
+    if minutes is not None and minutes != 60:
+        step = timedelta(minutes=minutes)
+        closes, t = [], open_ + step
+        while t < close:
+            closes.append(t)
+            t += step
+        return closes + [close]
+    if interval in ("1h", "60m") and not derived:
+        first, last = extended_session(day)
+        closes, t = [], first + timedelta(hours=1)
+        while t <= last:
+            closes.append(t)
+            t += timedelta(hours=1)
+        return closes
+    if interval in ("1h", "60m"):
+        closes, t = [], open_ + timedelta(hours=1)
+        while t < close:
+            closes.append(t)
+            t += timedelta(hours=1)
+        return closes + [close]
+    if interval == "1d":
+        return [close]
+    following = next_trading_day(day)
+    if interval == "1wk":
+        return [close] if following.isocalendar()[:2] != day.isocalendar()[:2] else []
+    if interval == "1mo":
+        return [close] if (following.year, following.month) != (day.year, day.month) else []
+    raise ValueError(f"No bar-close schedule for interval {interval}")
+
+
+def next_bar_close(interval: str, after: datetime, derived: bool = False) -> datetime:
+    """First `interval` bar close strictly after `after` (tz-aware); `derived` as for bar_closes()."""
+    day = after.astimezone(MARKET_TZ).date()
+    for _ in range(400):                            # > one year of days, enough for 1mo
+        for close in bar_closes(interval, day, derived):
+            if close > after:
+                return close
+        day += timedelta(days=1)
+    raise RuntimeError(f"No {interval} bar close found after {after}")
+
+
+def is_session_open(at: datetime) -> bool:
+    hours = session(at.astimezone(MARKET_TZ).date())
+    return hours is not None and hours[0] <= at < hours[1]
@@ -0,0 +1,82 @@
+# === scheduler.py ===
+#
+# Bar-close-aware refresh schedule for `main.py --daemon`.
+#
+# Each timeframe is refreshed only once a new bar of it has closed (see
+# market_calendar.bar_closes), plus a short settle delay so the provider has
+# published the bar. With `derived` (`--derive-timeframes`) 1h follows the
+# session-anchored buckets it is resampled into, otherwise the providers'
+# clock-hour bars. Timeframes whose bars close at the same instant – e.g.
+# 5m, 1h and 1d at 16:00 – are refreshed together in one pipeline pass.
+
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from config.config import DAEMON_SETTLE_SECONDS
+from data_processing.market_calendar import has_bar_closes, next_bar_close
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshScheduler:
+    def __init__(
+        self,
+        timeframes: List[str],
+        settle_seconds: float = DAEMON_SETTLE_SECONDS,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+        sleep: Callable[[float], None] = time.sleep,
+        derived: bool = False,
+    ):
+        self.timeframes = [tf.lower() for tf in timeframes]
+        unknown = [tf for tf in self.timeframes if not has_bar_closes(tf)]
+        if unknown:
+            raise ValueError(f"No bar-close schedule for timeframe(s) {', '.join(unknown)}")
+        self.derived = derived
+        self.settle = timedelta(seconds=settle_seconds)
+        self.clock = clock
+        self.sleep = sleep
+        # Last bar close each timeframe has been refreshed for; starts at "now"
+        # because the daemon begins with a full run
+        now = clock()
+        self.refreshed: Dict[str, datetime] = {tf: now for tf in self.timeframes}
+
+    def next_refresh(self) -> Tuple[datetime, List[str]]:
+        """(bar close, timeframes closing then) for the earliest pending bar close."""
+        closes = {tf: next_bar_close(tf, self.refreshed[tf], self.derived) for tf in self.timeframes}
+        first = min(closes.values())
+        return first, [tf for tf in self.timeframes if closes[tf] == first]
+
+    def wait(self) -> List[str]:
+        """Sleep until the next bar close (+ settle delay) and return the timeframes now due."""
+        close, due = self.next_refresh()
+        wake = close + self.settle
+        logger.info(f"Next refresh: {', '.join(tf.upper() for tf in due)} at {wake.astimezone():%Y-%m-%d %H:%M:%S %Z}")
+        while (remaining := (wake - self.clock()).total_seconds()) > 0:
+            self.sleep(min(remaining, 60.0))        # re-check the clock (suspend / clock changes)
+        for tf in due:
+            self.refreshed[tf] = close
+        return due
+
+    def __iter__(self) -> Iterator[List[str]]:
+        while True:
+            yield self.wait()
+
+
+def run_daemon(refresh: Callable[[Optional[List[str]]], None], timeframes: List[str], **scheduler_kwargs) -> None:
+    """
+    Full refresh once (`refresh(None)`), then `refresh(due_timeframes)` after
+    every bar close until interrupted. A failed refresh is logged and the
+    schedule continues.
+    """
+    scheduler = RefreshScheduler(timeframes, **scheduler_kwargs)
+    refresh(None)
+    try:
+        for due in scheduler:
+            try:
+                refresh(due)
+            except Exception:
+                logger.exception(f"Refresh of {', '.join(tf.upper() for tf in due)} failed")
+    except KeyboardInterrupt:
+        logger.info("Daemon stopped")
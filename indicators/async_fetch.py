@@ -0,0 +1,282 @@
+# === async_fetch.py ===
+#
+# Rate-limited asyncio fetch engine.
+#
+#   • token bucket        – caps HTTP calls per minute across all workers
+#   • semaphore           – bounds how many jobs are in flight
+#   • retry with backoff  – 429s and transient errors are retried with
+#                           jittered exponential backoff ("full jitter")
+#   • per-call timeout    – a stalled HTTP call raises and the job is retried
+#
+# Jobs are (key, callable) pairs. Plain callables (e.g. fetch_ticker_data via
+# functools.partial) run in worker threads; coroutine functions are awaited
+# directly. Results are yielded as they complete, not in submission order.
+#
+# One job may make many HTTP calls – a 200-symbol bar request is paginated by
+# the client – so rate and timeout apply per call, not per job: functions
+# wrapped with metered() (AlpacaProvider wraps its HTTP session's request)
+# take a bucket token and get a `timeout` for every call made on the engine's
+# behalf. Each attempt prepays the token of its first call. A worker thread
+# cannot be cancelled, so thread jobs have no job-level timeout – a stalled
+# call times out inside the thread, which then ends before any retry starts.
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Hashable, Iterable, Iterator, Optional
+
+from config.config import (
+    FETCH_REQUESTS_PER_MINUTE,
+    FETCH_MAX_CONCURRENCY,
+    FETCH_MAX_RETRIES,
+    FETCH_BACKOFF_BASE_SECONDS,
+    FETCH_BACKOFF_MAX_SECONDS,
+    FETCH_TIMEOUT_SECONDS,
+)
+
+
+@dataclass
+class FetchResult:
+    key: Hashable
+    value: Any = None
+    error: Optional[BaseException] = None
+    attempts: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class TokenBucket:
+    """
+    Refills at `requests_per_minute / 60` tokens per second up to `burst` tokens.
+
+    Safe to share between the event loop and worker threads: a caller reserves
+    its token under a lock (the balance may go negative) and then waits out
+    the deficit, so waiters are served in arrival order.
+    """
+
+    def __init__(self, requests_per_minute: float, burst: Optional[float] = None):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token; seconds until it is actually available."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    async def acquire(self) -> None:
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def acquire_blocking(self) -> None:
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+
+class CallMeter:
+    """Per-attempt HTTP accounting: one bucket token and one timeout per call, the first call prepaid."""
+
+    def __init__(self, bucket: TokenBucket, timeout: float, prepaid: int = 1):
+        self.bucket = bucket
+        self.timeout = timeout
+        self.prepaid = prepaid
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+            prepaid = self.prepaid > 0
+            self.prepaid -= prepaid
+        if not prepaid:
+            self.bucket.acquire_blocking()
+
+
+_current_meter: contextvars.ContextVar = contextvars.ContextVar("fetch_call_meter", default=None)
+
+
+def metered(request: Callable) -> Callable:
+    """
+    Wrap a function that makes one HTTP call per invocation (e.g. a requests
+    Session's `request`, or urlopen) so each call is rate-limited by the engine
+    running the job and gets a `timeout` unless the caller passed one. Outside
+    an engine job only the FETCH_TIMEOUT_SECONDS default applies.
+    """
+    @functools.wraps(request)
+    def call(*args, **kwargs):
+        meter = _current_meter.get()
+        if meter is not None:
+            meter.before_call()
+        kwargs.setdefault("timeout", meter.timeout if meter is not None else FETCH_TIMEOUT_SECONDS)
+        return request(*args, **kwargs)
+    return call
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status is None and hasattr(exc, "getcode"):       # urllib HTTPError
+        status = exc.getcode()
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_throttled(exc: BaseException) -> bool:
+    return _status_code(exc) == 429 or "too many requests" in str(exc).lower()
+
+
+def _is_requests_transient(exc: BaseException) -> bool:
+    try:
+        from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+    except ImportError:
+        return False
+    return isinstance(exc, (RequestsConnectionError, Timeout))
+
+
+def is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if isinstance(getattr(exc, "reason", None), (TimeoutError, ConnectionError)):   # urllib URLError
+        return True
+    if _is_requests_transient(exc):
+        return True
+    status = _status_code(exc)
+    return status is not None and 500 <= status < 600
+
+
+class AsyncFetchEngine:
+    def __init__(
+        self,
+        requests_per_minute: float = FETCH_REQUESTS_PER_MINUTE,
+        max_concurrency: int = FETCH_MAX_CONCURRENCY,
+        max_retries: int = FETCH_MAX_RETRIES,
+        backoff_base: float = FETCH_BACKOFF_BASE_SECONDS,
+        backoff_max: float = FETCH_BACKOFF_MAX_SECONDS,
+        timeout: float = FETCH_TIMEOUT_SECONDS,
+        rng: Optional[random.Random] = None,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.rng = rng or random.Random()
+        self.stats = {"requests": 0, "http_calls": 0, "throttled": 0, "retried": 0, "failed": 0}
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given 1-based attempt."""
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return self.rng.uniform(0, ceiling)
+
+    async def _call(self, func: Callable[[], Any], meter: CallMeter) -> Any:
+        token = _current_meter.set(meter)               # copied into the worker thread's context
+        try:
+            if inspect.iscoroutinefunction(func):
+                return await asyncio.wait_for(func(), self.timeout)
+            # No job-level timeout: metered calls time out inside the thread
+            return await asyncio.to_thread(func)
+        finally:
+            _current_meter.reset(token)
+
+    async def _run_job(self, key, func, bucket: TokenBucket, gate: asyncio.Semaphore) -> FetchResult:
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            await bucket.acquire()                      # the attempt's first HTTP call
+            async with gate:
+                self.stats["requests"] += 1
+                meter = CallMeter(bucket, self.timeout)
+                try:
+                    value = await self._call(func, meter)
+                    return FetchResult(key, value, None, attempt, time.monotonic() - started)
+                except Exception as e:
+                    throttled = is_throttled(e)
+                    self.stats["throttled"] += throttled
+                    if attempt > self.max_retries or not (throttled or is_transient(e)):
+                        self.stats["failed"] += 1
+                        return FetchResult(key, None, e, attempt, time.monotonic() - started)
+                finally:
+                    self.stats["http_calls"] += meter.calls
+            self.stats["retried"] += 1
+            await asyncio.sleep(self.backoff_delay(attempt))
+
+    async def run(self, jobs: Iterable[tuple[Hashable, Callable[[], Any]]]) -> AsyncIterator[FetchResult]:
+        """Run all jobs and yield FetchResults as they complete."""
+        bucket = TokenBucket(self.requests_per_minute)
+        gate = asyncio.Semaphore(self.max_concurrency)
+        tasks = [
+            asyncio.ensure_future(self._run_job(key, func, bucket, gate))
+            for key, func in jobs
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def iter_completed(self, jobs: Iterable[tuple[Hashable, Callable[[], Any]]]) -> Iterator[FetchResult]:
+        """
+        Synchronous bridge over run(): the event loop runs in a background
+        thread and results are handed over as they complete, so sync callers
+        (build_full_snapshot) can compute on one result while others are
+        still in flight.
+        """
+        done = object()
+        results: queue.Queue = queue.Queue()
+        jobs = list(jobs)
+
+        async def produce():
+            async for result in self.run(jobs):
+                results.put(result)
+
+        def worker():
+            try:
+                asyncio.run(produce())
+            except BaseException as e:          # surface loop failures to the caller
+                results.put(e)
+            finally:
+                results.put(done)
+
+        thread = threading.Thread(target=worker, name="async-fetch", daemon=True)
+        thread.start()
+        while True:
+            item = results.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+        thread.join()
+
+
+def run_sequential(jobs: Iterable[tuple[Hashable, Callable[[], Any]]]) -> Iterator[FetchResult]:
+    """Engine-less fallback: run jobs one after another in the calling thread."""
+    for key, func in jobs:
+        started = time.monotonic()
+        try:
+            yield FetchResult(key, func(), None, 1, time.monotonic() - started)
+        except Exception as e:
+            yield FetchResult(key, None, e, 1, time.monotonic() - started)
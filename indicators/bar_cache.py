@@ -0,0 +1,105 @@
+# === bar_cache.py ===
+#
+# Process-wide in-memory cache of OHLCV frames shared by every pipeline stage
+# (snapshots, OHLCV dumps, support/resistance …), so each (ticker, interval)
+# is fetched at most once per run.
+#
+# Entries are keyed by (ticker, interval) and remember the start they were
+# fetched from. A request whose start falls inside a cached window is served
+# by slicing it (with the provider's window() rule, so offline data that ends
+# in the past is cut relative to its own last bar); a wider request – or a
+# slice with no bars – is a miss and replaces the entry. Total size is bounded
+# in bytes with least-recently-used eviction.
+#
+# fetch_lock() serialises concurrent fetches of the same key (the async fetch
+# engine runs fetches in threads), so a second caller waits for the first
+# fetch and is then served from the cache instead of fetching again.
+
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+
+import pandas as pd
+
+from config.config import BAR_CACHE_MAX_BYTES
+
+
+class BarCache:
+    def __init__(self, max_bytes: int = BAR_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()   # (ticker, interval) -> (start, bars, nbytes)
+        self._lock = threading.Lock()
+        self._key_locks: dict = {}
+
+    @contextmanager
+    def fetch_lock(self, interval: str, tickers: Iterable[str]):
+        """Hold the per-(ticker, interval) fetch locks for every ticker given."""
+        keys = sorted({(t, interval) for t in tickers})    # fixed order → no lock-order deadlocks
+        with self._lock:
+            locks = [self._key_locks.setdefault(key, threading.Lock()) for key in keys]
+        with ExitStack() as stack:
+            for lock in locks:
+                stack.enter_context(lock)
+            yield
+
+    def get(self, ticker: str, interval: str, start: datetime,
+            window: Optional[Callable[[pd.DataFrame, datetime], pd.DataFrame]] = None) -> Optional[pd.DataFrame]:
+        """
+        Bars of the window beginning at `start` if a cached window covers it,
+        else None. `window(bars, start)` cuts the cached frame (default: bars
+        from `start` onward).
+        """
+        key = (ticker, interval)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] > start:
+                self.misses += 1
+                return None
+            bars = entry[1]
+        bars = window(bars, start) if window is not None else bars[bars.index >= start]
+        with self._lock:
+            if bars.empty:
+                self.misses += 1
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+        return bars
+
+    def put(self, ticker: str, interval: str, start: datetime, bars: pd.DataFrame) -> None:
+        nbytes = int(bars.memory_usage(index=True).sum())
+        if nbytes > self.max_bytes:
+            return                                  # never worth evicting everything for one frame
+        key = (ticker, interval)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self._entries[key] = (start, bars, nbytes)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def invalidate(self, interval: Optional[str] = None) -> None:
+        """Drop every entry, or only those for `interval`."""
+        with self._lock:
+            for key in [k for k in self._entries if interval is None or k[1] == interval]:
+                self.bytes -= self._entries.pop(key)[2]
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Shared instance used by the fetch layer
+BAR_CACHE = BarCache()
@@ -0,0 +1,125 @@
+# === bar_store.py ===
+#
+# Local Parquet store of OHLCV bars keyed by (ticker, interval).
+#
+# Layout:  <root>/<interval>/<TICKER>.parquet      – the bars (yfinance columns)
+#          <root>/<interval>/<TICKER>.meta.json    – {"covered_from": ISO-8601}
+#
+# "covered_from" records the earliest start the store has already asked the
+# provider for, so a ticker whose history simply begins later than the
+# requested look-back is not re-downloaded on every run.
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+import pandas as pd
+
+from config.config import BAR_STORE_DIR
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Under the repo's data/ – not the cwd – unless main.py points it at the run's output directory
+DEFAULT_ROOT = Path(__file__).resolve().parents[1] / "data" / BAR_STORE_DIR
+
+
+class BarStore:
+    def __init__(self, root: str | Path = DEFAULT_ROOT):
+        self.root = Path(root)
+
+    # ── paths ──────────────────────────────────────────────────────────────
+    def _bars_path(self, ticker: str, interval: str) -> Path:
+        return self.root / interval / f"{ticker}.parquet"
+
+    def _meta_path(self, ticker: str, interval: str) -> Path:
+        return self.root / interval / f"{ticker}.meta.json"
+
+    # ── read ───────────────────────────────────────────────────────────────
+    def load(self, ticker: str, interval: str) -> pd.DataFrame:
+        """Return every stored bar for (ticker, interval), or an empty frame."""
+        path = self._bars_path(ticker, interval)
+        if not path.exists():
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        return pd.read_parquet(path)
+
+    def covered_from(self, ticker: str, interval: str) -> Optional[datetime]:
+        path = self._meta_path(ticker, interval)
+        if not path.exists():
+            return None
+        with open(path) as fh:
+            return datetime.fromisoformat(json.load(fh)["covered_from"])
+
+    def refresh_start(self, ticker: str, interval: str, start: datetime) -> datetime:
+        """
+        Timestamp the provider should be asked for to bring (ticker, interval)
+        up to date for a window beginning at `start`.
+
+        If the store already covers `start`, only bars from the last stored
+        timestamp onward are needed – the last bar itself is re-fetched because
+        it may still have been open when it was saved. Otherwise the whole
+        window is fetched.
+        """
+        covered = self.covered_from(ticker, interval)
+        if covered is None or covered > start:
+            return start
+        stored = self.load(ticker, interval)
+        if stored.empty:
+            return start
+        return stored.index[-1].to_pydatetime()
+
+    # ── write ──────────────────────────────────────────────────────────────
+    def merge(
+        self,
+        ticker: str,
+        interval: str,
+        new_bars: pd.DataFrame,
+        start: datetime,
+    ) -> pd.DataFrame:
+        """
+        Merge freshly fetched bars into the store (newer rows win on duplicate
+        timestamps), persist, and return the stored bars from `start` onward.
+        """
+        stored = self.load(ticker, interval)
+        if new_bars is not None and not new_bars.empty:
+            frames = [f for f in (stored, new_bars[OHLCV_COLUMNS]) if not f.empty]
+            merged = pd.concat(frames)
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            merged.index.name = "Date"
+        else:
+            merged = stored
+
+        covered = self.covered_from(ticker, interval)
+        covered = start if covered is None else min(covered, start)
+
+        if not merged.empty:
+            self._write(ticker, interval, merged, covered)
+        return merged[merged.index >= start]
+
+    def _write(self, ticker: str, interval: str, bars: pd.DataFrame, covered: datetime) -> None:
+        bars_path = self._bars_path(ticker, interval)
+        bars_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file and swap so a crash never leaves a torn file
+        tmp = bars_path.with_suffix(".parquet.tmp")
+        bars.to_parquet(tmp)
+        os.replace(tmp, bars_path)
+
+        meta_path = self._meta_path(ticker, interval)
+        tmp = meta_path.with_suffix(".json.tmp")
+        with open(tmp, "w") as fh:
+            json.dump({"covered_from": covered.isoformat()}, fh)
+        os.replace(tmp, meta_path)
+
+    # ── convenience ────────────────────────────────────────────────────────
+    def read_through(
+        self,
+        ticker: str,
+        interval: str,
+        start: datetime,
+        fetch_since: Callable[[datetime], pd.DataFrame],
+    ) -> pd.DataFrame:
+        """Refresh (ticker, interval) via `fetch_since(timestamp)` and return bars from `start`."""
+        new_bars = fetch_since(self.refresh_start(ticker, interval, start))
+        return self.merge(ticker, interval, new_bars, start)
@@ -1,15 +1,107 @@
 # === build_snapshots.py ===
 
+from contextlib import ExitStack
+from functools import partial
+
 import pandas as pd
 from indicators.compute_indicators import compute_indicators
+from indicators.indicator_table import get_indicator_table
+from indicators.result_cache import bars_digest, get_result_cache
 from indicators.compute_passthroughs import compute_passthroughs
-from config.config import INTERVAL_PERIOD_MAP
+from indicators.async_fetch import run_sequential
+from indicators import compact
+from indicators.panel_indicators import panel_snapshot
+from indicators.column_planner import get_column_plan
+from indicators.parallel_compute import ComputePool
+from indicators.snapshot_assembler import SnapshotAssembler
+from config.config import INTERVAL_PERIOD_MAP, FETCH_BATCH_SIZE, INDICATOR_ENGINE, COMPUTE_WORKERS
+
+
+def _compute_values(raw_df: pd.DataFrame, tf: str, names, passthroughs) -> tuple:
+    """
+    Compute the registry entries `names` and the passthrough features for one
+    ticker, keeping only the last row (neither step modifies raw_df).
+
+    Returns ({entry: {column: value}}, entries that raised, {column: value}).
+    Safe to run in a worker process (see parallel_compute.py).
+    """
+    table = get_indicator_table()
+    per_entry, failed = {}, set()
+
+    # === Step 3: Compute TA indicators and passthroughs ===
+    for name in names:
+        errors = table[name].errors if name in table else 0
+        layer = compute_indicators(raw_df, tf, [name])
+        # === Step 4: Full history is only needed for the last row ===
+        per_entry[name] = {col: layer[col].to_numpy()[-1] for col in layer.columns}
+        if name in table and table[name].errors > errors:
+            failed.add(name)
+    layer = compute_passthroughs(raw_df, tf, passthroughs)
+    return per_entry, failed, {col: layer[col].to_numpy()[-1] for col in layer.columns}
+
+
+class _CachedUnit:
+    """Result-cache lookup for one (ticker, timeframe): what is cached and what is left to compute."""
+
+    def __init__(self, raw_df: pd.DataFrame, tf: str, plan, cache=None):
+        self.tf, self.plan, self.cache = tf, plan, cache
+        self.key, self.cached, self.specs = None, {}, {}
+        if cache is not None:
+            table = get_indicator_table()
+            self.specs = {name: table[name] for name in plan.indicators if name in table}
+            self.key = bars_digest(raw_df)
+            self.cached = cache.get_indicators(self.key, self.specs, tf.upper())
+        self.missing = [name for name in plan.indicators if name not in self.cached]
+
+    def values(self, computed: tuple) -> dict:
+        """Merge cached and computed results (registry order) and store the new ones."""
+        per_entry, failed, passthrough_values = computed
+        if self.cache is not None:
+            ok = {name: v for name, v in per_entry.items() if name not in failed}
+            self.cache.put_indicators(self.key, self.specs, self.tf.upper(), ok)
+        values = {}
+        for name in self.plan.indicators:
+            values.update(self.cached[name] if name in self.cached else per_entry.get(name, {}))
+        values.update(passthrough_values)
+        return values
+
+
+def _snapshot_values(raw_df: pd.DataFrame, tf: str, plan=None, cache=None) -> dict:
+    """
+    Indicators + passthroughs for one ticker as last-row {column: scalar},
+    indicator columns first.
+
+    Only the registry entries and passthroughs in `plan` (a ColumnPlan, by
+    default the run's plan from column_planner) are computed. With a
+    ResultCache, entries whose (bars, registry entry) hash is cached are
+    reused and only the rest are computed.
+    """
+    plan = plan or get_column_plan()
+    unit = _CachedUnit(raw_df, tf, plan, cache)
+    return unit.values(_compute_values(raw_df, tf, unit.missing, plan.passthroughs))
+
+
+def _snapshot_row(raw_df: pd.DataFrame, ticker: str, tf: str, epoch: bool = False, plan=None) -> pd.DataFrame:
+    """
+    One ticker's tagged snapshot row as a DataFrame (see _snapshot_values()).
+
+    With `epoch=True` the bar time is kept as an int64 "Epoch" column (UTC
+    seconds) instead of Date / Time strings; see compact.expand_timestamps().
+    """
+    assembler = SnapshotAssembler([ticker], tf, epoch=epoch)
+    assembler.add(ticker, _snapshot_values(raw_df, tf, plan), raw_df.index[-1])
+    return assembler.to_frame()
 
 
 def build_full_snapshot(
     tickers: list[str],
     timeframes: list[str],
-    fetch_function
+    fetch_function,
+    batch_fetch_function=None,
+    engine=None,
+    compact_mode: bool = None,
+    indicator_engine: str = INDICATOR_ENGINE,
+    workers: int = COMPUTE_WORKERS
 ) -> dict[str, pd.DataFrame]:
     """
     Builds a multi-timeframe snapshot for a list of tickers using the provided data fetch function.
@@ -18,75 +110,147 @@ def build_full_snapshot(
         tickers: List of ticker symbols.
         timeframes: List of timeframes (e.g., ["5m", "1h", "1d"]).
         fetch_function: Function(ticker: str, interval: str, period: str) -> pd.DataFrame
+        batch_fetch_function: Optional Function(tickers: list[str], interval: str, period: str)
+            -> dict[str, pd.DataFrame]. When given, each timeframe is pulled in chunks of
+            FETCH_BATCH_SIZE tickers instead of one request per ticker; `fetch_function` is
+            only used as a fallback for a chunk whose batched call fails.
+        engine: Optional AsyncFetchEngine. Fetches then run concurrently under its rate
+            limit (per HTTP call, so a paginated chunk counts every page), and each ticker
+            is computed as soon as its bars arrive. Without an engine fetches run one after
+            another.
+        compact_mode: Build compact snapshots (float32 columns, categorical Ticker /
+            Timeframe, int64 Epoch instead of Date / Time). Defaults to compact.is_enabled().
+            One ticker per timeframe is also computed from its float64 bars as fetched
+            (compact.reference_bars()) and compared.
+        indicator_engine: "ticker" computes each ticker as its bars arrive; "panel" gathers
+            a timeframe's bars and computes all tickers at once (indicators/panel_indicators.py).
+        workers: With more than one, the "ticker" engine's (ticker, timeframe) units run in
+            a process pool (indicators/parallel_compute.py); rows are identical to workers=1.
+            The "ticker" engine reuses cached per-entry results (indicators/result_cache.py).
 
     Returns:
         Dictionary of snapshots keyed by timeframe label (e.g. "1H", "1D", etc.)
     """
-    snapshots = {}
+    # === Step 1: Determine historical range using INTERVAL_PERIOD_MAP ===
+    periods = {tf: INTERVAL_PERIOD_MAP.get(tf, "60d") for tf in timeframes}
 
+    # === Step 2: One fetch job per (timeframe, ticker) or (timeframe, chunk) ===
+    jobs = []
     for tf in timeframes:
-        label = tf.upper()
-        snapshot_rows = []
-
-        print(f"📥 Building snapshot for {label}...")
-
-        for ticker in tickers:
-            try:
-                # === Step 1: Determine historical range using INTERVAL_PERIOD_MAP ===
-                period = INTERVAL_PERIOD_MAP.get(tf, "60d")
-
-                # === Step 2: Fetch raw OHLCV data using the passed fetch_function ===
-                raw_df = fetch_function(ticker, interval=tf, period=period)
-
-
-
-                if raw_df.empty or len(raw_df) < 20:
-                    print(f"⚠️ Skipping {ticker} {label} — not enough data")
-                    continue
+        if batch_fetch_function is not None:
+            for i in range(0, len(tickers), FETCH_BATCH_SIZE):
+                chunk = tuple(tickers[i:i + FETCH_BATCH_SIZE])
+                jobs.append(((tf, chunk), partial(batch_fetch_function, list(chunk), interval=tf, period=periods[tf])))
+        else:
+            for ticker in tickers:
+                jobs.append(((tf, ticker), partial(fetch_function, ticker, interval=tf, period=periods[tf])))
 
-                # === Step 3: Compute TA indicators and passthroughs ===
-                indicators_df = compute_indicators(raw_df.copy(), tf)
-                passthrough_df = compute_passthroughs(raw_df.copy(), tf)
+    print(f"📥 Fetching {len(jobs)} bar request(s) across {len(timeframes)} timeframe(s)...")
+    results = engine.iter_completed(jobs) if engine is not None else run_sequential(jobs)
 
-                # === Step 4: Combine both layers, tag metadata, and extract last row ===
-                full_df = pd.concat([indicators_df, passthrough_df], axis=1)
-                final_row = full_df.iloc[[-1]].copy()
-                final_row["Ticker"] = ticker
-                final_row["Timeframe"] = label
+    if compact_mode is None:
+        compact_mode = compact.is_enabled()
+    if indicator_engine not in ("ticker", "panel"):
+        raise ValueError(f"Unknown indicator engine {indicator_engine!r}")
+    use_panel = indicator_engine == "panel"
+    pool = ComputePool(workers) if workers > 1 and not use_panel else None
+    result_cache = get_result_cache() if not use_panel else None
+    plan = get_column_plan()
+    assemblers = {tf: SnapshotAssembler(tickers, tf, epoch=compact_mode) for tf in timeframes}
+    pending = {tf: {} for tf in timeframes}     # panel mode: bars waiting for the timeframe pass
+    futures = {}                                # pool mode: (tf, ticker) -> (Future, _CachedUnit, last bar time)
+    accuracy_bars = {}                          # pool mode: reference bars kept for the float64 comparison
+    accuracy_checked = set()
 
-                # ----- ADD DATE & TIME COLUMNS ----------------------------------------
-                ts   = raw_df.index[-1]                     # tz-aware UTC timestamp
-                # If you prefer U.S. market time convert here:
-                ts = ts.tz_convert("America/New_York")
-                final_row["Date"] = ts.strftime("%m/%d/%y")
-                final_row["Time"] = ts.strftime("%H:%M")
-                # -----------------------------------------------------------------------
+    def finish(tf: str, ticker: str, values: dict, timestamp, reference=None) -> None:
+        if compact_mode and reference is not None:
+            # `reference` = the bars as fetched, before compact_bars() quantised them
+            row = compact.compact_snapshot(pd.DataFrame([values]))
+            full_row = pd.DataFrame([_snapshot_values(reference, tf)])
+            compact.check_float32_accuracy(row, full_row, f"{ticker} {tf.upper()}")
+        assemblers[tf].add(ticker, values, timestamp)
 
-                final_row["Ticker"]    = ticker
-                final_row["Timeframe"] = label
+    def fail(tf: str, ticker: str, error: Exception) -> None:
+        print(f"❌ {ticker} ({tf.upper()}) error: {error}")
+        assemblers[tf].add_null(ticker)
 
-                # Re-order so Date / Time are the first two columns
-                cols = (
-                    ["Date", "Time", "Ticker", "Timeframe"]
-                    + [c for c in final_row.columns if c not in ("Date","Time","Ticker","Timeframe")]
-                )
-                final_row = final_row[cols]
+    def consume(tf: str, ticker: str, raw_df, error=None) -> None:
+        label = tf.upper()
+        try:
+            if error is not None:
+                raise error
+            if raw_df is None or raw_df.empty or len(raw_df) < 20:
+                print(f"⚠️ Skipping {ticker} {label} — not enough data")
+                return
+            if use_panel:
+                pending[tf][ticker] = raw_df
+                return
+            check_bars = None
+            if compact_mode and tf not in accuracy_checked:
+                check_bars = compact.reference_bars(ticker, tf)
+                if check_bars is not None:
+                    accuracy_checked.add(tf)
+            if pool is not None:
+                unit = _CachedUnit(raw_df, tf, plan, result_cache)
+                future = pool.submit(raw_df, tf, unit.missing, plan.passthroughs)
+                futures[(tf, ticker)] = (future, unit, raw_df.index[-1])
+                if check_bars is not None:
+                    accuracy_bars[(tf, ticker)] = check_bars
+                return
+            finish(tf, ticker, _snapshot_values(raw_df, tf, plan, result_cache), raw_df.index[-1], check_bars)
+        except Exception as e:
+            fail(tf, ticker, e)
 
-                
+    with ExitStack() as stack:
+        if pool is not None:
+            print(f"🧵 Computing indicators in {workers} worker processes")
+            stack.enter_context(pool)
 
-                # Reorder columns to place Ticker and Timeframe first
-                cols = ["Ticker", "Timeframe"] + [col for col in final_row.columns if col not in ("Ticker", "Timeframe")]
-                final_row = final_row[cols]
+        # === Step 3/4: Compute each ticker as soon as its bars arrive ===
+        for result in results:
+            if batch_fetch_function is None:
+                tf, ticker = result.key
+                consume(tf, ticker, result.value, result.error)
+                continue
 
-                snapshot_rows.append(final_row)
+            tf, chunk = result.key
+            if result.ok:
+                frames = result.value
+                print(f"📦 Batched fetch returned {len(frames)}/{len(chunk)} tickers for {tf.upper()}")
+                for ticker in chunk:
+                    consume(tf, ticker, frames.pop(ticker, None))
+            else:
+                print(f"❌ Batched fetch failed for {tf.upper()}, falling back to per-ticker: {result.error}")
+                for ticker in chunk:
+                    try:
+                        raw_df = fetch_function(ticker, interval=tf, period=periods[tf])
+                        consume(tf, ticker, raw_df)
+                    except Exception as e:
+                        consume(tf, ticker, None, e)
 
+        # === Pool mode: collect every unit; errors are reported per (ticker, timeframe) ===
+        for (tf, ticker), (future, unit, timestamp) in futures.items():
+            try:
+                values = unit.values(pool.result(future))
+                finish(tf, ticker, values, timestamp, accuracy_bars.pop((tf, ticker), None))
             except Exception as e:
-                print(f"❌ {ticker} ({label}) error: {e}")
-                snapshot_rows.append(pd.DataFrame([{"Ticker": ticker, "Timeframe": label}]))
+                fail(tf, ticker, e)
+        futures.clear()
 
-        # === Step 5: Save combined snapshot per timeframe ===
-        if snapshot_rows:
-            snapshots[label] = pd.concat(snapshot_rows, ignore_index=True)
+    # === Panel mode: one vectorized pass per timeframe over every ticker ===
+    if use_panel:
+        for tf in timeframes:
+            if not pending[tf]:
+                continue
+            assemblers[tf].add_frame(panel_snapshot(pending.pop(tf), tf, epoch=True, plan=plan))
+
+    # === Step 5: Build each timeframe's snapshot once (rows in input ticker order) ===
+    snapshots = {}
+    for tf in timeframes:
+        label = tf.upper()
+        snapshot = assemblers.pop(tf).to_frame()
+        if snapshot is not None:
+            snapshots[label] = compact.compact_snapshot(snapshot) if compact_mode else snapshot
             print(f"✅ {label} snapshot built with {len(snapshots[label])} rows")
         else:
             print(f"⚠️ No usable data for {label}")
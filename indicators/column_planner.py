@@ -0,0 +1,157 @@
+# === column_planner.py ===
+#
+# Works out which columns a run actually needs and computes nothing else.
+#
+# Every feature the registries can produce becomes a node in a dependency graph
+# (names are label-free, as in BASE_FEATURES):
+#
+#   bar stage        indicators   RSI, MACDh_12_26_9, BBP_20_2.0 … → INDICATOR_REGISTRY entry
+#   (per ticker)     passthroughs VOLUME, VOLUME_Avg ← VOLUME, REL_VOLUME ← VOLUME + VOLUME_Avg,
+#                                 PCT_GAIN, PCT_GAIN_Avg ← PCT_GAIN
+#   snapshot stage   enhancers    <X>_Z, <X>_Trend … ← X
+#   (cross-section)  sumZZ        ← every <X>_Z with a z_score enhancer
+#                    slope_sumZZ  ← sumZZ
+#
+# plan_columns() walks back from the consumed outputs – BASE_FEATURES,
+# SUMMARY_INDICATORS and SNAPSHOT_COLUMNS – and returns a ColumnPlan listing
+# the registry entries, passthroughs and enhancers to run. Multi-column
+# indicators (MACD, BB_POS) run once for all of their outputs.
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+from config.config import (
+    BASE_FEATURES, INDICATOR_ENHANCERS, INDICATOR_REGISTRY, PASSTHROUGH_REGISTRY,
+    SNAPSHOT_COLUMNS, SUMMARY_INDICATORS,
+)
+from indicators.enhance_indicators import ENHANCER_SUFFIXES
+
+# Passthrough features whose column puts the suffix after the label (VOLUME_1D_Avg)
+_LABEL_INFIX = ("_Avg", "_Slope")
+
+
+@dataclass
+class Node:
+    name: str
+    stage: str                  # "indicator" | "passthrough" | "enhancer" | "sumZZ" | "slope_sumZZ"
+    deps: tuple = ()
+    owner: Optional[str] = None  # registry entry (indicators) / base indicator (enhancers)
+    enhancer: Optional[str] = None
+
+
+def build_graph() -> Dict[str, Node]:
+    """All producible features → Node, from the current registries."""
+    graph: Dict[str, Node] = {}
+
+    for name, meta in INDICATOR_REGISTRY.items():
+        for out in meta.get("outputs", [name]):
+            graph[out] = Node(out, "indicator", owner=name)
+
+    for name, meta in PASSTHROUGH_REGISTRY.items():
+        if name == "REL_VOLUME":
+            graph[name] = Node(name, "passthrough", ("VOLUME", "VOLUME_Avg"))
+            continue
+        graph[name] = Node(name, "passthrough")
+        if meta.get("with_avg"):
+            graph[f"{name}_Avg"] = Node(f"{name}_Avg", "passthrough", (name,))
+        if meta.get("with_slope") and name != "PCT_GAIN":
+            graph[f"{name}_Slope"] = Node(f"{name}_Slope", "passthrough", (name,))
+
+    z_features = []
+    for base, enhancers in INDICATOR_ENHANCERS.items():
+        for enhancer in enhancers:
+            out = f"{base}_{ENHANCER_SUFFIXES.get(enhancer, enhancer)}"
+            graph[out] = Node(out, "enhancer", (base,), owner=base, enhancer=enhancer)
+            if enhancer == "z_score":
+                z_features.append(out)
+
+    graph["sumZZ"] = Node("sumZZ", "sumZZ", tuple(z_features))
+    graph["slope_sumZZ"] = Node("slope_sumZZ", "slope_sumZZ", ("sumZZ",))
+    return graph
+
+
+@dataclass
+class ColumnPlan:
+    features: List[str]                                     # every required feature, dependencies first
+    indicators: List[str] = field(default_factory=list)     # INDICATOR_REGISTRY entries to run
+    passthroughs: Set[str] = field(default_factory=set)
+    enhancers: Dict[str, List[str]] = field(default_factory=dict)
+    sum_zz: bool = False
+    slope_sum_zz: bool = False
+    unknown: List[str] = field(default_factory=list)       # requested but not producible
+
+    @staticmethod
+    def column(feature: str, label: str) -> str:
+        """Snapshot column for a label-free feature name."""
+        for suffix in _LABEL_INFIX:
+            base = feature[: -len(suffix)]
+            if feature.endswith(suffix) and base in PASSTHROUGH_REGISTRY:
+                return f"{base}_{label}{suffix}"
+        return f"{feature}_{label}"
+
+    def columns(self, label: str) -> List[str]:
+        return [self.column(f, label) for f in self.features]
+
+
+def plan_columns(outputs: Optional[Iterable[str]] = None) -> ColumnPlan:
+    """
+    Plan for `outputs` (label-free feature names). By default: BASE_FEATURES,
+    SUMMARY_INDICATORS and SNAPSHOT_COLUMNS (every feature if that is None).
+    """
+    graph = build_graph()
+    if outputs is None:
+        saved = list(graph) if SNAPSHOT_COLUMNS is None else list(SNAPSHOT_COLUMNS)
+        outputs = list(BASE_FEATURES) + list(SUMMARY_INDICATORS) + saved
+
+    order: List[str] = []
+    seen: Set[str] = set()
+    unknown: List[str] = []
+
+    def visit(feature: str) -> None:
+        if feature in seen:
+            return
+        seen.add(feature)
+        node = graph.get(feature)
+        if node is None:
+            unknown.append(feature)
+            return
+        for dep in node.deps:
+            visit(dep)
+        order.append(feature)
+
+    for feature in outputs:
+        if feature not in ("Ticker", "Timeframe", "Date", "Time"):
+            visit(feature)
+
+    plan = ColumnPlan(features=order, unknown=unknown)
+    for feature in order:
+        node = graph[feature]
+        if node.stage == "indicator" and node.owner not in plan.indicators:
+            plan.indicators.append(node.owner)
+        elif node.stage == "passthrough":
+            plan.passthroughs.add(feature)
+        elif node.stage == "enhancer":
+            plan.enhancers.setdefault(node.owner, []).append(node.enhancer)
+        elif node.stage == "sumZZ":
+            plan.sum_zz = True
+        elif node.stage == "slope_sumZZ":
+            plan.slope_sum_zz = True
+
+    # Keep registry order so snapshot columns come out in the familiar order
+    plan.indicators = [name for name in INDICATOR_REGISTRY if name in plan.indicators]
+    plan.enhancers = {
+        base: [e for e in enhancers if e in plan.enhancers.get(base, [])]
+        for base, enhancers in INDICATOR_ENHANCERS.items() if base in plan.enhancers
+    }
+    return plan
+
+
+_plan: Optional[ColumnPlan] = None
+
+
+def get_column_plan() -> ColumnPlan:
+    """The run's plan from config, built on first use."""
+    global _plan
+    if _plan is None:
+        _plan = plan_columns()
+    return _plan
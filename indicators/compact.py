@@ -0,0 +1,156 @@
+# === compact.py ===
+#
+# Compact in-memory representation for universe-scale runs (`main.py --compact`).
+#
+#   bars       float32 Open/High/Low/Close, int64 Volume (as held in BAR_CACHE)
+#   snapshots  float32 indicator columns, categorical Ticker / Timeframe, and an
+#              int64 "Epoch" (UTC seconds) instead of Date / Time strings –
+#              expand_timestamps() restores Date / Time right before saving
+#
+# The Parquet bar store keeps full float64 precision; only in-memory copies
+# are compacted. float32_accuracy() compares a row computed from compact bars
+# against the float64 computation on the bars as fetched, so precision loss –
+# price quantisation included – is visible per column.
+
+import logging
+import mmap
+import sys
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from config.config import COMPACT_MODE, COMPACT_ACCURACY_TOLERANCE
+
+logger = logging.getLogger(__name__)
+
+MARKET_TZ = "America/New_York"
+PRICE_COLUMNS = ["Open", "High", "Low", "Close"]
+
+_enabled = COMPACT_MODE
+
+
+def enable(flag: bool = True) -> None:
+    global _enabled
+    _enabled = flag
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+# ── bars ───────────────────────────────────────────────────────────────────
+def compact_bars(bars: pd.DataFrame) -> pd.DataFrame:
+    """float32 prices and int64 volume (left as float if it has gaps)."""
+    out = bars.astype({c: "float32" for c in PRICE_COLUMNS if c in bars.columns})
+    if "Volume" in out.columns:
+        volume = out["Volume"].to_numpy()
+        if np.isfinite(volume).all():
+            out["Volume"] = np.rint(volume).astype("int64")
+    return out
+
+
+# ── float64 references for the accuracy check ────────────────────────────
+# The first ticker fetched per interval keeps its bars as fetched (before
+# compact_bars()); build_full_snapshot() computes that ticker from them as well.
+# One frame per interval; a refetch of the same ticker replaces it.
+_references: dict = {}                  # interval -> (ticker, bars)
+_references_lock = threading.Lock()
+
+
+def keep_reference(ticker: str, interval: str, bars: pd.DataFrame) -> None:
+    with _references_lock:
+        kept = _references.get(interval)
+        if kept is None or kept[0] == ticker:
+            _references[interval] = (ticker, bars)
+
+
+def reference_bars(ticker: str, interval: str) -> Optional[pd.DataFrame]:
+    """`ticker`'s uncompacted bars if it is `interval`'s reference ticker, else None."""
+    with _references_lock:
+        kept = _references.get(interval)
+    return kept[1] if kept is not None and kept[0] == ticker else None
+
+
+# ── snapshots ──────────────────────────────────────────────────────────────
+def compact_snapshot(df: pd.DataFrame) -> pd.DataFrame:
+    """Downcast float columns to float32 and make Ticker / Timeframe categorical."""
+    floats = [c for c in df.select_dtypes(include="float64").columns if c != "Epoch"]
+    out = df.astype({c: "float32" for c in floats})
+    if "Epoch" in out.columns and out["Epoch"].dtype != "int64":
+        out["Epoch"] = out["Epoch"].astype("Int64")     # failed rows have no bar time
+    for col in ("Ticker", "Timeframe"):
+        if col in out.columns:
+            out[col] = out[col].astype("category")
+    return out
+
+
+def expand_timestamps(df: pd.DataFrame) -> pd.DataFrame:
+    """Replace the int64 Epoch column with market-time Date / Time strings."""
+    if "Epoch" not in df.columns:
+        return df
+    ts = pd.to_datetime(df["Epoch"].astype("float64"), unit="s", utc=True).dt.tz_convert(MARKET_TZ)
+    out = df.drop(columns="Epoch")
+    at = 2 if "Timeframe" in out.columns else 0
+    out.insert(at, "Date", ts.dt.strftime("%m/%d/%y"))
+    out.insert(at + 1, "Time", ts.dt.strftime("%H:%M"))
+    return out
+
+
+# ── accuracy / memory reporting ────────────────────────────────────────────
+def float32_accuracy(compact_row: pd.DataFrame, full_row: pd.DataFrame) -> pd.Series:
+    """Max relative error per numeric column of a compact row vs its float64 twin."""
+    cols = [c for c in full_row.select_dtypes(include="number").columns if c in compact_row.columns]
+    a = compact_row[cols].to_numpy(dtype="float64")
+    b = full_row[cols].to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel = np.abs(a - b) / np.maximum(np.abs(b), np.finfo("float32").tiny)
+    return pd.Series(np.nanmax(np.where(np.isnan(rel), np.nan, rel), axis=0, initial=0.0), index=cols)
+
+
+def check_float32_accuracy(compact_row: pd.DataFrame, full_row: pd.DataFrame, label: str) -> float:
+    errors = float32_accuracy(compact_row, full_row)
+    worst = errors.idxmax() if len(errors) else None
+    worst_err = float(errors.max()) if len(errors) else 0.0
+    if worst_err > COMPACT_ACCURACY_TOLERANCE:
+        logger.warning(f"float32 accuracy {label}: {worst} off by {worst_err:.2e} (tolerance {COMPACT_ACCURACY_TOLERANCE:.0e})")
+    else:
+        logger.info(f"float32 accuracy {label}: max relative error {worst_err:.2e} ({worst})")
+    return worst_err
+
+
+def _current_rss_bytes() -> Optional[int]:
+    """Resident set size from /proc (Linux only; None elsewhere)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * mmap.PAGESIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size; None where the `resource` module is missing (Windows)."""
+    try:
+        import resource         # Unix only
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024    # bytes on macOS, KiB on Linux / BSD
+
+
+def log_memory(stage: str, frames=None) -> None:
+    """Log process RSS (current / peak) and, optionally, the size of the given frames."""
+    peak = _peak_rss_bytes()
+    rss = _current_rss_bytes()
+    parts = []
+    if rss is not None:
+        parts.append(f"RSS {rss / 2**20:.0f} MiB")
+    if peak is not None:
+        parts.append(f"peak RSS {peak / 2**20:.0f} MiB")
+    if frames is not None:
+        frames = frames.values() if isinstance(frames, dict) else frames
+        nbytes = sum(int(f.memory_usage(index=True, deep=True).sum()) for f in frames)
+        parts.append(f"frames {nbytes / 2**20:.1f} MiB")
+    level = logging.INFO if _enabled else logging.DEBUG
+    logger.log(level, f"🧠 memory after {stage}: " + (", ".join(parts) or "not measurable on this platform"))
@@ -1,49 +1,44 @@
 # === compute_indicators.py ===
 
 import pandas as pd
-import pandas_ta as ta
-import yfinance as yf
-from config.config import INTERVAL_PERIOD_MAP, INDICATOR_REGISTRY
-from indicators.post_indicator_proccessing_functions import series_vwap 
+from indicators.indicator_table import get_indicator_table, timed_call
 
 
 
-def compute_indicators(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+def compute_indicators(df: pd.DataFrame, interval: str, names=None) -> pd.DataFrame:
     """
     Compute all pure TA indicators listed in INDICATOR_REGISTRY.
     This function does not handle passthrough columns like VOLUME or derived columns like REL_VOLUME.
+
+    Indicators come pre-resolved and validated from the compiled indicator
+    table (indicator_table.py), which also collects per-indicator timings.
+    `names` restricts the run to those registry entries (see column_planner.py).
     """
     label = interval.upper()
-    result_cols = []
-
-    for name, meta in INDICATOR_REGISTRY.items():
-        func_path = meta["func"]
-        cols_needed = meta["columns"]
-        params = meta["params"]
+    output = {}                 # new columns only – `df` itself is not modified
 
+    for spec in get_indicator_table():
+        if names is not None and spec.name not in names:
+            continue
         # Ensure all required columns are present
-        if not all(col in df.columns for col in cols_needed):
-            print(f"Skipping {name} — missing required columns.")
+        if not all(col in df.columns for col in spec.columns):
+            print(f"Skipping {spec.name} — missing required columns.")
             continue
 
         try:
-            func = eval(func_path)  # or use getattr(ta, func_path)
-            args = [df[col] for col in cols_needed]
-            result = func(*args, **params)
-            base_col_name = f"{name}_{label}"
+            result = timed_call(spec, *[df[col] for col in spec.columns])
+        except Exception as e:
+            print(f"Error computing {spec.name}: {e}")
+            continue
 
-            if isinstance(result, pd.Series):
-                df[base_col_name] = result
-                result_cols.append(base_col_name)
+        base_col_name = f"{spec.name}_{label}"
 
-            elif isinstance(result, pd.DataFrame):
-                for col in result.columns:
-                    new_col = f"{col}_{label}" if not col.endswith(f"_{label}") else col
-                    df[new_col] = result[col]
-                    result_cols.append(new_col)
+        if isinstance(result, pd.Series):
+            output[base_col_name] = result
 
-        except Exception as e:
-            print(f"Error computing {name}: {e}")
-            continue
+        elif isinstance(result, pd.DataFrame):
+            for col in result.columns:
+                new_col = f"{col}_{label}" if not col.endswith(f"_{label}") else col
+                output[new_col] = result[col]
 
-    return df[result_cols]
+    return pd.DataFrame(output, index=df.index)
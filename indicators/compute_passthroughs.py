@@ -3,13 +3,19 @@
 import pandas as pd
 from config.config import PASSTHROUGH_REGISTRY
 
-def compute_passthroughs(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+def compute_passthroughs(df: pd.DataFrame, interval: str, features=None) -> pd.DataFrame:
     """
     Apply passthrough indicators (e.g., VOLUME, REL_VOLUME) based on column mappings.
     These are not TA indicators but derived directly from raw OHLCV data.
+
+    `features` (label-free names such as "VOLUME_Avg" or "PCT_GAIN") limits
+    the output to what the column planner asked for; None computes everything.
     """
     label = interval.upper()
     output = {}
+
+    def wanted(feature: str) -> bool:
+        return features is None or feature in features
     
     # First, normalize column names by checking for case-insensitive matches
     column_map = {}
@@ -40,6 +46,8 @@ def compute_passthroughs(df: pd.DataFrame, interval: str) -> pd.DataFrame:
         # Skip PCT_GAIN here - we'll handle it separately
         if name == "PCT_GAIN":
             continue
+        if not any(wanted(f) for f in (name, f"{name}_Avg", f"{name}_Slope")):
+            continue
         
         # Try to find the actual column name using our mapping
         actual_source_col = column_map.get(source_col.lower(), source_col)
@@ -49,19 +57,20 @@ def compute_passthroughs(df: pd.DataFrame, interval: str) -> pd.DataFrame:
             continue
 
         series = df[actual_source_col]
-        output[base_col_name] = series
+        if wanted(name):
+            output[base_col_name] = series
 
-        if meta.get("with_avg"):
+        if meta.get("with_avg") and wanted(f"{name}_Avg"):
             output[f"{base_col_name}_Avg"] = series.rolling(5).mean()
 
-        if meta.get("with_slope"):
+        if meta.get("with_slope") and wanted(f"{name}_Slope"):
             output[f"{base_col_name}_Slope"] = series.diff()
 
     # Special case: REL_VOLUME depends on VOLUME and VOLUME_Avg
     vol_col = f"VOLUME_{label}"
     vol_avg_col = f"{vol_col}_Avg"
     relvol_col = f"REL_VOLUME_{label}"
-    if vol_col in output and vol_avg_col in output:
+    if wanted("REL_VOLUME") and vol_col in output and vol_avg_col in output:
         output[relvol_col] = output[vol_col] / output[vol_avg_col]
 
     # Special case: PCT_GAIN - requires both open and close columns
@@ -72,12 +81,14 @@ def compute_passthroughs(df: pd.DataFrame, interval: str) -> pd.DataFrame:
     close_col = column_map.get('close')
     
     # Check if both required columns exist
-    if open_col and close_col and open_col in df.columns and close_col in df.columns:
+    if not wanted("PCT_GAIN"):
+        pass                                # not needed by this run's outputs
+    elif open_col and close_col and open_col in df.columns and close_col in df.columns:
         # Calculate percentage gain
         output[pct_gain_col] = ((df[close_col] - df[open_col]) / df[open_col]) * 100
         
         # Add moving average if configured
-        if PASSTHROUGH_REGISTRY.get("PCT_GAIN", {}).get("with_avg", False):
+        if PASSTHROUGH_REGISTRY.get("PCT_GAIN", {}).get("with_avg", False) and wanted("PCT_GAIN_Avg"):
             output[f"{pct_gain_col}_Avg"] = output[pct_gain_col].rolling(5).mean()
     else:
         print(f"Cannot calculate {pct_gain_col} - missing 'open' or 'close' columns")
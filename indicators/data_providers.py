@@ -0,0 +1,265 @@
+# === data_providers.py ===
+#
+# Pluggable OHLCV sources behind fetch_ticker_data() / fetch_bars_batched().
+#
+#   alpaca     – live Alpaca market-data API (needs config/credentials.py)
+#   replay     – recorded bars from data/priceVolume/<TICKER>_<TF>.csv|.parquet
+#   synthetic  – seeded random-walk bars for N tickers × T bars
+#
+# Every provider implements get_bars(symbols, interval, start) and returns
+# {symbol: frame} in yfinance layout (Open/High/Low/Close/Volume, tz-aware UTC
+# index named "Date"); symbols without data are simply absent. The replay and
+# synthetic providers need no network or keys, so the whole pipeline can be
+# profiled and benchmarked offline and repeatably.
+#
+# window(bars, start) is how the provider's bars are cut to a look-back window
+# after the fact (BAR_CACHE hits, locally derived timeframes): from `start` for
+# live data, back from the last recorded bar for replays (their data ends in
+# the past), not at all for synthetic bars (always n_bars per series).
+
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.config import DATA_PROVIDER, DATA_PROVIDERS, REPLAY_DATA_DIR, SYNTHETIC_BARS, SYNTHETIC_SEED
+from indicators.async_fetch import metered
+from indicators.bar_cache import BAR_CACHE
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+MARKET_TZ = "America/New_York"
+
+# yfinance-style intervals every provider understands
+SUPPORTED_INTERVALS = ("1m", "5m", "15m", "30m", "60m", "1h", "1d", "1wk", "1mo")
+
+
+class BarProvider:
+    name = "base"
+    persist = False          # True → bars are written through the local BarStore
+
+    def get_bars(self, symbols: List[str], interval: str, start: datetime) -> Dict[str, pd.DataFrame]:
+        raise NotImplementedError
+
+    def window(self, bars: pd.DataFrame, start: datetime) -> pd.DataFrame:
+        """The part of `bars` a get_bars(…, start) call would have returned."""
+        return bars[bars.index >= start]
+
+
+# ── Alpaca ─────────────────────────────────────────────────────────────────
+class AlpacaProvider(BarProvider):
+    """Alpaca market-data API. The client is created on first request, not at import."""
+
+    name = "alpaca"
+    persist = True
+
+    def __init__(self, client=None, feed: str = "iex"):
+        self._client = client
+        self.feed = feed                     # free plan; use "sip" if you pay
+
+    @property
+    def client(self):
+        if self._client is None:
+            # pip install alpaca-py
+            from alpaca.data.historical import StockHistoricalDataClient
+            from config.credentials import ALPACA_SECRET, ALPACA_API_KEY
+
+            # Paper- or live-key both work
+            self._client = StockHistoricalDataClient(
+                api_key    = ALPACA_API_KEY,
+                secret_key = ALPACA_SECRET,
+            )
+            # Every HTTP call – pagination included – is rate-limited and timed out
+            session = getattr(self._client, "_session", None)
+            if session is not None:
+                session.request = metered(session.request)
+        return self._client
+
+    @staticmethod
+    def _timeframe(interval: str):
+        """yfinance-style interval → Alpaca TimeFrame."""
+        from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
+
+        mapping = {
+            "1m" : TimeFrame.Minute,
+            "5m" : TimeFrame(5 , TimeFrameUnit.Minute),
+            "15m": TimeFrame(15, TimeFrameUnit.Minute),
+            "30m": TimeFrame(30, TimeFrameUnit.Minute),
+            "60m": TimeFrame.Hour,           # yfinance alias for 1-hour
+            "1h" : TimeFrame.Hour,
+            "1d" : TimeFrame.Day,
+            "1wk": TimeFrame.Week,
+            "1mo": TimeFrame.Month,
+        }
+        return mapping[interval]
+
+    def get_bars(self, symbols: List[str], interval: str, start: datetime) -> Dict[str, pd.DataFrame]:
+        from alpaca.data.requests import StockBarsRequest
+
+        request = StockBarsRequest(
+            symbol_or_symbols = symbols,
+            timeframe         = self._timeframe(interval),
+            start             = start,
+            end               = datetime.now(timezone.utc),
+            adjustment        = "raw",        # ⇢ yfinance default is unadjusted
+            feed              = self.feed,
+        )
+
+        bars = self.client.get_stock_bars(request).df      # multi-index (symbol, time)
+        if bars.empty:
+            return {}
+
+        # Flatten multi-index (drop symbol level) and match yfinance columns
+        return {
+            symbol: _to_yf_frame(frame.droplevel("symbol"))
+            for symbol, frame in bars.groupby(level="symbol", sort=False)
+        }
+
+
+def _to_yf_frame(bars: pd.DataFrame) -> pd.DataFrame:
+    """Rename Alpaca bar columns to yfinance style and keep only OHLCV."""
+    bars = bars.rename(
+        columns={
+            "open"  : "Open",
+            "high"  : "High",
+            "low"   : "Low",
+            "close" : "Close",
+            "volume": "Volume",
+        }
+    )[OHLCV_COLUMNS]
+    bars.index.name = "Date"
+    return bars
+
+
+def _lookback_slice(bars: pd.DataFrame, start: datetime) -> pd.DataFrame:
+    """
+    Apply the requested look-back relative to the last recorded bar instead of
+    the wall clock, so offline data returns the same window on every run.
+    """
+    if bars.empty:
+        return bars
+    lookback = datetime.now(timezone.utc) - start
+    return bars[bars.index >= bars.index[-1] - lookback]
+
+
+# ── Replay ─────────────────────────────────────────────────────────────────
+class ReplayProvider(BarProvider):
+    """Replays recorded bars laid out like data/priceVolume (<TICKER>_<TF>.csv or .parquet)."""
+
+    name = "replay"
+
+    def __init__(self, root: str | Path = REPLAY_DATA_DIR):
+        self.root = Path(root)
+
+    def _load(self, symbol: str, interval: str) -> Optional[pd.DataFrame]:
+        stem = f"{symbol}_{interval.upper()}"
+        parquet, csv = self.root / f"{stem}.parquet", self.root / f"{stem}.csv"
+        if parquet.exists():
+            bars = pd.read_parquet(parquet)
+        elif csv.exists():
+            bars = pd.read_csv(csv, index_col=0)
+        else:
+            return None
+
+        index = bars.index
+        if not isinstance(index, pd.DatetimeIndex):
+            # Daily files carry plain dates (market-local); intraday ones carry offsets
+            aware = len(index) and any(c in str(index[0])[10:] for c in "+-Z")
+            index = pd.to_datetime(index, utc=True) if aware else pd.to_datetime(index)
+        if index.tz is None:
+            index = index.tz_localize(MARKET_TZ)
+        bars.index = index.tz_convert("UTC")
+        bars.index.name = "Date"
+        return bars[OHLCV_COLUMNS].sort_index()
+
+    def get_bars(self, symbols: List[str], interval: str, start: datetime) -> Dict[str, pd.DataFrame]:
+        results = {}
+        for symbol in symbols:
+            bars = self._load(symbol, interval)
+            if bars is not None and not bars.empty:
+                results[symbol] = _lookback_slice(bars, start)
+        return results
+
+    def window(self, bars: pd.DataFrame, start: datetime) -> pd.DataFrame:
+        return _lookback_slice(bars, start)
+
+
+# ── Synthetic ──────────────────────────────────────────────────────────────
+SYNTHETIC_END = pd.Timestamp("2025-01-31 16:00", tz=MARKET_TZ)
+
+_SYNTHETIC_FREQ = {
+    "1m": "1min", "5m": "5min", "15m": "15min", "30m": "30min",
+    "60m": "1h", "1h": "1h", "1d": "B", "1wk": "W-MON", "1mo": "MS",
+}
+
+
+def synthetic_tickers(n: int) -> List[str]:
+    return [f"SYN{i:04d}" for i in range(n)]
+
+
+class SyntheticProvider(BarProvider):
+    """
+    Seeded geometric random walk. Each (symbol, interval) gets its own stream
+    derived from the seed, so results do not depend on request order or batching.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, n_bars: int = SYNTHETIC_BARS, seed: int = SYNTHETIC_SEED):
+        self.n_bars = n_bars
+        self.seed = seed
+
+    def generate(self, symbol: str, interval: str) -> pd.DataFrame:
+        rng = np.random.default_rng([self.seed, zlib.crc32(f"{symbol}|{interval}".encode())])
+        n = self.n_bars
+
+        index = pd.date_range(end=SYNTHETIC_END, periods=n, freq=_SYNTHETIC_FREQ[interval])
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        open_ = np.concatenate([[close[0]], close[:-1]]) * (1 + rng.normal(0, 0.002, n))
+        wick = np.abs(rng.normal(0, 0.004, (2, n))) * close
+        high = np.maximum(open_, close) + wick[0]
+        low = np.minimum(open_, close) - wick[1]
+        volume = rng.integers(10_000, 1_000_000, n).astype(float)
+
+        bars = pd.DataFrame(
+            {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+            index=index.tz_convert("UTC"),
+        )
+        bars.index.name = "Date"
+        return bars
+
+    def get_bars(self, symbols: List[str], interval: str, start: datetime) -> Dict[str, pd.DataFrame]:
+        # Always T bars per symbol – benchmarks control history length via n_bars
+        return {symbol: self.generate(symbol, interval) for symbol in symbols}
+
+    def window(self, bars: pd.DataFrame, start: datetime) -> pd.DataFrame:
+        return bars
+
+
+# ── Registry ───────────────────────────────────────────────────────────────
+PROVIDERS = {cls.name: cls for cls in (AlpacaProvider, ReplayProvider, SyntheticProvider)}
+
+if set(PROVIDERS) != set(DATA_PROVIDERS):
+    raise ImportError(f"config DATA_PROVIDERS {DATA_PROVIDERS} does not match the registered providers {tuple(PROVIDERS)}")
+
+_active_provider: Optional[BarProvider] = None
+
+
+def set_provider(provider: str | BarProvider, **kwargs) -> BarProvider:
+    """Select the provider the fetch layer dispatches to (by name or instance)."""
+    global _active_provider
+    BAR_CACHE.invalidate()                   # cached bars belong to the previous source
+    if isinstance(provider, str):
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unknown data provider {provider!r} (choose from {', '.join(PROVIDERS)})")
+        provider = PROVIDERS[provider](**kwargs)
+    _active_provider = provider
+    return provider
+
+
+def get_provider() -> BarProvider:
+    if _active_provider is None:
+        set_provider(DATA_PROVIDER)
+    return _active_provider
@@ -2,8 +2,11 @@
 
 from config.config import INDICATOR_ENHANCERS
 from indicators.post_indicator_proccessing_functions import (
-    z_score, true_trend, signal_noise, slope_diff, smooth_series, velocity_rank
+    z_score, rolling_slope, signal_noise, slope_diff, smooth_series, velocity_rank,
+    as_block, z_score_block, rolling_std_block, diff_block,
+    rolling_mean_block, pct_change_block,
 )
+import numpy as np
 import pandas as pd
 
 # === FUNC_MAP ===
@@ -19,43 +22,106 @@ import pandas as pd
 
 FUNC_MAP = {
     "z_score": z_score,
-    "true_trend": lambda s: s.rolling(20).apply(true_trend, raw=False),
+    "true_trend": lambda s: rolling_slope(s, 20),
     "signal_noise": signal_noise,
     "slope_diff": slope_diff,
     "smooth_series": smooth_series,
     "velocity_rank": velocity_rank,
 }
 
-def apply_derived_features(df: pd.DataFrame, label: str) -> pd.DataFrame:
+# === BLOCK_FUNC_MAP ===
+# Enhancers with a NumPy block kernel: (rows × indicators) float64 block in, same
+# shape out. apply_derived_features() runs these once over every indicator that
+# uses the enhancer; enhancers only in FUNC_MAP fall back to one call per column.
+BLOCK_FUNC_MAP = {
+    "z_score": z_score_block,
+    "true_trend": lambda b: rolling_slope(b, 20),
+    "signal_noise": rolling_std_block,
+    "slope_diff": diff_block,
+    "smooth_series": rolling_mean_block,
+    "velocity_rank": pct_change_block,
+}
+
+# Enhancer name → output column suffix (<Indicator>_<Suffix>_<Label>)
+ENHANCER_SUFFIXES = {
+    "true_trend": "Trend",
+    "slope_diff": "Impulse",
+    "smooth_series": "Smoothed",
+    "velocity_rank": "Velocity",
+    "signal_noise": "Noise",
+    "z_score": "Z",
+}
+
+def apply_derived_features(df: pd.DataFrame, label: str, enhancers_by_indicator: dict = None, cache=None) -> pd.DataFrame:
     """
     Applies configured post-indicator enhancements (like Z-score, Trend, Noise, etc.)
     to indicators listed in INDICATOR_ENHANCERS.
 
+    `enhancers_by_indicator` restricts the work to a subset of INDICATOR_ENHANCERS
+    (the column planner passes only what the run's outputs need). With a
+    ResultCache, an output whose input column is unchanged since a previous run
+    is read back instead of recomputed.
+
     Output column names follow the format: <Indicator>_<Enhancer>_<Label>
     e.g. "RSI_Z_1D", "OBV_Trend_1H"
     """
-    for base_name, enhancers in INDICATOR_ENHANCERS.items():
+    if enhancers_by_indicator is None:
+        enhancers_by_indicator = INDICATOR_ENHANCERS
+
+    # Enhancer → input columns it applies to, in INDICATOR_ENHANCERS order
+    inputs_by_enhancer = {}
+    for base_name, enhancers in enhancers_by_indicator.items():
         input_col = f"{base_name}_{label}"
         if input_col not in df.columns:
             continue
-
         for enhancer in enhancers:
-            try:
-                func = FUNC_MAP[enhancer]
-
-                # Map enhancer names to suffix labels
-                suffix = enhancer.replace("true_trend", "Trend") \
-                                 .replace("slope_diff", "Impulse") \
-                                 .replace("smooth_series", "Smoothed") \
-                                 .replace("velocity_rank", "Velocity") \
-                                 .replace("signal_noise", "Noise") \
-                                 .replace("z_score", "Z")
+            inputs_by_enhancer.setdefault(enhancer, []).append(base_name)
 
-                # Final output column: <Indicator>_<Enhancer>_<Label>
-                output_col = f"{base_name}_{suffix}_{label}"
-                df[output_col] = func(df[input_col])
-
-            except Exception as e:
-                print(f"❌ Error enhancing {input_col} with {enhancer}: {e}")
+    outputs = {}
+    for enhancer, base_names in inputs_by_enhancer.items():
+        suffix = ENHANCER_SUFFIXES.get(enhancer, enhancer)
+        input_cols = [f"{base_name}_{label}" for base_name in base_names]
+        # Final output columns: <Indicator>_<Enhancer>_<Label>
+        output_cols = [f"{base_name}_{suffix}_{label}" for base_name in base_names]
+        keys = {}
+        if cache is not None:
+            impl = BLOCK_FUNC_MAP.get(enhancer) or FUNC_MAP.get(enhancer)
+            keys = {out: cache.enhancer_key(enhancer, impl, label, as_block(df[inp])[:, 0])
+                    for inp, out in zip(input_cols, output_cols)}
+            found = cache.get_columns(list(keys.values()))
+            for out, key in keys.items():
+                if key in found:
+                    outputs[out] = found[key]
+            todo = [(inp, out) for inp, out in zip(input_cols, output_cols) if out not in outputs]
+            if not todo:
+                continue
+            input_cols, output_cols = (list(x) for x in zip(*todo))
+        computed = {}
+        try:
+            kernel = BLOCK_FUNC_MAP.get(enhancer)
+            if kernel is not None:
+                block = kernel(as_block(df[input_cols]))
+                computed.update(zip(output_cols, block.T))
+            else:
+                func = FUNC_MAP[enhancer]
+                for input_col, output_col in zip(input_cols, output_cols):
+                    try:
+                        computed[output_col] = np.asarray(func(df[input_col]))
+                    except Exception as e:
+                        print(f"❌ Error enhancing {input_col} with {enhancer}: {e}")
+        except Exception as e:
+            print(f"❌ Error enhancing {', '.join(input_cols)} with {enhancer}: {e}")
+        outputs.update(computed)
+        if cache is not None:
+            cache.put_columns({keys[out]: values for out, values in computed.items()})
 
-    return df
+    if not outputs:
+        return df
+    # One new block instead of a column insert per output
+    ordered = [
+        f"{base_name}_{ENHANCER_SUFFIXES.get(enhancer, enhancer)}_{label}"
+        for base_name, enhancers in enhancers_by_indicator.items() for enhancer in enhancers
+    ]
+    ordered = [col for col in ordered if col in outputs]
+    block = pd.DataFrame(dict(zip(ordered, (outputs[col] for col in ordered))), index=df.index)
+    return pd.concat([df.drop(columns=ordered, errors="ignore"), block], axis=1)
@@ -1,87 +1,146 @@
-# === Alpaca Stock-data helpers ============================================
-# pip install alpaca-py
-from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockBarsRequest
-from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
-import pandas as pd, os, re
-from datetime import datetime, timezone, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List
-from config.credentials import ALPACA_SECRET, ALPACA_API_KEY
-
-# ── 1)  Initialise the client (paper- or live-key both work) ──────────────
-
-_data_client = StockHistoricalDataClient(
-    api_key       = ALPACA_API_KEY,
-    secret_key    = ALPACA_SECRET,
-    # raw_data      = True             # ⇢ return a tidy pd.DataFrame
-)
-
-# ── 2)  yfinance-style interval → Alpaca TimeFrame mapping ────────────────
-INTERVAL_MAP = {
-    "1m" : TimeFrame.Minute,
-    "5m" : TimeFrame(5 , TimeFrameUnit.Minute),
-    "15m": TimeFrame(15, TimeFrameUnit.Minute),
-    "30m": TimeFrame(30, TimeFrameUnit.Minute),
-    "60m": TimeFrame.Hour,           # yfinance alias for 1-hour
-    "1h" : TimeFrame.Hour,
-    "1d" : TimeFrame.Day,
-    "1wk": TimeFrame.Week,
-    "1mo": TimeFrame.Month,
-}
-
-# ── 3)  Helper → convert “60d”, “1y”, “2mo” … to UTC start-date ───────────
-_PERIOD_RE = re.compile(r"(?P<num>\d+)(?P<unit>[dmwy])")
-_UNIT_TO_DAYS = {"d":1, "w":7, "m":30, "y":365}      # rough is fine for look-backs
-
-def _period_to_start(period: str) -> datetime:
-    m = _PERIOD_RE.fullmatch(period)
-    if not m:
-        raise ValueError(f"Unsupported period {period!r}")
-    days = int(m["num"]) * _UNIT_TO_DAYS[m["unit"]]
-    return datetime.now(timezone.utc) - timedelta(days=days)
-
-# ── 4)  Core fetch function – same signature as before ────────────────────
+# === Stock-data helpers ===================================================
+# Bars come from the active provider in data_providers.py (Alpaca by
+# default; replay / synthetic for offline runs), read through the
+# in-process BAR_CACHE and – for providers that persist – the local BarStore.
+import pandas as pd, os
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional
+from config.config import BAR_STORE_ENABLED, FETCH_BATCH_SIZE
+from indicators import compact
+from indicators.async_fetch import AsyncFetchEngine
+from indicators.bar_cache import BAR_CACHE
+from indicators.bar_store import BarStore
+from indicators.data_providers import BarProvider, SUPPORTED_INTERVALS, get_provider
+from indicators.periods import period_to_start
+
+# ── 1)  Local Parquet bar store that fetches read through (see bar_store.py)
+_bar_store = BarStore()
+
+def set_bar_store_root(root) -> None:
+    """Read through the store at `root` (main.py: <output-dir>/BAR_STORE_DIR)."""
+    global _bar_store
+    if _bar_store.root != Path(root):
+        _bar_store = BarStore(root)
+
+# ── 2)  Helper → convert “60d”, “1y”, “2mo” … to UTC start-date ───────────
+_period_to_start = period_to_start
+
+def _check_interval(interval: str) -> None:
+    if interval not in SUPPORTED_INTERVALS:
+        raise ValueError(f"Unsupported interval {interval}")
+
+def _uses_store(provider: BarProvider) -> bool:
+    return BAR_STORE_ENABLED and provider.persist
+
+def _cache_bars(ticker: str, interval: str, start: datetime, bars: pd.DataFrame) -> pd.DataFrame:
+    """Put bars in BAR_CACHE (compacted in --compact mode) and return what was cached."""
+    if compact.is_enabled():
+        compact.keep_reference(ticker, interval, bars)      # float64 original for the accuracy check
+        bars = compact.compact_bars(bars)
+    BAR_CACHE.put(ticker, interval, start, bars)
+    return bars
+
+# ── 3)  Core fetch function – same signature as before ────────────────────
 def fetch_ticker_data(
     ticker: str,
     interval: str,
     period: str = "60d",
 ) -> pd.DataFrame:
-    """Return OHLCV data in yfinance format via Alpaca."""
-    tf = INTERVAL_MAP.get(interval)
-    if tf is None:
-        raise ValueError(f"Unsupported interval {interval}")
+    """
+    Return OHLCV data in yfinance format from the active data provider.
 
-    request = StockBarsRequest(
-        symbol_or_symbols = ticker,
-        timeframe         = tf,
-        start             = _period_to_start(period),
-        end               = datetime.now(timezone.utc),
-        adjustment        = "raw",        # ⇢ yfinance default is unadjusted
-        feed              = "iex",        # free plan; use "sip" if you pay
-    )
-
-    bars = _data_client.get_stock_bars(request).df     # multi-index (symbol, time)
-    if bars.empty:
-        raise ValueError(f"No data for {ticker} at {interval}")
-
-    # Flatten multi-index, rename to match yfinance, keep only needed cols
-    bars = (
-        bars.xs(ticker, level="symbol")   # drop symbol level
-            .rename(
-                columns={
-                    "open"  : "Open",
-                    "high"  : "High",
-                    "low"   : "Low",
-                    "close" : "Close",
-                    "volume": "Volume",
-                }
-            )[["Open", "High", "Low", "Close", "Volume"]]
-    )
-    bars.index.name = "Date"
-    return bars
+    Served from the in-process BAR_CACHE when a cached window covers the
+    period. Otherwise, with BAR_STORE_ENABLED the local bar store is read
+    through: only bars after the last stored timestamp are requested, then
+    merged and persisted.
+    """
+    _check_interval(interval)
+    provider = get_provider()
+    start = _period_to_start(period)
+
+    with BAR_CACHE.fetch_lock(interval, [ticker]):
+        cached = BAR_CACHE.get(ticker, interval, start, provider.window)
+        if cached is not None and not cached.empty:
+            return cached
+
+        def fetch_since(since: datetime) -> pd.DataFrame:
+            return provider.get_bars([ticker], interval, since).get(ticker)
+
+        if _uses_store(provider):
+            bars = _bar_store.read_through(ticker, interval, start, fetch_since)
+        else:
+            bars = fetch_since(start)
+
+        if bars is None or bars.empty:
+            raise ValueError(f"No data for {ticker} at {interval}")
+        return _cache_bars(ticker, interval, start, bars)
+
+# ── 4)  Batched multi-symbol fetch – one request per symbol chunk ─────────
+# Alpaca takes a comma-separated symbol list in the query string; config
+# FETCH_BATCH_SIZE keeps each request comfortably below URL-length limits.
+
+def fetch_bars_batched(
+    tickers: List[str],
+    interval: str,
+    period: str = "60d",
+    chunk_size: int = FETCH_BATCH_SIZE,
+    provider: Optional[BarProvider] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Fetch OHLCV bars for a whole universe in ceil(len(tickers) / chunk_size)
+    provider requests and split the result per ticker.
+
+    Tickers the provider returns no bars for are absent from the result.
+    `provider` defaults to the active one; pass e.g.
+    `AlpacaProvider(client=stub)` to exercise the Alpaca path against a stub.
+    """
+    _check_interval(interval)
+    provider = provider or get_provider()
+    start = _period_to_start(period)
+
+    # Hold the fetch locks so concurrent jobs never pull the same key twice
+    with BAR_CACHE.fetch_lock(interval, tickers):
+        # Anything already in the in-process cache needs no request at all
+        results = {}
+        symbols = []
+        for symbol in dict.fromkeys(tickers):           # de-dupe, keep order
+            cached = BAR_CACHE.get(symbol, interval, start, provider.window)
+            if cached is not None and not cached.empty:
+                results[symbol] = cached
+            else:
+                symbols.append(symbol)
+        if not symbols:
+            return results
+
+        # Tickers the store does not cover yet need the full window; the rest
+        # share one incremental request group starting at the oldest last bar.
+        if _uses_store(provider):
+            since = {s: _bar_store.refresh_start(s, interval, start) for s in symbols}
+        else:
+            since = {s: start for s in symbols}
+        full        = [s for s in symbols if since[s] == start]
+        incremental = [s for s in symbols if since[s] != start]
+        groups = [(start, full)]
+        if incremental:
+            groups.append((min(since[s] for s in incremental), incremental))
+
+        fetched = {}
+        for group_start, group in groups:
+            for i in range(0, len(group), chunk_size):
+                fetched.update(provider.get_bars(group[i:i + chunk_size], interval, group_start))
+
+        for symbol in symbols:
+            if _uses_store(provider):
+                bars = _bar_store.merge(symbol, interval, fetched.get(symbol), start)
+            else:
+                bars = fetched.get(symbol)
+            if bars is not None and not bars.empty:
+                results[symbol] = _cache_bars(symbol, interval, start, bars)
+        return results
 
-# ── 5)  Multi-ticker fetch (unchanged API) ────────────────────────────────
+# ── 5)  Multi-ticker fetch (unchanged API, now rate-limited) ─────────────
 def fetch_multiple_tickers(
     tickers: List[str],
     interval: str,
@@ -89,18 +148,14 @@ def fetch_multiple_tickers(
     max_workers: int = 5
 ) -> Dict[str, pd.DataFrame]:
     results = {}
-    with ThreadPoolExecutor(max_workers=max_workers) as pool:
-        fut_to_tkr = {
-            pool.submit(fetch_ticker_data, tkr, interval, period): tkr
-            for tkr in tickers
-        }
-        for fut in as_completed(fut_to_tkr):
-            tkr = fut_to_tkr[fut]
-            try:
-                results[tkr] = fut.result()
-                print(f"✅ {tkr} fetched")
-            except Exception as e:
-                print(f"❌ {tkr} failed: {e}")
+    engine = AsyncFetchEngine(max_concurrency=max_workers)
+    jobs = [(tkr, partial(fetch_ticker_data, tkr, interval, period)) for tkr in tickers]
+    for result in engine.iter_completed(jobs):
+        if result.ok:
+            results[result.key] = result.value
+            print(f"✅ {result.key} fetched")
+        else:
+            print(f"❌ {result.key} failed: {result.error}")
     return results
 
 # ── 6)  Snapshot helper – works exactly like your original ────────────────
@@ -0,0 +1,459 @@
+# === incremental.py ===
+#
+# Streaming versions of the INDICATOR_REGISTRY indicators. Each kernel keeps
+# a small per-(ticker, timeframe) state and advances it in O(1) per new bar,
+# so a fresh last row no longer means recomputing the whole history.
+#
+#   RSI, ATR   Wilder smoothing (pandas_ta rma: ewm(alpha=1/n, adjust=True))
+#              kept as decayed numerator / denominator sums
+#   MACD       three SMA-seeded EMAs (fast, slow, signal on MACD)
+#   OBV        running signed-volume total
+#   CMF, VWAP  ring buffers with running window sums
+#   BBANDS     ring buffer with running sum / sum of squares (ddof=0)
+#
+# warm_up() seeds the state from history in bulk (numpy / pandas over the
+# whole array, not bar by bar); update() then takes one bar at a time. Output
+# column names match compute_indicators() (e.g. RSI_5M, MACDh_12_26_9_5M,
+# BBP_20_2.0_5M), so rows can be swapped in for its last row.
+# tests/test_incremental.py checks warm-up + streamed rows against pandas_ta.
+
+import math
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.config import INDICATOR_REGISTRY
+
+EPS = np.finfo(float).eps
+NAN = float("nan")
+
+
+def _div(a: float, b: float) -> float:
+    """a / b with numpy semantics (inf / nan instead of ZeroDivisionError)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return float(np.float64(a) / np.float64(b))
+
+
+def _nz_range(high, low):
+    """high - low, with EPS where it is zero (pandas_ta non_zero_range, per bar)."""
+    rng = np.asarray(high, dtype="float64") - np.asarray(low, dtype="float64")
+    return np.where(rng == 0, EPS, rng)
+
+
+# ── Building blocks ────────────────────────────────────────────────────────
+class _Ring:
+    """
+    Fixed-size window with running sums; re-summed exactly once per lap to bound
+    drift. Like pandas rolling mean / var, a window of one repeated value gives
+    that value and 0 exactly, whatever drift the running sums carry.
+    """
+
+    def __init__(self, size: int, squares: bool = False):
+        self.size = size
+        self.squares = squares
+        self.buf = np.zeros(size)
+        self.count = 0
+        self.ref = None                 # shift for the sum of squares (limits cancellation)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.last = NAN
+        self.run = 0                    # trailing run of equal values
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.size
+
+    def _resync(self) -> None:
+        window = self.buf if self.full else self.buf[:self.count]
+        self.total = float(window.sum())
+        if self.squares:
+            self.ref = float(window[0])
+            self.total_sq = float(((window - self.ref) ** 2).sum())
+
+    def push(self, x: float) -> None:
+        if self.ref is None:
+            self.ref = x
+        i = self.count % self.size
+        evicted = self.buf[i] if self.full else None
+        self.buf[i] = x
+        self.count += 1
+        self.run = self.run + 1 if x == self.last else 1
+        self.last = x
+        if self.count % self.size == 0:
+            self._resync()
+            return
+        self.total += x - (evicted if evicted is not None else 0.0)
+        if self.squares:
+            self.total_sq += (x - self.ref) ** 2 - ((evicted - self.ref) ** 2 if evicted is not None else 0.0)
+
+    def fill(self, values: np.ndarray) -> None:
+        """State after pushing every value in `values` (only the last `size` are kept)."""
+        values = np.asarray(values, dtype="float64")
+        self.count = len(values)
+        if not self.count:
+            return
+        tail = values[-self.size:]
+        slots = (np.arange(self.count - len(tail), self.count)) % self.size
+        self.buf[slots] = tail
+        self.last = float(values[-1])
+        changed = np.flatnonzero(values != values[-1])
+        self.run = self.count - 1 - int(changed[-1]) if len(changed) else self.count
+        self._resync()
+
+    def mean(self) -> float:
+        if not self.full:
+            return NAN
+        return self.last if self.run >= self.size else self.total / self.size
+
+    def var(self) -> float:
+        """Population variance of the window (ddof=0)."""
+        if not self.full:
+            return NAN
+        if self.run >= self.size:
+            return 0.0
+        shifted_mean = self.total / self.size - self.ref
+        return max(self.total_sq / self.size - shifted_mean ** 2, 0.0)
+
+
+class _Wilder:
+    """pandas_ta rma: ewm(alpha=1/n, min_periods=n, adjust=True) as decayed sums."""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.decay = 1.0 - 1.0 / length
+        self.num = 0.0
+        self.den = 0.0
+        self.count = 0
+
+    def push(self, x: float) -> None:
+        self.num = self.decay * self.num + x
+        self.den = self.decay * self.den + 1.0
+        self.count += 1
+
+    def fill(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype="float64")
+        self.count = len(values)
+        weights = self.decay ** np.arange(self.count - 1, -1, -1, dtype="float64")
+        self.num = float(values @ weights)
+        self.den = float(weights.sum())
+
+    def value(self) -> float:
+        return self.num / self.den if self.count >= self.length else NAN
+
+
+class _SeededEMA:
+    """pandas_ta ema: SMA of the first n values, then ewm(span=n, adjust=False)."""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.count = 0
+        self.seed_sum = 0.0
+        self.ema = NAN
+
+    def push(self, x: float) -> None:
+        self.count += 1
+        if self.count < self.length:
+            self.seed_sum += x
+        elif self.count == self.length:
+            self.ema = (self.seed_sum + x) / self.length
+        else:
+            self.ema = (1.0 - self.alpha) * self.ema + self.alpha * x
+
+    def fill(self, values: np.ndarray) -> np.ndarray:
+        """Seed from `values` and return the EMA series over them."""
+        values = np.asarray(values, dtype="float64")
+        n = self.length
+        self.count = len(values)
+        if self.count < n:
+            self.seed_sum = float(values.sum())
+            return np.full(self.count, NAN)
+        seeded = values.copy()
+        seeded[:n - 1] = NAN
+        seeded[n - 1] = values[:n].mean()
+        series = pd.Series(seeded).ewm(span=n, adjust=False).mean().to_numpy(copy=True)
+        series[:n - 1] = NAN
+        self.ema = float(series[-1])
+        return series
+
+    def value(self) -> float:
+        return self.ema if self.count >= self.length else NAN
+
+
+# ── Kernels ────────────────────────────────────────────────────────────────
+class IncrementalIndicator:
+    """
+    One indicator's streaming state. values() maps output column → value:
+    multi-column kernels use the pandas_ta DataFrame column names
+    (MACD_12_26_9, BBL_20_2.0 …), single-value kernels the key "" which
+    the engine replaces with the registry name.
+    """
+
+    def update(self, open_: float, high: float, low: float, close: float, volume: float) -> None:
+        raise NotImplementedError
+
+    def warm_up(self, bars: pd.DataFrame) -> None:
+        for row in bars[["Open", "High", "Low", "Close", "Volume"]].itertuples(index=False):
+            self.update(*row)
+
+    def values(self) -> Dict[str, float]:
+        raise NotImplementedError
+
+
+class RSIKernel(IncrementalIndicator):
+    def __init__(self, length: int = 14, **_):
+        self.prev_close = None
+        self.gain = _Wilder(length)
+        self.loss = _Wilder(length)
+
+    def update(self, open_, high, low, close, volume):
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            self.gain.push(max(change, 0.0))
+            self.loss.push(min(change, 0.0))
+        self.prev_close = close
+
+    def warm_up(self, bars):
+        close = bars["Close"].to_numpy(dtype="float64")
+        if len(close):
+            change = np.diff(close)
+            self.gain.fill(np.maximum(change, 0.0))
+            self.loss.fill(np.minimum(change, 0.0))
+            self.prev_close = float(close[-1])
+
+    def values(self):
+        gain, loss = self.gain.value(), abs(self.loss.value())
+        return {"": 100 * _div(gain, gain + loss)}
+
+
+class MACDKernel(IncrementalIndicator):
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9, **_):
+        self.suffix = f"{fast}_{slow}_{signal}"
+        self.fast = _SeededEMA(fast)
+        self.slow = _SeededEMA(slow)
+        self.signal = _SeededEMA(signal)      # fed from the first valid MACD value on
+
+    def _macd(self) -> float:
+        return self.fast.value() - self.slow.value()
+
+    def update(self, open_, high, low, close, volume):
+        self.fast.push(close)
+        self.slow.push(close)
+        macd = self._macd()
+        if not math.isnan(macd):
+            self.signal.push(macd)
+
+    def warm_up(self, bars):
+        close = bars["Close"].to_numpy(dtype="float64")
+        macd = self.fast.fill(close) - self.slow.fill(close)
+        self.signal.fill(macd[~np.isnan(macd)])
+
+    def values(self):
+        signal = self.signal.value()
+        macd = self._macd() if not math.isnan(signal) else NAN   # pandas_ta: no MACD before the signal
+        return {
+            f"MACD_{self.suffix}": macd,
+            f"MACDh_{self.suffix}": macd - signal,
+            f"MACDs_{self.suffix}": signal,
+        }
+
+
+class OBVKernel(IncrementalIndicator):
+    def __init__(self, **_):
+        self.prev_close = None
+        self.total = 0.0
+
+    def update(self, open_, high, low, close, volume):
+        # pandas_ta signed_series(initial=1): the first bar counts as an up bar
+        sign = 1.0 if self.prev_close is None else float(np.sign(close - self.prev_close))
+        self.total += sign * volume
+        self.prev_close = close
+
+    def warm_up(self, bars):
+        close = bars["Close"].to_numpy(dtype="float64")
+        if len(close):
+            sign = np.concatenate([[1.0], np.sign(np.diff(close))])
+            self.total = float((sign * bars["Volume"].to_numpy(dtype="float64")).sum())
+            self.prev_close = float(close[-1])
+
+    def values(self):
+        return {"": self.total if self.prev_close is not None else NAN}
+
+
+class ATRKernel(IncrementalIndicator):
+    def __init__(self, length: int = 14, **_):
+        self.prev_close = None
+        self.true_range = _Wilder(length)
+
+    def update(self, open_, high, low, close, volume):
+        if self.prev_close is not None:       # first true range is NaN in pandas_ta
+            hl = float(_nz_range(high, low))
+            self.true_range.push(max(abs(hl), abs(high - self.prev_close), abs(self.prev_close - low)))
+        self.prev_close = close
+
+    def warm_up(self, bars):
+        high, low, close = (bars[c].to_numpy(dtype="float64") for c in ("High", "Low", "Close"))
+        if len(close):
+            prev = close[:-1]
+            tr = np.max(np.abs([_nz_range(high[1:], low[1:]), high[1:] - prev, prev - low[1:]]), axis=0)
+            self.true_range.fill(tr)
+            self.prev_close = float(close[-1])
+
+    def values(self):
+        return {"": self.true_range.value()}
+
+
+class CMFKernel(IncrementalIndicator):
+    def __init__(self, length: int = 20, **_):
+        self.ad = _Ring(length)
+        self.volume = _Ring(length)
+
+    @staticmethod
+    def _ad(high, low, close, volume):
+        return (2 * close - (high + low)) * volume / _nz_range(high, low)
+
+    def update(self, open_, high, low, close, volume):
+        self.ad.push(float(self._ad(high, low, close, volume)))
+        self.volume.push(volume)
+
+    def warm_up(self, bars):
+        high, low, close, volume = (bars[c].to_numpy(dtype="float64") for c in ("High", "Low", "Close", "Volume"))
+        self.ad.fill(self._ad(high, low, close, volume))
+        self.volume.fill(volume)
+
+    def values(self):
+        return {"": _div(self.ad.total, self.volume.total) if self.ad.full else NAN}
+
+
+class VWAPKernel(IncrementalIndicator):
+    def __init__(self, window: int = 20, **_):
+        self.pv = _Ring(window)
+        self.volume = _Ring(window)
+
+    def update(self, open_, high, low, close, volume):
+        self.pv.push((high + low + close) / 3 * volume)
+        self.volume.push(volume)
+
+    def warm_up(self, bars):
+        high, low, close, volume = (bars[c].to_numpy(dtype="float64") for c in ("High", "Low", "Close", "Volume"))
+        self.pv.fill((high + low + close) / 3 * volume)
+        self.volume.fill(volume)
+
+    def values(self):
+        return {"": _div(self.pv.total, self.volume.total) if self.pv.full else NAN}
+
+
+class BBandsKernel(IncrementalIndicator):
+    def __init__(self, length: int = 20, std: float = 2, **_):
+        self.std = float(std)
+        self.suffix = f"{length}_{self.std}"
+        self.close = _Ring(length, squares=True)
+        self.last = NAN
+
+    def update(self, open_, high, low, close, volume):
+        self.close.push(close)
+        self.last = close
+
+    def warm_up(self, bars):
+        close = bars["Close"].to_numpy(dtype="float64")
+        self.close.fill(close)
+        self.last = float(close[-1]) if len(close) else NAN
+
+    def values(self):
+        mid = self.close.mean()
+        width = self.std * math.sqrt(self.close.var()) if self.close.full else NAN
+        lower, upper = mid - width, mid + width
+        band = float(_nz_range(upper, lower))
+        return {
+            f"BBL_{self.suffix}": lower,
+            f"BBM_{self.suffix}": mid,
+            f"BBU_{self.suffix}": upper,
+            f"BBB_{self.suffix}": 100 * _div(band, mid),
+            f"BBP_{self.suffix}": _div(float(_nz_range(self.last, lower)), band),
+        }
+
+
+# Registry "func" → kernel
+KERNELS = {
+    "ta.rsi": RSIKernel,
+    "ta.macd": MACDKernel,
+    "ta.obv": OBVKernel,
+    "ta.atr": ATRKernel,
+    "ta.cmf": CMFKernel,
+    "series_vwap": VWAPKernel,
+    "ta.bbands": BBandsKernel,
+}
+
+
+# ── Engine ─────────────────────────────────────────────────────────────────
+class IncrementalIndicatorEngine:
+    """
+    Per-(ticker, timeframe) kernel sets for every INDICATOR_REGISTRY entry
+    that has a streaming kernel.
+
+        engine.warm_up("SPY", "5m", history)       # bulk, from past bars
+        engine.update("SPY", "5m", bar)            # O(1) per closed bar
+        engine.snapshot("SPY", "5m")               # one-row frame, compute_indicators columns
+    """
+
+    def __init__(self, registry: Optional[dict] = None):
+        self.registry = registry if registry is not None else INDICATOR_REGISTRY
+        self._states: Dict[tuple, dict] = {}
+        self._last_ts: Dict[tuple, pd.Timestamp] = {}
+        self.skipped = [name for name, meta in self.registry.items() if meta["func"] not in KERNELS]
+
+    def _new_state(self) -> dict:
+        return {
+            name: KERNELS[meta["func"]](**meta["params"])
+            for name, meta in self.registry.items()
+            if meta["func"] in KERNELS
+        }
+
+    def warm_up(self, ticker: str, interval: str, bars: pd.DataFrame) -> Dict[str, float]:
+        """(Re)build the state for (ticker, interval) from `bars` and return the current row."""
+        key = (ticker, interval)
+        state = self._new_state()
+        for kernel in state.values():
+            kernel.warm_up(bars)
+        self._states[key] = state
+        if len(bars):
+            self._last_ts[key] = bars.index[-1]
+        return self.values(ticker, interval)
+
+    def update(self, ticker: str, interval: str, bar, timestamp=None) -> Dict[str, float]:
+        """Advance (ticker, interval) by one closed bar (a mapping or row with OHLCV fields)."""
+        key = (ticker, interval)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = self._new_state()
+        ohlcv = (float(bar["Open"]), float(bar["High"]), float(bar["Low"]), float(bar["Close"]), float(bar["Volume"]))
+        for kernel in state.values():
+            kernel.update(*ohlcv)
+        if timestamp is None:
+            timestamp = getattr(bar, "name", None)
+        if timestamp is not None:
+            self._last_ts[key] = timestamp
+        return self.values(ticker, interval)
+
+    def has_state(self, ticker: str, interval: str) -> bool:
+        return (ticker, interval) in self._states
+
+    def values(self, ticker: str, interval: str) -> Dict[str, float]:
+        label = interval.upper()
+        row = {}
+        for name, kernel in self._states[(ticker, interval)].items():
+            for col, value in kernel.values().items():
+                row[f"{col or name}_{label}"] = value
+        return row
+
+    def snapshot(self, ticker: str, interval: str) -> pd.DataFrame:
+        """Current values as a one-row frame indexed by the last bar's timestamp."""
+        index = [self._last_ts.get((ticker, interval))]
+        return pd.DataFrame([self.values(ticker, interval)], index=index)
+
+    def reset(self, ticker: Optional[str] = None, interval: Optional[str] = None) -> None:
+        for key in [k for k in self._states if (ticker in (None, k[0])) and (interval in (None, k[1]))]:
+            self._states.pop(key)
+            self._last_ts.pop(key, None)
+
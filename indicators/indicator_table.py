@@ -0,0 +1,185 @@
+# === indicator_table.py ===
+#
+# INDICATOR_REGISTRY compiled once into resolved, validated callables.
+#
+# Each "func" string is resolved a single time ("ta.rsi" → pandas_ta.rsi,
+# "series_vwap" → post_indicator_proccessing_functions.series_vwap, or any
+# "package.module.attr"), and each entry's columns and params are checked
+# against OHLCV and the callable's signature. A bad entry raises
+# RegistryError at startup instead of being printed and skipped for every
+# ticker mid-run.
+#
+# Third-party indicators:
+#   - list plugin modules in config INDICATOR_PLUGINS; each must define
+#     register(table) and call table.register(...)
+#   - or decorate a function with @register_indicator(name, columns, params)
+#
+# Every call is timed per indicator; timing_report() summarises a run.
+
+import importlib
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional
+
+from config.config import INDICATOR_REGISTRY, INDICATOR_PLUGINS
+
+OHLCV_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+
+class RegistryError(ValueError):
+    """An INDICATOR_REGISTRY (or plugin) entry cannot be resolved or called as configured."""
+
+
+@dataclass
+class IndicatorSpec:
+    name: str
+    func: Callable
+    source: str                          # registry "func" string or plugin origin
+    columns: tuple
+    params: dict
+    meta: dict = field(default_factory=dict)
+    calls: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+
+    def record(self, seconds: float, ok: bool = True) -> None:
+        self.calls += 1
+        self.seconds += seconds
+        if not ok:
+            self.errors += 1
+
+
+def resolve_func(func_path: str) -> Callable:
+    """Resolve a registry "func" string to a callable (pandas_ta imported lazily)."""
+    if func_path.startswith("ta."):
+        import pandas_ta as ta        # deferred: importing pandas_ta is slow
+        target, attr = ta, func_path[3:]
+    elif "." not in func_path:
+        from indicators import post_indicator_proccessing_functions as local
+        target, attr = local, func_path
+    else:
+        module_path, attr = func_path.rsplit(".", 1)
+        try:
+            target = importlib.import_module(module_path)
+        except ImportError as e:
+            raise RegistryError(f"Cannot import {module_path} for {func_path}: {e}") from e
+    func = getattr(target, attr, None)
+    if not callable(func):
+        raise RegistryError(f"{func_path} does not resolve to a callable")
+    return func
+
+
+class IndicatorTable:
+    def __init__(self):
+        self._specs: Dict[str, IndicatorSpec] = {}
+
+    def __iter__(self) -> Iterator[IndicatorSpec]:
+        return iter(self._specs.values())
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def __getitem__(self, name: str) -> IndicatorSpec:
+        return self._specs[name]
+
+    def register(
+        self,
+        name: str,
+        func: Callable,
+        columns: List[str],
+        params: Optional[dict] = None,
+        source: Optional[str] = None,
+        replace: bool = False,
+        **meta,
+    ) -> IndicatorSpec:
+        """Validate and add an indicator; output columns are named <name>_<LABEL>."""
+        if name in self._specs and not replace:
+            raise RegistryError(f"Indicator {name} is already registered")
+        params = dict(params or {})
+        unknown = [c for c in columns if c not in OHLCV_COLUMNS]
+        if unknown:
+            raise RegistryError(f"{name}: unknown input column(s) {unknown} (expected {OHLCV_COLUMNS})")
+        try:
+            inspect.signature(func).bind(*columns, **params)
+        except TypeError as e:
+            raise RegistryError(f"{name}: columns {list(columns)} / params {params} do not fit {func.__name__}{inspect.signature(func)}: {e}") from e
+        except ValueError:
+            pass                                 # builtins without a signature – checked on first call
+        spec = IndicatorSpec(name, func, source or getattr(func, "__module__", "?"), tuple(columns), params, meta)
+        self._specs[name] = spec
+        return spec
+
+    def register_registry(self, registry: dict) -> None:
+        for name, entry in registry.items():
+            missing = [k for k in ("func", "columns", "params") if k not in entry]
+            if missing:
+                raise RegistryError(f"{name}: registry entry is missing {missing}")
+            meta = {k: v for k, v in entry.items() if k not in ("func", "columns", "params")}
+            self.register(name, resolve_func(entry["func"]), entry["columns"], entry["params"],
+                          source=entry["func"], **meta)
+
+    # ── timing ──
+    def reset_timings(self) -> None:
+        for spec in self:
+            spec.calls = spec.errors = 0
+            spec.seconds = 0.0
+
+    def timing_report(self) -> str:
+        specs = sorted(self, key=lambda s: s.seconds, reverse=True)
+        lines = [f"{'indicator':<12}{'calls':>8}{'errors':>8}{'total s':>10}{'mean ms':>10}"]
+        for s in specs:
+            mean_ms = 1000 * s.seconds / s.calls if s.calls else 0.0
+            lines.append(f"{s.name:<12}{s.calls:>8}{s.errors:>8}{s.seconds:>10.3f}{mean_ms:>10.3f}")
+        return "\n".join(lines)
+
+
+# ── Plugin hooks / shared table ────────────────────────────────────────────
+_decorated: List[tuple] = []
+_table: Optional[IndicatorTable] = None
+
+
+def register_indicator(name: str, columns: List[str], params: Optional[dict] = None, **meta):
+    """Decorator registering a plugin indicator with the shared table."""
+    def decorator(func):
+        _decorated.append((name, func, columns, params, meta))
+        if _table is not None:
+            _table.register(name, func, columns, params, **meta)
+        return func
+    return decorator
+
+
+def compile_table(registry: Optional[dict] = None, plugins=INDICATOR_PLUGINS) -> IndicatorTable:
+    table = IndicatorTable()
+    table.register_registry(INDICATOR_REGISTRY if registry is None else registry)
+    for module_path in plugins:
+        module = importlib.import_module(module_path)       # may use @register_indicator
+        if hasattr(module, "register"):
+            module.register(table)
+    for name, func, columns, params, meta in _decorated:
+        if name not in table:
+            table.register(name, func, columns, params, **meta)
+    return table
+
+
+def get_indicator_table() -> IndicatorTable:
+    """The shared table, compiled on first use."""
+    global _table
+    if _table is None:
+        _table = compile_table()
+    return _table
+
+
+def timed_call(spec: IndicatorSpec, *args):
+    """Call spec.func, recording its time; exceptions are counted and re-raised."""
+    start = time.perf_counter()
+    try:
+        result = spec.func(*args, **spec.params)
+    except Exception:
+        spec.record(time.perf_counter() - start, ok=False)
+        raise
+    spec.record(time.perf_counter() - start)
+    return result
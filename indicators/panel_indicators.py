@@ -0,0 +1,263 @@
+# === panel_indicators.py ===
+#
+# Vectorized indicator engine: one pass per indicator over a whole timeframe
+# instead of one pandas_ta call per ticker.
+#
+# Bars are aligned into 2-D (time × ticker) float64 arrays. Histories are
+# right-aligned – every ticker's last bar sits in the last row and shorter
+# histories are NaN-padded at the top – so "last row" is a single slice and
+# the NaN padding behaves like pandas_ta's leading NaNs (rolling windows
+# that reach into it are NaN, EWMs start at each column's first bar).
+#
+# Formulas follow pandas_ta 0.3.14b (see indicators/incremental.py for the
+# per-bar versions). Outputs keep the compute_indicators() / compute_passthroughs()
+# names, e.g. RSI_1D, MACDh_12_26_9_1D, BBP_20_2.0_1D, VOLUME_1D_Avg.
+
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from config.config import INDICATOR_REGISTRY, PASSTHROUGH_REGISTRY
+
+EPS = np.finfo(float).eps
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+@dataclass
+class BarPanel:
+    tickers: list
+    arrays: Dict[str, np.ndarray]       # column -> (T, N), right-aligned, NaN-padded
+    lengths: np.ndarray                 # bars per ticker
+    last_ts: pd.DatetimeIndex           # last bar per ticker
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.arrays[column]
+
+
+def build_panel(frames: Dict[str, pd.DataFrame]) -> BarPanel:
+    """Right-align {ticker: OHLCV frame} into (time × ticker) arrays."""
+    tickers = list(frames)
+    lengths = np.array([len(frames[t]) for t in tickers], dtype="int64")
+    depth = int(lengths.max()) if len(lengths) else 0
+
+    arrays = {col: np.full((depth, len(tickers)), np.nan) for col in OHLCV_COLUMNS}
+    for j, ticker in enumerate(tickers):
+        frame, n = frames[ticker], lengths[j]
+        for col in OHLCV_COLUMNS:
+            arrays[col][depth - n:, j] = frame[col].to_numpy(dtype="float64")
+
+    last_ts = pd.DatetimeIndex([frames[t].index[-1] for t in tickers])
+    return BarPanel(tickers, arrays, lengths, last_ts)
+
+
+# ── Helpers (all operate column-wise on (T, N) arrays) ─────────────────────
+def _nz_range(high, low):
+    rng = high - low
+    return np.where(rng == 0, EPS, rng)
+
+
+def _shift(x: np.ndarray) -> np.ndarray:
+    return np.vstack([np.full((1, x.shape[1]), np.nan), x[:-1]])
+
+
+def _rma(x: np.ndarray, length: int) -> np.ndarray:
+    """pandas_ta rma: ewm(alpha=1/length, min_periods=length, adjust=True)."""
+    return pd.DataFrame(x).ewm(alpha=1.0 / length, min_periods=length).mean().to_numpy()
+
+
+def _first_valid(x: np.ndarray) -> np.ndarray:
+    valid = ~np.isnan(x)
+    first = valid.argmax(axis=0)
+    first[~valid.any(axis=0)] = len(x)
+    return first
+
+
+def _seeded_ema(x: np.ndarray, length: int) -> np.ndarray:
+    """pandas_ta ema: SMA of each column's first `length` values, then ewm(adjust=False)."""
+    depth, width = x.shape
+    start = _first_valid(x)
+    seed_row = start + length - 1
+    rows = np.arange(depth)[:, None]
+
+    seeded = np.where(rows >= seed_row[None, :], x, np.nan)
+    cols = np.nonzero(seed_row < depth)[0]
+    if len(cols):
+        csum = np.vstack([np.zeros((1, width)), np.cumsum(np.nan_to_num(x), axis=0)])
+        seeded[seed_row[cols], cols] = (csum[seed_row[cols] + 1, cols] - csum[start[cols], cols]) / length
+    return pd.DataFrame(seeded).ewm(span=length, adjust=False).mean().to_numpy()
+
+
+def _window_sum(x: np.ndarray, window: int) -> np.ndarray:
+    """Sum of each column's last `window` rows (NaN if the window is not complete)."""
+    if len(x) < window:
+        return np.full(x.shape[1], np.nan)
+    return x[-window:].sum(axis=0)
+
+
+def _div(a, b):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return a / b
+
+
+# ── Indicators – same call convention as the pandas_ta functions ───────────
+# Each returns the last-row values: an (N,) array, or {column: (N,) array}
+# for multi-column indicators.
+def panel_rsi(close, length: int = 14, **_):
+    change = close - _shift(close)
+    gain = _rma(np.where(change < 0, 0.0, change), length)[-1]
+    loss = np.abs(_rma(np.where(change > 0, 0.0, change), length)[-1])
+    return 100 * _div(gain, gain + loss)
+
+
+def panel_macd(close, fast: int = 12, slow: int = 26, signal: int = 9, **_):
+    macd = _seeded_ema(close, fast) - _seeded_ema(close, slow)
+    signal_line = _seeded_ema(macd, signal)
+    # pandas_ta returns no MACD at all until the signal line exists
+    macd = np.where(np.isnan(signal_line), np.nan, macd)
+    suffix = f"{fast}_{slow}_{signal}"
+    return {
+        f"MACD_{suffix}": macd[-1],
+        f"MACDh_{suffix}": macd[-1] - signal_line[-1],
+        f"MACDs_{suffix}": signal_line[-1],
+    }
+
+
+def panel_obv(close, volume, **_):
+    sign = np.sign(close - _shift(close))
+    sign = np.where(np.isnan(sign) & ~np.isnan(close), 1.0, sign)     # first bar counts as up
+    total = np.nansum(sign * volume, axis=0)
+    return np.where(np.isnan(close[-1]), np.nan, total)
+
+
+def panel_atr(high, low, close, length: int = 14, **_):
+    prev_close = _shift(close)
+    true_range = np.maximum(
+        np.abs(_nz_range(high, low)),
+        np.maximum(np.abs(high - prev_close), np.abs(prev_close - low)),
+    )
+    return _rma(true_range, length)[-1]
+
+
+def panel_cmf(high, low, close, volume, length: int = 20, **_):
+    ad = (2 * close - (high + low)) * volume / _nz_range(high, low)
+    return _div(_window_sum(ad, length), _window_sum(volume, length))
+
+
+def panel_vwap(high, low, close, volume, window: int = 20, **_):
+    price = (high + low + close) / 3
+    return _div(_window_sum(price * volume, window), _window_sum(volume, window))
+
+
+def panel_bbands(close, length: int = 20, std: float = 2, **_):
+    std = float(std)
+    if len(close) < length:
+        mid = sd = np.full(close.shape[1], np.nan)
+    else:
+        window = close[-length:]
+        mid, sd = window.mean(axis=0), window.std(axis=0)      # ddof=0 like pandas_ta
+    lower, upper = mid - std * sd, mid + std * sd
+    suffix = f"{length}_{std}"
+    return {
+        f"BBL_{suffix}": lower,
+        f"BBM_{suffix}": mid,
+        f"BBU_{suffix}": upper,
+        f"BBB_{suffix}": 100 * _div(upper - lower, mid),
+        f"BBP_{suffix}": _div(close[-1] - lower, upper - lower),
+    }
+
+
+# Registry "func" → panel implementation
+PANEL_FUNCS = {
+    "ta.rsi": panel_rsi,
+    "ta.macd": panel_macd,
+    "ta.obv": panel_obv,
+    "ta.atr": panel_atr,
+    "ta.cmf": panel_cmf,
+    "series_vwap": panel_vwap,
+    "ta.bbands": panel_bbands,
+}
+
+
+def compute_panel_indicators(panel: BarPanel, interval: str, names=None) -> pd.DataFrame:
+    """Last-row INDICATOR_REGISTRY values for every ticker (rows = panel.tickers)."""
+    label = interval.upper()
+    output = {}
+    for name, meta in INDICATOR_REGISTRY.items():
+        if names is not None and name not in names:
+            continue
+        func = PANEL_FUNCS.get(meta["func"])
+        if func is None:
+            print(f"Skipping {name} — no panel implementation for {meta['func']}")
+            continue
+        try:
+            result = func(*[panel[col] for col in meta["columns"]], **meta["params"])
+        except Exception as e:
+            print(f"Error computing {name}: {e}")
+            continue
+        if isinstance(result, dict):
+            for col, values in result.items():
+                output[f"{col}_{label}"] = values
+        else:
+            output[f"{name}_{label}"] = result
+    return pd.DataFrame(output, index=panel.tickers)
+
+
+def compute_panel_passthroughs(panel: BarPanel, interval: str, features=None) -> pd.DataFrame:
+    """Last-row PASSTHROUGH_REGISTRY values, matching compute_passthroughs()."""
+    label = interval.upper()
+    output = {}
+
+    def wanted(feature: str) -> bool:
+        return features is None or feature in features
+
+    def last_mean(x, n=5):
+        return x[-n:].mean(axis=0) if len(x) >= n else np.full(x.shape[1], np.nan)
+
+    for name, meta in PASSTHROUGH_REGISTRY.items():
+        if name == "PCT_GAIN":
+            continue
+        series = panel[meta["source"].capitalize()]
+        base_col_name = f"{name}_{label}"
+        if wanted(name):
+            output[base_col_name] = series[-1]
+        if meta.get("with_avg") and wanted(f"{name}_Avg"):
+            output[f"{base_col_name}_Avg"] = last_mean(series)
+        if meta.get("with_slope") and wanted(f"{name}_Slope"):
+            output[f"{base_col_name}_Slope"] = series[-1] - series[-2] if len(series) > 1 else np.nan
+
+    vol_col = f"VOLUME_{label}"
+    if wanted("REL_VOLUME") and vol_col in output and f"{vol_col}_Avg" in output:
+        output[f"REL_VOLUME_{label}"] = _div(output[vol_col], output[f"{vol_col}_Avg"])
+
+    pct_gain_col = f"PCT_GAIN_{label}"
+    if wanted("PCT_GAIN"):
+        pct_gain = _div(panel["Close"] - panel["Open"], panel["Open"]) * 100
+        output[pct_gain_col] = pct_gain[-1]
+        if PASSTHROUGH_REGISTRY.get("PCT_GAIN", {}).get("with_avg", False) and wanted("PCT_GAIN_Avg"):
+            output[f"{pct_gain_col}_Avg"] = last_mean(pct_gain)
+
+    return pd.DataFrame(output, index=panel.tickers)
+
+
+def panel_snapshot(frames: Dict[str, pd.DataFrame], interval: str, epoch: bool = False, plan=None) -> pd.DataFrame:
+    """
+    Snapshot rows for every ticker in `frames` in one pass – the panel
+    counterpart of build_snapshots._snapshot_row() (same columns and order).
+    `plan` is a column_planner.ColumnPlan; None computes everything.
+    """
+    panel = build_panel(frames)
+    names, features = (plan.indicators, plan.passthroughs) if plan is not None else (None, None)
+    body = pd.concat(
+        [compute_panel_indicators(panel, interval, names), compute_panel_passthroughs(panel, interval, features)],
+        axis=1,
+    )
+    lead = pd.DataFrame({"Ticker": panel.tickers, "Timeframe": interval.upper()}, index=panel.tickers)
+    if epoch:
+        lead["Epoch"] = panel.last_ts.as_unit("s").asi8
+    else:
+        local = panel.last_ts.tz_convert("America/New_York")
+        lead["Date"] = local.strftime("%m/%d/%y")
+        lead["Time"] = local.strftime("%H:%M")
+    return pd.concat([lead, body], axis=1).reset_index(drop=True)
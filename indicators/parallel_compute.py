@@ -0,0 +1,148 @@
+# === parallel_compute.py ===
+#
+# Process-pool execution of per-(ticker, timeframe) indicator work
+# (`main.py --workers N`).
+#
+# Bars travel to the workers as Arrow IPC streams written into
+# multiprocessing shared memory – only the block name and a few scalars are
+# pickled – and each worker runs the same _compute_values() as the in-process
+# path, so rows are identical. Result-cache lookups and stores stay in the
+# parent; workers only get the registry entries that missed. The parent unlinks each block once its unit is
+# done. Per-indicator timings measured in the workers are merged back into
+# the parent's indicator table.
+#
+# The IPC stream is written straight into the block and read straight out of
+# it (no intermediate bytes copies), and at most 2 × workers blocks exist at
+# a time: submit() waits for a running unit to finish before allocating more,
+# so a fast fetch cannot pile up shared memory ahead of slow workers.
+
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+
+
+def _write_shared(bars: pd.DataFrame) -> shared_memory.SharedMemory:
+    """Serialise `bars` (index and dtypes preserved) into a new shared-memory block."""
+    table = pa.Table.from_pandas(bars, preserve_index=True)
+    sizer = pa.MockOutputStream()
+    with pa.ipc.new_stream(sizer, table.schema) as writer:
+        writer.write_table(table)
+    shm = shared_memory.SharedMemory(create=True, size=max(sizer.size(), 1))
+    try:
+        sink = pa.FixedSizeBufferWriter(pa.py_buffer(shm.buf))
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        sink.close()
+        del sink
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    return shm
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)      # Python ≥ 3.13
+    except TypeError:
+        # Older Pythons register the block again, but spawned workers share the
+        # parent's resource tracker, so that is a no-op; the parent unlinks it
+        return shared_memory.SharedMemory(name=name)
+
+
+def _read_shared(name: str, size: int) -> pd.DataFrame:
+    shm = _attach(name)
+    try:
+        # Arrow reads the record batches in place; to_pandas() is the only copy.
+        # Every Arrow view of the block is dropped before close()
+        table = pa.ipc.open_stream(pa.py_buffer(shm.buf[:size])).read_all()
+        bars = table.to_pandas()
+        del table
+    finally:
+        shm.close()
+    return bars
+
+
+def _compute_unit(shm_name: str, size: int, tf: str, names: list, passthroughs):
+    """Worker entry point: _compute_values() plus the indicator timings it produced."""
+    from indicators.build_snapshots import _compute_values
+    from indicators.indicator_table import get_indicator_table
+
+    table = get_indicator_table()
+    before = {s.name: (s.calls, s.errors, s.seconds) for s in table}
+    computed = _compute_values(_read_shared(shm_name, size), tf, names, passthroughs)
+    timings = {
+        s.name: (s.calls - before[s.name][0], s.errors - before[s.name][1], s.seconds - before[s.name][2])
+        for s in table
+    }
+    return computed, timings
+
+
+class ComputePool:
+    """
+    ProcessPoolExecutor for snapshot rows.
+
+        with ComputePool(8) as pool:
+            future = pool.submit(raw_df, "1d", ["RSI", "MACD"], {"VOLUME"})
+            per_entry, failed, passthrough_values = pool.result(future)
+
+    submit() blocks while `max_in_flight` units (default 2 × workers) hold a
+    shared-memory block.
+    """
+
+    def __init__(self, workers: int, max_in_flight: Optional[int] = None):
+        self.workers = workers
+        self.max_in_flight = max_in_flight or 2 * workers
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._executor = None
+
+    def __enter__(self) -> "ComputePool":
+        # spawn: workers must not inherit the fetch engine's threads and locks
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def submit(self, bars: pd.DataFrame, tf: str, names: list, passthroughs) -> Future:
+        self._slots.acquire()
+        try:
+            shm = _write_shared(bars)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        def release(_):
+            shm.close()
+            shm.unlink()
+            self._slots.release()
+
+        try:
+            future = self._executor.submit(_compute_unit, shm.name, shm.size, tf, names, passthroughs)
+        except BaseException:
+            release(None)
+            raise
+        future.add_done_callback(release)
+        return future
+
+    @staticmethod
+    def result(future: Future) -> tuple:
+        """The unit's _compute_values() result; worker timings are added to this process's indicator table."""
+        from indicators.indicator_table import get_indicator_table
+
+        computed, timings = future.result()
+        table = get_indicator_table()
+        for name, (calls, errors, seconds) in timings.items():
+            if name in table:
+                spec = table[name]
+                spec.calls += calls
+                spec.errors += errors
+                spec.seconds += seconds
+        return computed
@@ -0,0 +1,19 @@
+# === periods.py ===
+#
+# yfinance-style look-back strings ("60d", "1y", "2m" …) → UTC start dates.
+# Shared by the fetch layer and anything that needs to slice bars to a period.
+
+import re
+from datetime import datetime, timezone, timedelta
+
+_PERIOD_RE = re.compile(r"(?P<num>\d+)(?P<unit>[dmwy])")
+_UNIT_TO_DAYS = {"d":1, "w":7, "m":30, "y":365}      # rough is fine for look-backs
+
+def period_to_timedelta(period: str) -> timedelta:
+    m = _PERIOD_RE.fullmatch(period)
+    if not m:
+        raise ValueError(f"Unsupported period {period!r}")
+    return timedelta(days=int(m["num"]) * _UNIT_TO_DAYS[m["unit"]])
+
+def period_to_start(period: str) -> datetime:
+    return datetime.now(timezone.utc) - period_to_timedelta(period)
@@ -1,20 +1,86 @@
-from scipy.stats import linregress
 import pandas as pd
 import numpy as np
-from config.config import INDICATOR_ENHANCERS  
+from numpy.lib.stride_tricks import sliding_window_view
+from config.config import INDICATOR_ENHANCERS
+
+# ========== Block Kernels ==========
+# NumPy versions of the helpers below. Each takes a 2-D float64 block
+# (rows × columns, one column per indicator) and returns a block of the same
+# shape, so apply_derived_features() can run one enhancer over every column at
+# once. Rolling windows follow pandas' default min_periods=window: a window
+# with any NaN gives NaN. rolling_slope() (below) takes a block directly.
+
+def as_block(data) -> np.ndarray:
+    """Series / DataFrame / array → 2-D float64 block (a 1-D input becomes one column)."""
+    if isinstance(data, (pd.Series, pd.DataFrame)):
+        data = data.to_numpy(dtype="float64", na_value=np.nan)
+    block = np.asarray(data, dtype="float64")
+    return block.reshape(len(block), -1)
+
+def _rolling_windows(block: np.ndarray, window: int) -> np.ndarray:
+    """(rows - window + 1, columns, window) view of every complete window."""
+    return sliding_window_view(block, window, axis=0)
+
+def _rolling(block: np.ndarray, window: int, reduce) -> np.ndarray:
+    out = np.full(block.shape, np.nan)
+    if 0 < window <= len(block):
+        out[window - 1:] = reduce(_rolling_windows(block, window))
+    return out
+
+def _window_sum(block: np.ndarray, window: int) -> np.ndarray:
+    """Rolling sum via sliding windows (NaN propagates like pandas)."""
+    return _rolling(block, window, lambda w: w.sum(axis=-1))
+
+def diff_block(block: np.ndarray, n: int = 1) -> np.ndarray:
+    out = np.full(block.shape, np.nan)
+    if 0 < n < len(block):
+        out[n:] = block[n:] - block[:-n]
+    return out
+
+def rolling_mean_block(block: np.ndarray, window: int = 3) -> np.ndarray:
+    return _rolling(block, window, lambda w: w.mean(axis=-1))
+
+def rolling_std_block(block: np.ndarray, window: int = 5) -> np.ndarray:
+    return _rolling(block, window, lambda w: w.std(axis=-1, ddof=1))
+
+def pct_change_block(block: np.ndarray) -> np.ndarray:
+    out = np.full(block.shape, np.nan)
+    if len(block) > 1:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[1:] = block[1:] / block[:-1] - 1
+    return out
+
+def z_score_block(block: np.ndarray) -> np.ndarray:
+    """Column-wise z-score (NaNs skipped, sample std – as Series.mean() / .std())."""
+    valid = (~np.isnan(block)).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(valid > 0, np.nansum(block, axis=0) / valid, np.nan)
+        dev = np.where(np.isnan(block), 0.0, block - mean)
+        std = np.where(valid > 1, np.sqrt((dev * dev).sum(axis=0) / (valid - 1)), np.nan)
+        return (block - mean) / std
+
+def vwap_block(high, low, close, volume, window: int = 20) -> np.ndarray:
+    price = (as_block(high) + as_block(low) + as_block(close)) / 3
+    volume = as_block(volume)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return _window_sum(price * volume, window) / _window_sum(volume, window)
+
+def _series(block: np.ndarray, like: pd.Series) -> pd.Series:
+    return pd.Series(block[:, 0], index=like.index, name=like.name)
 
 # ========== Helper Functions for Indicator Analysis ==========
 
 def slope_diff(series: pd.Series, n: int = 1) -> pd.Series:
     """Compute simple n-period difference (impulse)."""
-    return series.diff(n)
+    return _series(diff_block(as_block(series), n), series)
 
 def smooth_series(series: pd.Series, n: int = 3) -> pd.Series:
     """Smooth a series with a rolling mean."""
-    return series.rolling(n).mean()
+    return _series(rolling_mean_block(as_block(series), n), series)
 
 def true_trend(series: pd.Series, window: int = 20) -> float:
     """Calculate the slope of the linear regression line."""
+    from scipy.stats import linregress      # deferred: scipy.stats costs ~1s to import
     if len(series.dropna()) < window:
         return np.nan
     y = series.dropna().iloc[-window:]
@@ -22,34 +88,61 @@ def true_trend(series: pd.Series, window: int = 20) -> float:
     slope, _, _, _, _ = linregress(x, y)
     return slope
 
+def rolling_slope(series, window: int = 20):
+    """
+    Rolling linear-regression slope – same values as
+    series.rolling(window).apply(true_trend, raw=False), in O(n) from cumulative sums.
+    A window containing any NaN gives NaN. A 2-D block (rows × indicators) gets
+    a slope per column and comes back as a block.
+    """
+    y = as_block(series)
+    out = np.full(y.shape, np.nan)
+    if window >= 2 and len(y) >= window:
+        missing = np.isnan(y)
+        count = (~missing).sum(axis=0)
+        center = np.where(missing, 0.0, y).sum(axis=0) / np.maximum(count, 1)   # column mean (0 if all NaN)
+        y = np.where(missing, 0.0, y - center)      # slope is shift-invariant; keeps the sums small
+        i = np.arange(len(y), dtype="float64")[:, None]
+
+        def window_sum(v):
+            c = np.concatenate((np.zeros((1, v.shape[1])), np.cumsum(v, axis=0)))
+            return c[window:] - c[:-window]
+
+        n_missing = window_sum(missing.astype("float64"))
+        sum_y = window_sum(y)
+        sum_iy = window_sum(i * y)
 
+        # x = 0..window-1 within each window: Σ(x - x̄)y = Σ i·y - (start + x̄)·Σy
+        start = i[: len(y) - window + 1]
+        x_mean = (window - 1) / 2
+        sxx = window * (window * window - 1) / 12
+        slope = (sum_iy - (start + x_mean) * sum_y) / sxx
+        out[window - 1:] = np.where(n_missing > 0, np.nan, slope)
+    return _series(out, series) if isinstance(series, pd.Series) else out
 
 def velocity_rank(series: pd.Series) -> pd.Series:
     """Measure percentage change as velocity ranking."""
-    return series.pct_change()
+    return _series(pct_change_block(as_block(series)), series)
 
 def signal_noise(series: pd.Series, window: int = 5) -> pd.Series:
     """Measure standard deviation over a rolling window."""
-    return series.rolling(window).std()
+    return _series(rolling_std_block(as_block(series), window), series)
 
 def z_score(series: pd.Series) -> pd.Series:
     """Compute the Z-score for cross-ticker comparison."""
-    mean = series.mean()
-    std = series.std()
-    return (series - mean) / std
+    return _series(z_score_block(as_block(series)), series)
 
 def vwap_distance_z_score(close: pd.Series, vwap: pd.Series, window: int = 20) -> pd.Series:
     """Z-score of the distance between Close and VWAP over a rolling window."""
-    dist = close - vwap
-    mean = dist.rolling(window).mean()
-    std = dist.rolling(window).std()
-    return (dist - mean) / std
+    dist = as_block(close) - as_block(vwap)
+    mean = rolling_mean_block(dist, window)
+    std = rolling_std_block(dist, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return pd.Series(((dist - mean) / std)[:, 0], index=close.index)
 
 def series_vwap(high, low, close, volume, window=20):
     """Rolling VWAP over the specified window (default 20)."""
-    price = (high + low + close) / 3
-    vwap = (price * volume).rolling(window=window).sum() / volume.rolling(window=window).sum()
-    return vwap
+    return pd.Series(vwap_block(high, low, close, volume, window)[:, 0], index=close.index)
 
 def add_sumZZ(df: pd.DataFrame, label: str, out_col=None):
     """
@@ -0,0 +1,131 @@
+# === resample_bars.py ===
+#
+# Derive higher timeframes locally from a base OHLCV series so only the base
+# (5m intraday, 1d daily-and-above) has to be fetched:
+#
+#   1h  ← 5m   regular-session buckets anchored at the 09:30 ET open
+#              (09:30–10:30, …, 15:30–16:00); pre/post-market bars dropped
+#   1wk ← 1d   Monday–Friday trading weeks
+#   1mo ← 1d   calendar months
+#
+# Aggregation is the usual OHLCV rule: first Open, max High, min Low,
+# last Close, summed Volume. Each derived bar is stamped with the timestamp
+# of its first base bar, and the output has the same columns and index name
+# as fetch_ticker_data(), so it feeds compute_indicators() unchanged.
+
+import pandas as pd
+
+from config.config import DERIVED_TIMEFRAME_BASES, INTERVAL_PERIOD_MAP
+from indicators import compact
+from indicators.periods import period_to_start, period_to_timedelta
+
+MARKET_TZ = "America/New_York"
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=30)
+SESSION_CLOSE = pd.Timedelta(hours=16)
+
+OHLCV_AGG = {
+    "Open":   "first",
+    "High":   "max",
+    "Low":    "min",
+    "Close":  "last",
+    "Volume": "sum",
+}
+
+
+def _aggregate(bars: pd.DataFrame, keys) -> pd.DataFrame:
+    """Group bars by `keys` and stamp each group with its first bar's timestamp."""
+    grouped = bars.assign(_first_ts=bars.index).groupby(keys, sort=True)
+    out = grouped.agg({**OHLCV_AGG, "_first_ts": "first"})
+    out = out.set_index("_first_ts")
+    out.index.name = "Date"
+    return out[list(OHLCV_AGG)]
+
+
+def resample_ohlcv(bars: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """Resample base bars (tz-aware index) to `interval` ("1h", "1wk" or "1mo")."""
+    if bars.empty:
+        return bars
+
+    local = bars.index.tz_convert(MARKET_TZ)
+    midnight = local.normalize()
+
+    if interval in ("1h", "60m"):
+        since_midnight = local - midnight
+        in_session = (since_midnight >= SESSION_OPEN) & (since_midnight < SESSION_CLOSE)
+        bars, local, midnight = bars[in_session], local[in_session], midnight[in_session]
+        hour_slot = (local - midnight - SESSION_OPEN) // pd.Timedelta(hours=1)
+        bucket = midnight + SESSION_OPEN + pd.to_timedelta(hour_slot, unit="h")
+        return _aggregate(bars, bucket)
+
+    naive_days = midnight.tz_localize(None)
+    if interval == "1wk":
+        return _aggregate(bars, naive_days.to_period("W"))
+    if interval == "1mo":
+        return _aggregate(bars, naive_days.to_period("M"))
+
+    raise ValueError(f"Cannot derive interval {interval} locally")
+
+
+class DerivedTimeframeFetcher:
+    """
+    Fetch-function wrapper that pulls only base series and resamples the
+    timeframes listed in DERIVED_TIMEFRAME_BASES.
+
+    Base series are always requested with the widest look-back any of the
+    run's timeframes needs, so the fetch layer's BAR_CACHE pulls each
+    (ticker, base) once and serves the rest of the run from memory. Usable both
+    as `fetch_function` and, via `fetch_many`, as `batch_fetch_function` for
+    build_full_snapshot().
+    """
+
+    def __init__(self, fetch_function, batch_fetch_function=None, timeframes=None):
+        self.fetch_function = fetch_function
+        self.batch_fetch_function = batch_fetch_function
+
+        # Widest period needed for each base series across the run's timeframes
+        self.base_periods = {}
+        for tf in timeframes or INTERVAL_PERIOD_MAP:
+            base = DERIVED_TIMEFRAME_BASES.get(tf, tf)
+            period = INTERVAL_PERIOD_MAP.get(tf, "60d")
+            current = self.base_periods.get(base)
+            if current is None or period_to_timedelta(period) > period_to_timedelta(current):
+                self.base_periods[base] = period
+
+    def _base_period(self, base: str, period: str) -> str:
+        widest = self.base_periods.get(base, period)
+        return max(widest, period, key=period_to_timedelta)
+
+    def _finish(self, bars: pd.DataFrame, interval: str, period: str) -> pd.DataFrame:
+        from indicators.data_providers import get_provider
+
+        # Cut the wider base window the way the provider cuts look-backs (offline data ends in the past)
+        bars = get_provider().window(bars, period_to_start(period))
+        if interval in DERIVED_TIMEFRAME_BASES:
+            bars = resample_ohlcv(bars, interval)
+        return bars
+
+    def _derive(self, ticker: str, bars: pd.DataFrame, interval: str, period: str) -> pd.DataFrame:
+        base = DERIVED_TIMEFRAME_BASES.get(interval, interval)
+        if base != interval and compact.is_enabled():
+            # Derive the float64 reference alongside, for the --compact accuracy check
+            reference = compact.reference_bars(ticker, base)
+            if reference is not None:
+                compact.keep_reference(ticker, interval, self._finish(reference, interval, period))
+        return self._finish(bars, interval, period)
+
+    def __call__(self, ticker: str, interval: str, period: str = "60d") -> pd.DataFrame:
+        base = DERIVED_TIMEFRAME_BASES.get(interval, interval)
+        bars = self.fetch_function(ticker, interval=base, period=self._base_period(base, period))
+        return self._derive(ticker, bars, interval, period)
+
+    def fetch_many(self, tickers: list[str], interval: str, period: str = "60d") -> dict[str, pd.DataFrame]:
+        if self.batch_fetch_function is None:
+            raise ValueError("No batch fetch function configured")
+        base = DERIVED_TIMEFRAME_BASES.get(interval, interval)
+        fetched = self.batch_fetch_function(
+            tickers, interval=base, period=self._base_period(base, period)
+        )
+        return {
+            ticker: self._derive(ticker, bars, interval, period)
+            for ticker, bars in fetched.items()
+        }
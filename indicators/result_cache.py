@@ -0,0 +1,291 @@
+# === result_cache.py ===
+#
+# Persistent, content-addressed cache of indicator and enhancer results.
+#
+# Keys are hashes of what a result depends on; changed inputs hash to a new
+# key and old entries age out:
+#
+#   indicator  blake2b(bars) + blake2b(registry entry)   → {column: last-row value}
+#              bars  = the (ticker, timeframe) OHLCV series: index, dtypes, values
+#              entry = columns, params, output label and code_digest(func)
+#   enhancer   blake2b(enhancer, code_digest(func), label, input column) → output column
+#
+# code_digest() hashes the function's source (bytecode when there is none),
+# the source of every repo function it reaches by global name, and the
+# versions of numpy, pandas and any third-party package it comes from
+# (pandas_ta, ...). So editing an indicator or one of its helpers, or
+# upgrading a library, invalidates its entries. What it cannot see:
+# functions reached another way (getattr, methods on objects passed in,
+# module-level state read at call time) – bump CACHE_VERSION when changing
+# those.
+#
+# The bars hash covers the whole series, including the still-forming last
+# bar – and during market hours every timeframe has one: the current 5m, 1h,
+# 1d, 1wk and 1mo bars all change with each trade. So hits only happen when a
+# (ticker, timeframe) series is unchanged since the run that stored it: after
+# the close, on offline providers, or when only the registry / enhancer
+# configuration changed. An intraday run gets close to no hits.
+#
+# Each registry entry is cached on its own, so editing one entry (say RSI's
+# length) recomputes only the columns that depend on it. Entries live in one
+# SQLite file; total payload is bounded by RESULT_CACHE_MAX_BYTES with
+# least-recently-used eviction.
+
+import hashlib
+import importlib.metadata
+import inspect
+import json
+import pickle
+import sqlite3
+import sys
+import time
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.config import RESULT_CACHE_ENABLED, RESULT_CACHE_MAX_BYTES, RESULT_CACHE_PATH
+
+CACHE_VERSION = 1           # bump when cached value semantics change
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+# Under the repo's data/ – not the cwd – unless main.py points it at the run's output directory
+DEFAULT_PATH = REPO_ROOT / "data" / RESULT_CACHE_PATH
+BASE_LIBRARIES = ("numpy", "pandas")      # every cached value depends on these
+
+
+def _digest(*parts: bytes) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.hexdigest()
+
+
+def bars_digest(bars: pd.DataFrame) -> str:
+    """Hash of a bar series: index (as int64), column names, dtypes and values."""
+    parts = [np.ascontiguousarray(bars.index.asi8).tobytes()]
+    for col in bars.columns:
+        data = bars[col].to_numpy()
+        parts += [str(col).encode(), str(data.dtype).encode(), np.ascontiguousarray(data).tobytes()]
+    return _digest(*parts)
+
+
+@lru_cache(maxsize=None)
+def _library_version(package: str) -> str:
+    try:
+        return importlib.metadata.version(package)
+    except (importlib.metadata.PackageNotFoundError, ValueError):
+        return str(getattr(sys.modules.get(package), "__version__", None))
+
+
+def _is_repo_code(code) -> bool:
+    try:
+        return Path(code.co_filename).resolve().is_relative_to(REPO_ROOT)
+    except (OSError, ValueError):
+        return False
+
+
+def _is_local_package(package: str) -> bool:
+    return (REPO_ROOT / package).is_dir()
+
+
+def _global_names(code) -> set:
+    """Global names used by `code` and the functions / lambdas nested in it."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _global_names(const)
+    return names
+
+
+@lru_cache(maxsize=None)
+def code_digest(func) -> str:
+    """
+    Hash of what `func` computes with: its source, the source of the repo
+    functions it calls by global name (recursively), and library versions.
+    """
+    parts, packages, seen = [], set(BASE_LIBRARIES), set()
+
+    def visit(f) -> None:
+        if isinstance(f, partial):
+            parts.append(repr((f.args, sorted(f.keywords.items()))).encode())
+            f = f.func
+        f = inspect.unwrap(f)
+        packages.add((getattr(f, "__module__", None) or "").split(".")[0])
+        code = getattr(f, "__code__", None)
+        if code is None:                    # builtin / C function: its package version stands in
+            parts.append(getattr(f, "__qualname__", repr(f)).encode())
+            return
+        if code in seen:
+            return
+        seen.add(code)
+        try:
+            parts.append(inspect.getsource(f).encode())
+        except (OSError, TypeError):
+            parts.append(code.co_code + repr(code.co_consts).encode())
+        if not _is_repo_code(code):         # third-party internals are covered by the version
+            return
+        for name in sorted(_global_names(code)):
+            target = getattr(f, "__globals__", {}).get(name)
+            if callable(target) and not inspect.isclass(target):
+                visit(target)
+
+    visit(func)
+    packages.discard("")
+    versions = {p: _library_version(p) for p in sorted(packages) if p in sys.modules and not _is_local_package(p)}
+    return _digest(*parts, json.dumps(versions, sort_keys=True).encode())
+
+
+def entry_digest(spec, label: str) -> str:
+    """Hash of an indicator-table entry as configured (func code, columns, params) plus its label."""
+    config = {"source": spec.source, "code": code_digest(spec.func), "columns": list(spec.columns),
+              "params": spec.params, "label": label}
+    return _digest(json.dumps(config, sort_keys=True, default=str).encode(), str(CACHE_VERSION).encode())
+
+
+class ResultCache:
+    def __init__(self, path: str | Path = DEFAULT_PATH, max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = {"indicator": 0, "enhancer": 0}
+        self.misses = {"indicator": 0, "enhancer": 0}
+        self.evictions = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, kind TEXT NOT NULL, payload BLOB NOT NULL,"
+            " nbytes INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_lru ON results(last_used)")
+        self._db.commit()
+        self.bytes = self._db.execute("SELECT COALESCE(SUM(nbytes), 0) FROM results").fetchone()[0]
+
+    # ── low level ──
+    def _get_many(self, kind: str, keys: List[str]) -> Dict[str, object]:
+        found = {}
+        for i in range(0, len(keys), 500):                  # SQLite host-parameter limit
+            chunk = keys[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for key, payload in self._db.execute(
+                f"SELECT key, payload FROM results WHERE key IN ({marks})", chunk
+            ):
+                found[key] = pickle.loads(payload)
+        if found:
+            now = time.time()
+            self._db.executemany("UPDATE results SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+            self._db.commit()
+        self.hits[kind] += len(found)
+        self.misses[kind] += len(keys) - len(found)
+        return found
+
+    def _put_many(self, kind: str, items: Iterable[Tuple[str, object]]) -> None:
+        now = time.time()
+        rows = []
+        for key, value in items:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            rows.append((key, kind, payload, len(payload), now))
+        if not rows:
+            return
+        for key, _, _, _, _ in rows:
+            old = self._db.execute("SELECT nbytes FROM results WHERE key = ?", (key,)).fetchone()
+            if old is not None:
+                self.bytes -= old[0]
+        self._db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", rows)
+        self.bytes += sum(r[3] for r in rows)
+        self._evict()
+        self._db.commit()
+
+    def _evict(self) -> None:
+        while self.bytes > self.max_bytes:
+            batch = self._db.execute(
+                "SELECT key, nbytes FROM results ORDER BY last_used LIMIT 256"
+            ).fetchall()
+            if not batch:
+                self.bytes = 0
+                return
+            for key, nbytes in batch:
+                self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                self.bytes -= nbytes
+                self.evictions += 1
+                if self.bytes <= self.max_bytes:
+                    break
+
+    # ── indicators ──
+    def get_indicators(self, bars_key: str, specs: Dict[str, object], label: str) -> Dict[str, dict]:
+        """{entry name: cached last-row values} for the entries in `specs` ({name: IndicatorSpec}) found."""
+        keys = {name: f"i:{bars_key}:{entry_digest(spec, label)}" for name, spec in specs.items()}
+        found = self._get_many("indicator", list(keys.values()))
+        return {name: found[key] for name, key in keys.items() if key in found}
+
+    def put_indicators(self, bars_key: str, specs: Dict[str, object], label: str, values: Dict[str, dict]) -> None:
+        self._put_many("indicator", (
+            (f"i:{bars_key}:{entry_digest(specs[name], label)}", entry_values)
+            for name, entry_values in values.items() if name in specs
+        ))
+
+    # ── enhancers ──
+    @staticmethod
+    def enhancer_key(enhancer: str, func, label: str, column: np.ndarray) -> str:
+        """Key of `enhancer` (implemented by `func`) applied to one input column."""
+        column = np.ascontiguousarray(column)
+        return "e:" + _digest(enhancer.encode(), code_digest(func).encode(), label.encode(),
+                              str(column.dtype).encode(), column.tobytes(), str(CACHE_VERSION).encode())
+
+    def get_columns(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        return self._get_many("enhancer", keys)
+
+    def put_columns(self, columns: Dict[str, np.ndarray]) -> None:
+        self._put_many("enhancer", columns.items())
+
+    # ── housekeeping ──
+    def clear(self) -> None:
+        self._db.execute("DELETE FROM results")
+        self._db.commit()
+        self.bytes = 0
+
+    def close(self) -> None:
+        self._db.close()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "indicator_hits": self.hits["indicator"], "indicator_misses": self.misses["indicator"],
+            "enhancer_hits": self.hits["enhancer"], "enhancer_misses": self.misses["enhancer"],
+            "evictions": self.evictions, "bytes": self.bytes,
+        }
+
+
+_cache: Optional[ResultCache] = None
+_enabled = RESULT_CACHE_ENABLED
+_path = DEFAULT_PATH
+
+
+def disable() -> None:
+    """Turn the cache off for this process (`--no-result-cache`)."""
+    global _enabled
+    _enabled = False
+
+
+def set_path(path: str | Path) -> None:
+    """Open the shared cache at `path` from now on (main.py: <output-dir>/RESULT_CACHE_PATH)."""
+    global _cache, _path
+    path = Path(path)
+    if _cache is not None and _cache.path != path:
+        _cache.close()
+        _cache = None
+    _path = path
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """The shared cache, opened on first use; None when disabled."""
+    global _cache
+    if not _enabled:
+        return None
+    if _cache is None:
+        _cache = ResultCache(_path)
+    return _cache
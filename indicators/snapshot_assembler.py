@@ -0,0 +1,119 @@
+# === snapshot_assembler.py ===
+#
+# Columnar assembly of one timeframe's snapshot.
+#
+# Each ticker's last-row values are written straight into preallocated
+# per-column arrays (one slot per input ticker); the DataFrame is built once
+# in to_frame(), with Date / Time formatted in a single vectorized pass.
+# Failed tickers are explicit null rows (Ticker / Timeframe only), skipped
+# tickers are left out – the same rows and column order the per-ticker
+# pd.concat produced.
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+MARKET_TZ = "America/New_York"
+
+
+class SnapshotAssembler:
+    def __init__(self, tickers: Iterable[str], tf: str, epoch: bool = False):
+        self.tickers = list(tickers)
+        self.label = tf.upper()
+        self.epoch = epoch
+        self._pos = {t: i for i, t in enumerate(self.tickers)}
+        n = len(self.tickers)
+        self._present = np.zeros(n, dtype=bool)         # row is in the snapshot (ok or failed)
+        self._ts = np.zeros(n, dtype="int64")           # last bar, UTC nanoseconds
+        self._has_ts = np.zeros(n, dtype=bool)
+        self._columns: Dict[str, np.ndarray] = {}
+        self._filled: Dict[str, np.ndarray] = {}
+        self._first_seen: Dict[str, tuple] = {}         # column -> (row, position in row)
+
+    def __len__(self) -> int:
+        return int(self._present.sum())
+
+    # ── writers ──
+    def _slot(self, name: str, dtype: np.dtype) -> np.ndarray:
+        column = self._columns.get(name)
+        if column is None:
+            column = np.full(len(self.tickers), np.nan if dtype.kind == "f" else 0, dtype=dtype)
+            self._columns[name] = column
+            self._filled[name] = np.zeros(len(self.tickers), dtype=bool)
+        elif column.dtype != dtype:
+            promoted = np.result_type(column.dtype, dtype)
+            if promoted != column.dtype:
+                column = self._columns[name] = column.astype(promoted)
+        return column
+
+    def _see(self, name: str, row: int, position: int) -> None:
+        seen = self._first_seen.get(name)
+        if seen is None or row < seen[0]:
+            self._first_seen[name] = (row, position)
+
+    def add(self, ticker: str, values: Dict[str, object], timestamp: pd.Timestamp) -> None:
+        """One ticker's last-row values (column -> scalar) and its last bar time."""
+        i = self._pos[ticker]
+        self._present[i] = True
+        self._ts[i] = pd.Timestamp(timestamp).value
+        self._has_ts[i] = True
+        for position, (name, value) in enumerate(values.items()):
+            value = np.asarray(value)
+            self._slot(name, value.dtype)[i] = value
+            self._filled[name][i] = True
+            self._see(name, i, position)
+
+    def add_null(self, ticker: str) -> None:
+        """A failed ticker: a row with only Ticker / Timeframe."""
+        i = self._pos[ticker]
+        self._present[i] = True
+        self._has_ts[i] = False
+        for name, filled in self._filled.items():
+            if filled[i]:
+                filled[i] = False
+                if self._columns[name].dtype.kind == "f":
+                    self._columns[name][i] = np.nan
+
+    def add_frame(self, frame: pd.DataFrame) -> None:
+        """Rows for many tickers at once (Ticker + Epoch columns plus values, e.g. panel_snapshot)."""
+        rows = np.array([self._pos[t] for t in frame["Ticker"]], dtype="int64")
+        if not len(rows):
+            return
+        self._present[rows] = True
+        self._ts[rows] = frame["Epoch"].to_numpy(dtype="int64") * 10**9
+        self._has_ts[rows] = True
+        first = int(rows.min())
+        values = [c for c in frame.columns if c not in ("Ticker", "Timeframe", "Epoch", "Date", "Time")]
+        for position, name in enumerate(values):
+            data = frame[name].to_numpy()
+            self._slot(name, data.dtype)[rows] = data
+            self._filled[name][rows] = True
+            self._see(name, first, position)
+
+    # ── output ──
+    def to_frame(self) -> Optional[pd.DataFrame]:
+        """The snapshot in input ticker order, or None if no ticker produced a row."""
+        rows = np.flatnonzero(self._present)
+        if not len(rows):
+            return None
+        out = {
+            "Ticker": np.array(self.tickers, dtype=object)[rows],
+            "Timeframe": np.full(len(rows), self.label, dtype=object),
+        }
+        has_ts = self._has_ts[rows]
+        if self.epoch:
+            seconds = self._ts[rows] // 10**9
+            out["Epoch"] = seconds if has_ts.all() else np.where(has_ts, seconds, np.nan)
+        else:
+            local = pd.DatetimeIndex(self._ts[rows], tz="UTC").tz_convert(MARKET_TZ)
+            out["Date"] = np.where(has_ts, local.strftime("%m/%d/%y"), np.nan)
+            out["Time"] = np.where(has_ts, local.strftime("%H:%M"), np.nan)
+
+        # Column order = order of first appearance in ticker order, as pd.concat gives
+        for name in sorted(self._first_seen, key=self._first_seen.get):
+            column, filled = self._columns[name][rows], self._filled[name][rows]
+            if not filled.all() and column.dtype.kind != "f":
+                column = np.where(filled, column, np.nan)       # int / bool → float64 like concat
+            out[name] = column
+        return pd.DataFrame(out)
@@ -0,0 +1,293 @@
+# === stream_ingest.py ===
+#
+# Live bar ingestion over the Alpaca market-data websocket (v2 protocol).
+#
+#   auth / subscribe   {"action": "auth", …} then {"action": "subscribe", "bars": [...]}
+#   minute bars        {"T": "b", "S": symbol, "o", "h", "l", "c", "v", "t": bar start}
+#
+# MinuteBarAggregator rolls one-minute bars up into the streamed timeframes
+# using the regular-session buckets of resample_bars.py / market_calendar.py
+# (5m from 09:30, 1h 09:30–10:30 … 15:30–16:00; pre/post-market minutes are
+# dropped). A bucket closes when its last minute arrives, once the stream has
+# moved a full minute past its end (bars come in time order across symbols,
+# so a symbol that did not trade is not waited for), or – when the whole
+# stream goes quiet – `idle_seconds` of wall-clock time after its end. A
+# minute that is not newer than the symbol's latest one (late or repeated)
+# is dropped for every interval, so it can neither reopen a closed bucket
+# nor overwrite an open bucket's Close.
+#
+# StreamingSnapshots holds the per-(ticker, timeframe) state: the
+# IncrementalIndicatorEngine kernels plus a short bar tail for the
+# passthroughs. History is fetched once to warm it up; after that each
+# closed bar is an O(1) update and the snapshot rows are rebuilt from memory.
+#
+# A live connection that drops is re-opened with exponential backoff
+# (STREAM_RECONNECT_BASE_SECONDS doubling up to STREAM_RECONNECT_MAX_SECONDS),
+# re-authenticated and re-subscribed; the aggregator and state carry over.
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from config.config import (
+    INDICATOR_REGISTRY,
+    STREAM_IDLE_SECONDS,
+    STREAM_RECONNECT_BASE_SECONDS,
+    STREAM_RECONNECT_MAX_SECONDS,
+    STREAM_URL,
+)
+from data_processing.market_calendar import MARKET_TZ, session
+from indicators.column_planner import get_column_plan
+from indicators.compute_passthroughs import compute_passthroughs
+from indicators.incremental import KERNELS, IncrementalIndicatorEngine
+from indicators.snapshot_assembler import SnapshotAssembler
+
+logger = logging.getLogger(__name__)
+
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+MINUTE = pd.Timedelta(minutes=1)
+BUCKETS = {"5m": pd.Timedelta(minutes=5), "1h": pd.Timedelta(hours=1), "60m": pd.Timedelta(hours=1)}
+PASSTHROUGH_TAIL = 10           # bars kept for the passthroughs (5-bar averages + diff)
+
+
+@dataclass
+class ClosedBar:
+    symbol: str
+    interval: str
+    timestamp: pd.Timestamp     # bucket start (UTC), like the providers' bar stamps
+    bar: Dict[str, float]       # Open / High / Low / Close / Volume
+
+
+def parse_bar(message: dict) -> Tuple[str, pd.Timestamp, Dict[str, float]]:
+    """A {"T": "b", …} stream message → (symbol, minute start, OHLCV dict)."""
+    bar = {"Open": message["o"], "High": message["h"], "Low": message["l"],
+           "Close": message["c"], "Volume": message["v"]}
+    return message["S"], pd.Timestamp(message["t"]).tz_convert("UTC"), {k: float(v) for k, v in bar.items()}
+
+
+# ── Aggregation ────────────────────────────────────────────────────────────
+class MinuteBarAggregator:
+    def __init__(self, intervals: Iterable[str]):
+        unknown = [tf for tf in intervals if tf not in BUCKETS]
+        if unknown:
+            raise ValueError(f"Cannot stream interval(s) {', '.join(unknown)} (choose from {', '.join(BUCKETS)})")
+        self.intervals = list(intervals)
+        self._open: Dict[Tuple[str, str], list] = {}     # (symbol, interval) -> [start, end, bar]
+        self._sessions: Dict[object, Optional[Tuple[pd.Timestamp, pd.Timestamp]]] = {}
+        self._latest: Dict[str, pd.Timestamp] = {}       # symbol -> start of its newest minute
+        self.stream_time: Optional[pd.Timestamp] = None  # end of the latest minute seen
+
+    def _session(self, ts: pd.Timestamp) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        day = ts.tz_convert(MARKET_TZ).date()
+        if day not in self._sessions:
+            hours = session(day)
+            self._sessions[day] = None if hours is None else tuple(pd.Timestamp(t).tz_convert("UTC") for t in hours)
+        return self._sessions[day]
+
+    def bucket(self, interval: str, ts: pd.Timestamp) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """(start, end) of the session bucket holding minute `ts`, or None outside the session."""
+        hours = self._session(ts)
+        if hours is None or not hours[0] <= ts < hours[1]:
+            return None
+        step = BUCKETS[interval]
+        start = hours[0] + ((ts - hours[0]) // step) * step
+        return start, min(start + step, hours[1])
+
+    def add(self, symbol: str, ts: pd.Timestamp, bar: Dict[str, float]) -> List[ClosedBar]:
+        """Fold one minute bar in; returns the buckets it closed."""
+        latest = self._latest.get(symbol)
+        if latest is not None and ts <= latest:
+            return []                                           # late or repeated minute
+        self._latest[symbol] = ts
+        closed = []
+        minute_end = ts + MINUTE
+        if self.stream_time is None or minute_end > self.stream_time:
+            self.stream_time = minute_end
+        for interval in self.intervals:
+            bucket = self.bucket(interval, ts)
+            if bucket is None:
+                continue
+            key = (symbol, interval)
+            current = self._open.get(key)
+            if current is not None and current[0] != bucket[0]:
+                closed.append(self._close(key))
+                current = None
+            if current is None:
+                self._open[key] = [bucket[0], bucket[1], dict(bar)]
+            else:
+                agg = current[2]
+                agg["High"] = max(agg["High"], bar["High"])
+                agg["Low"] = min(agg["Low"], bar["Low"])
+                agg["Close"] = bar["Close"]
+                agg["Volume"] += bar["Volume"]
+            if minute_end >= bucket[1]:
+                closed.append(self._close(key))
+        return closed
+
+    def expire(self, now: pd.Timestamp) -> List[ClosedBar]:
+        """Close every open bucket that ended at or before `now`."""
+        return [self._close(key) for key, (_, end, _) in list(self._open.items()) if end <= now]
+
+    def _close(self, key: Tuple[str, str]) -> ClosedBar:
+        start, _, bar = self._open.pop(key)
+        return ClosedBar(key[0], key[1], start, bar)
+
+
+# ── Snapshot state ─────────────────────────────────────────────────────────
+class StreamingSnapshots:
+    """
+    Incrementally maintained snapshots for `timeframes`, in the columns and
+    row order build_full_snapshot() produces for the same plan.
+    """
+
+    def __init__(self, tickers: List[str], timeframes: List[str], plan=None):
+        self.tickers = list(tickers)
+        self.timeframes = [tf.lower() for tf in timeframes]
+        self.plan = plan or get_column_plan()
+        registry = {name: meta for name, meta in INDICATOR_REGISTRY.items() if name in self.plan.indicators}
+        self.engine = IncrementalIndicatorEngine(registry)
+        skipped = [n for n in self.plan.indicators if n not in registry or registry[n]["func"] not in KERNELS]
+        if skipped:
+            logger.warning(f"No streaming kernel for: {', '.join(skipped)} (left out of streamed snapshots)")
+        self._tails: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self._rows: Dict[str, Dict[str, Tuple[dict, pd.Timestamp]]] = {tf: {} for tf in self.timeframes}
+
+    def warm_up(self, ticker: str, interval: str, bars: pd.DataFrame) -> None:
+        bars = bars[OHLCV]
+        if bars.empty:
+            return
+        values = self.engine.warm_up(ticker, interval, bars)
+        self._tails[(ticker, interval)] = bars.iloc[-PASSTHROUGH_TAIL:]
+        self._store(ticker, interval, values)
+
+    def update(self, closed: ClosedBar) -> bool:
+        """Apply one closed bar; False if it is not newer than what the state already holds."""
+        key = (closed.symbol, closed.interval)
+        tail = self._tails.get(key)
+        if tail is not None and closed.timestamp <= tail.index[-1]:
+            return False
+        values = self.engine.update(closed.symbol, closed.interval, closed.bar, closed.timestamp)
+        row = pd.DataFrame([closed.bar], index=pd.DatetimeIndex([closed.timestamp], name="Date"))[OHLCV]
+        self._tails[key] = row if tail is None else pd.concat([tail, row]).iloc[-PASSTHROUGH_TAIL:]
+        self._store(closed.symbol, closed.interval, values)
+        return True
+
+    def _store(self, ticker: str, interval: str, values: dict) -> None:
+        tail = self._tails[(ticker, interval)]
+        layer = compute_passthroughs(tail, interval, self.plan.passthroughs)
+        values = {**values, **{col: layer[col].to_numpy()[-1] for col in layer.columns}}
+        self._rows[interval][ticker] = (values, tail.index[-1])
+
+    def snapshot(self, interval: str) -> Optional[pd.DataFrame]:
+        assembler = SnapshotAssembler(self.tickers, interval)
+        for ticker, (values, timestamp) in self._rows[interval].items():
+            assembler.add(ticker, values, timestamp)
+        return assembler.to_frame()
+
+
+# ── Websocket client ───────────────────────────────────────────────────────
+class StreamError(RuntimeError):
+    pass
+
+
+def _check(messages: List[dict], expected: str) -> None:
+    for message in messages:
+        if message.get("T") == "error":
+            raise StreamError(f"Stream error {message.get('code')}: {message.get('msg')}")
+        if message.get("T") == expected or message.get("msg") == expected:
+            return
+    raise StreamError(f"Expected {expected!r} from the stream, got {messages}")
+
+
+async def stream_snapshots(
+    state: StreamingSnapshots,
+    publish: Callable[[Dict[str, pd.DataFrame]], None],
+    url: str = STREAM_URL,
+    key: str = "",
+    secret: str = "",
+    idle_seconds: Optional[float] = STREAM_IDLE_SECONDS,
+    clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+    reconnect_base: float = STREAM_RECONNECT_BASE_SECONDS,
+    reconnect_max: float = STREAM_RECONNECT_MAX_SECONDS,
+) -> None:
+    """
+    Subscribe `state.tickers` to minute bars at `url` and call
+    `publish({label: snapshot})` for the timeframes each batch of messages
+    advanced.
+
+    A live stream runs until cancelled: a dropped connection is re-opened,
+    re-authenticated and re-subscribed after an exponential backoff, and the
+    buckets still open carry over. `idle_seconds=None` closes buckets on
+    stream time only (replays, whose bar times are not wall-clock times) and
+    ends when the server closes the connection.
+    """
+    from websockets.asyncio.client import connect
+    from websockets.exceptions import ConnectionClosedOK, WebSocketException
+
+    aggregator = MinuteBarAggregator(state.timeframes)
+    attempt = 0
+
+    def apply(closed: List[ClosedBar], received: float) -> None:
+        changed = {bar.interval for bar in closed if state.update(bar)}
+        if not changed:
+            return
+        snapshots = {tf.upper(): state.snapshot(tf) for tf in state.timeframes if tf in changed}
+        publish({label: df for label, df in snapshots.items() if df is not None})
+        logger.info(f"Streamed {', '.join(snapshots)} published {time.perf_counter() - received:.3f}s after the bar")
+
+    async def listen() -> None:
+        nonlocal attempt
+        async with connect(url) as ws:
+            _check(json.loads(await ws.recv()), "connected")
+            await ws.send(json.dumps({"action": "auth", "key": key, "secret": secret}))
+            _check(json.loads(await ws.recv()), "authenticated")
+            await ws.send(json.dumps({"action": "subscribe", "bars": state.tickers}))
+            _check(json.loads(await ws.recv()), "subscription")
+            logger.info(f"Subscribed to minute bars for {len(state.tickers)} tickers at {url}")
+            attempt = 0
+
+            while True:
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), timeout=1.0)
+                except TimeoutError:
+                    if idle_seconds is not None:
+                        apply(aggregator.expire(pd.Timestamp(clock()) - pd.Timedelta(seconds=idle_seconds)), time.perf_counter())
+                    continue
+                received = time.perf_counter()
+                closed = []
+                for message in json.loads(raw):
+                    if message.get("T") == "error":
+                        raise StreamError(f"Stream error {message.get('code')}: {message.get('msg')}")
+                    if message.get("T") == "b":
+                        closed += aggregator.add(*parse_bar(message))
+                if aggregator.stream_time is not None:
+                    closed += aggregator.expire(aggregator.stream_time - MINUTE)
+                apply(closed, received)
+
+    while True:
+        try:
+            await listen()
+        except ConnectionClosedOK:
+            if idle_seconds is None:
+                break
+            reason = "closed by the server"
+        except (WebSocketException, OSError) as exc:
+            if idle_seconds is None:
+                raise
+            reason = f"{type(exc).__name__}: {exc}"
+        # Minutes missed while disconnected close their buckets on stream time
+        # (or idle_seconds) once the feed resumes; repeated minutes are dropped
+        attempt += 1
+        delay = min(reconnect_max, reconnect_base * 2 ** (attempt - 1))
+        logger.warning(f"Stream connection lost ({reason}); reconnecting in {delay:.1f}s (attempt {attempt})")
+        await asyncio.sleep(delay)
+
+    # Whatever is still open when the stream ends is as complete as it will get
+    if aggregator.stream_time is not None:
+        apply(aggregator.expire(aggregator.stream_time + max(BUCKETS.values())), time.perf_counter())
@@ -0,0 +1,98 @@
+# === stream_replay.py ===
+#
+# Local stand-in for the Alpaca market-data websocket: speaks the same v2
+# handshake (connected → auth → subscribe) and replays recorded one-minute
+# bars to each subscriber, one message per minute with every subscribed
+# symbol's bar, at `speed`× real time (speed=None sends as fast as it can).
+#
+# Used by `main.py --stream-replay` to exercise the streaming path offline –
+# the provider's minute bars (replay files or synthetic) stand in for the
+# live feed, and the history before the replayed session warms the state up.
+
+import asyncio
+import json
+import logging
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from data_processing.market_calendar import MARKET_TZ, session
+
+logger = logging.getLogger(__name__)
+
+
+def last_session(bars: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Each symbol's minute bars inside the regular session of the latest day any symbol has bars for."""
+    stamps = [df.index[-1] for df in bars.values() if not df.empty]
+    if not stamps:
+        return {}
+    hours = None
+    day = max(stamps).tz_convert(MARKET_TZ).date()
+    for _ in range(10):                          # step back over weekends / holidays
+        hours = session(day)
+        if hours is not None:
+            open_, close = (pd.Timestamp(t) for t in hours)
+            window = {s: df[(df.index >= open_) & (df.index < close)] for s, df in bars.items()}
+            if any(not df.empty for df in window.values()):
+                return window
+        day = day - pd.Timedelta(days=1)
+    return {}
+
+
+class ReplayStreamServer:
+    def __init__(self, bars: Dict[str, pd.DataFrame], speed: Optional[float] = 60.0):
+        self.speed = speed
+        # {minute start: [bar message, …]} across all symbols, in time order
+        frames = []
+        for symbol, df in bars.items():
+            if df.empty:
+                continue
+            frames.append(pd.DataFrame({
+                "S": symbol,
+                "o": df["Open"].to_numpy(), "h": df["High"].to_numpy(), "l": df["Low"].to_numpy(),
+                "c": df["Close"].to_numpy(), "v": df["Volume"].to_numpy(),
+                "t": df.index.tz_convert("UTC"),
+            }))
+        merged = pd.concat(frames).sort_values("t", kind="stable") if frames else pd.DataFrame(columns=["t"])
+        self.minutes: List[pd.Timestamp] = []
+        self.messages: List[List[dict]] = []
+        for ts, group in merged.groupby("t", sort=True):
+            records = group.drop(columns="t").to_dict("records")
+            stamp = ts.strftime("%Y-%m-%dT%H:%M:%SZ")
+            self.minutes.append(ts)
+            self.messages.append([{"T": "b", **r, "t": stamp} for r in records])
+
+    @property
+    def start(self) -> Optional[pd.Timestamp]:
+        """First replayed minute – history before it is what a subscriber warms up on."""
+        return self.minutes[0] if self.minutes else None
+
+    async def _handler(self, ws) -> None:
+        await ws.send(json.dumps([{"T": "success", "msg": "connected"}]))
+        auth = json.loads(await ws.recv())
+        if auth.get("action") != "auth":
+            await ws.send(json.dumps([{"T": "error", "code": 401, "msg": "not authenticated"}]))
+            return
+        await ws.send(json.dumps([{"T": "success", "msg": "authenticated"}]))
+        request = json.loads(await ws.recv())
+        symbols = set(request.get("bars", []))
+        await ws.send(json.dumps([{"T": "subscription", "trades": [], "quotes": [], "bars": sorted(symbols)}]))
+
+        previous = None
+        for ts, messages in zip(self.minutes, self.messages):
+            batch = [m for m in messages if m["S"] in symbols]
+            if not batch:
+                continue
+            if self.speed and previous is not None:
+                await asyncio.sleep((ts - previous).total_seconds() / self.speed)
+            previous = ts
+            await ws.send(json.dumps(batch))
+        logger.info(f"Replay finished: {len(self.minutes)} minutes")
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 0):
+        """Start listening; returns (server, ws:// url). Port 0 picks a free port."""
+        from websockets.asyncio.server import serve
+
+        server = await serve(self._handler, host, port)
+        port = server.sockets[0].getsockname()[1]
+        return server, f"ws://{host}:{port}"
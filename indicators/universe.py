@@ -0,0 +1,189 @@
+# === universe.py ===
+#
+# Universe-scale runs (`main.py --universe-file IWM_holdings.csv`).
+#
+# Tickers are streamed through fetch → indicators → last-row extraction in
+# fixed-size chunks. After each chunk its snapshot rows are checkpointed to
+# Parquet and the chunk's bars are dropped from BAR_CACHE, so peak memory is
+# bounded by the chunk size rather than the universe size. Only the per-ticker
+# last rows are gathered; cross-sectional steps (z_score, add_sumZZ, …) run
+# on the gathered snapshots once every chunk is done. When the caller asks
+# for `closes`, each chunk's Close columns are kept too, read from BAR_CACHE
+# before it is dropped, so the pair correlations need no second fetch.
+#
+# Checkpoints: <checkpoint_dir>/chunk_<n>_<LABEL>.parquet plus a
+# chunk_<n>.json manifest written last. With resume=True a chunk whose
+# manifest matches its tickers, timeframes and compact mode is loaded
+# instead of rebuilt.
+
+import csv
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from config.config import (
+    COMPUTE_WORKERS,
+    INDICATOR_ENGINE,
+    INTERVAL_PERIOD_MAP,
+    UNIVERSE_ASSET_CLASSES,
+    UNIVERSE_CHECKPOINT_DIR,
+    UNIVERSE_CHUNK_SIZE,
+)
+from indicators import compact
+from indicators.bar_cache import BAR_CACHE
+from indicators.build_snapshots import build_full_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Under the repo's data/ – not the cwd – unless main.py points it at the run's output directory
+DEFAULT_CHECKPOINT_DIR = Path(__file__).resolve().parents[1] / "data" / UNIVERSE_CHECKPOINT_DIR
+
+
+def load_universe(path: str | Path, asset_classes=UNIVERSE_ASSET_CLASSES) -> List[str]:
+    """
+    Tickers from an iShares-style holdings CSV (preamble lines, a header row
+    starting with "Ticker", holdings, then a disclaimer footer).
+
+    Only rows whose "Asset Class" is in `asset_classes` are kept; placeholder
+    tickers ("-") are dropped and duplicates removed, keeping file order.
+    """
+    tickers = []
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        reader = csv.reader(fh)
+        header = None
+        for row in reader:
+            if header is None:
+                if row and row[0].strip() == "Ticker":
+                    header = [c.strip() for c in row]
+                continue
+            if not row or not row[0].strip():
+                break                                   # blank line → end of holdings
+            record = dict(zip(header, row))
+            ticker = record["Ticker"].strip().upper()
+            if "Asset Class" in record and record["Asset Class"].strip() not in asset_classes:
+                continue
+            if ticker and ticker != "-":
+                tickers.append(ticker)
+
+    if header is None:
+        raise ValueError(f"No 'Ticker' header row found in {path}")
+    return list(dict.fromkeys(tickers))
+
+
+# ── Checkpoints ────────────────────────────────────────────────────────────
+def _manifest_path(checkpoint_dir: Path, n: int) -> Path:
+    return checkpoint_dir / f"chunk_{n:04d}.json"
+
+
+def _frame_path(checkpoint_dir: Path, n: int, label: str) -> Path:
+    return checkpoint_dir / f"chunk_{n:04d}_{label}.parquet"
+
+
+def _load_checkpoint(checkpoint_dir: Path, n: int, chunk: List[str], timeframes: List[str]):
+    """Snapshots saved for chunk `n`, or None if missing or built for other inputs."""
+    manifest = _manifest_path(checkpoint_dir, n)
+    if not manifest.exists():
+        return None
+    meta = json.loads(manifest.read_text())
+    if (meta.get("tickers"), meta.get("timeframes"), meta.get("compact")) != (chunk, timeframes, compact.is_enabled()):
+        return None
+    return {label: pd.read_parquet(_frame_path(checkpoint_dir, n, label)) for label in meta["labels"]}
+
+
+def _save_checkpoint(checkpoint_dir: Path, n: int, chunk: List[str], timeframes: List[str], snapshots) -> None:
+    for label, df in snapshots.items():
+        path = _frame_path(checkpoint_dir, n, label)
+        tmp = path.with_suffix(".tmp")
+        df.to_parquet(tmp)
+        os.replace(tmp, path)
+    # Manifest last: a chunk only counts as done once all its frames are on disk
+    meta = {"tickers": chunk, "timeframes": timeframes, "compact": compact.is_enabled(), "labels": list(snapshots)}
+    tmp = _manifest_path(checkpoint_dir, n).with_suffix(".tmp")
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, _manifest_path(checkpoint_dir, n))
+
+
+def clear_checkpoints(checkpoint_dir: str | Path = DEFAULT_CHECKPOINT_DIR) -> None:
+    for path in Path(checkpoint_dir).glob("chunk_*"):
+        path.unlink()
+
+
+# ── Chunked build ──────────────────────────────────────────────────────────
+def _keep_closes(closes, chunk: List[str], timeframes: List[str], fetch_function, batch_fetch_function) -> None:
+    """Add the chunk's Close-only bars to `closes` ({label: {ticker: frame}}); BAR_CACHE hits after a build."""
+    for tf in timeframes:
+        period = INTERVAL_PERIOD_MAP.get(tf, "60d")
+        if batch_fetch_function is not None:
+            bars = batch_fetch_function(chunk, interval=tf, period=period)
+        else:
+            bars = {ticker: fetch_function(ticker, interval=tf, period=period) for ticker in chunk}
+        kept = closes.setdefault(tf.upper(), {})
+        for ticker, df in bars.items():
+            if df is not None and not df.empty:
+                kept[ticker] = df[["Close"]]
+
+
+def build_universe_snapshots(
+    tickers: List[str],
+    timeframes: List[str],
+    fetch_function,
+    batch_fetch_function=None,
+    engine=None,
+    indicator_engine: str = INDICATOR_ENGINE,
+    workers: int = COMPUTE_WORKERS,
+    chunk_size: int = UNIVERSE_CHUNK_SIZE,
+    checkpoint_dir: str | Path = DEFAULT_CHECKPOINT_DIR,
+    resume: bool = False,
+    closes: Optional[Dict[str, Dict[str, pd.DataFrame]]] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    build_full_snapshot() over `tickers` in chunks of `chunk_size`.
+
+    Returns the same {label: snapshot} dict, rows in input ticker order.
+    Without `resume`, checkpoints left by an earlier run are cleared first.
+    A `closes` dict is filled with {label: {ticker: Close-only bars}}
+    (chunks restored from a checkpoint fetch theirs).
+    """
+    checkpoint_dir = Path(checkpoint_dir)
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    if not resume:
+        clear_checkpoints(checkpoint_dir)
+
+    chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+    gathered: Dict[str, List[pd.DataFrame]] = {}
+
+    for n, chunk in enumerate(chunks):
+        snapshots = _load_checkpoint(checkpoint_dir, n, chunk, timeframes) if resume else None
+        if snapshots is not None:
+            print(f"⏩ Chunk {n + 1}/{len(chunks)} restored from checkpoint ({len(chunk)} tickers)")
+        else:
+            print(f"📦 Chunk {n + 1}/{len(chunks)}: {len(chunk)} tickers")
+            snapshots = build_full_snapshot(
+                chunk, timeframes, fetch_function,
+                batch_fetch_function=batch_fetch_function,
+                engine=engine,
+                indicator_engine=indicator_engine,
+                workers=workers,
+            )
+            _save_checkpoint(checkpoint_dir, n, chunk, timeframes, snapshots)
+        if closes is not None:
+            _keep_closes(closes, chunk, timeframes, fetch_function, batch_fetch_function)
+        BAR_CACHE.invalidate()                  # this chunk's bars are no longer needed
+
+        for label, df in snapshots.items():
+            gathered.setdefault(label, []).append(df)
+        compact.log_memory(f"chunk {n + 1}/{len(chunks)}")
+
+    snapshots = {}
+    for tf in timeframes:
+        label = tf.upper()
+        if label not in gathered:
+            continue
+        df = pd.concat(gathered.pop(label), ignore_index=True)
+        snapshots[label] = compact.compact_snapshot(df) if compact.is_enabled() else df
+        print(f"✅ {label} universe snapshot gathered with {len(df)} rows")
+    return snapshots
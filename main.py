@@ -1,25 +1,32 @@
 #!/usr/bin/env python3
 """
 SignalCraft - Market Analysis and Indicator Processing Pipeline
+
+Heavy dependencies (pandas, pandas_ta, API clients) are imported inside the
+functions that use them, so `--help` and argument errors return instantly.
+Run with `--import-profile` to see what each module costs to import.
 """
 
-import pandas as pd
+from __future__ import annotations
+
 import os
 import argparse
 import logging
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, TYPE_CHECKING
+
+# Import configuration (plain Python – cheap)
+from config.config import (
+    tickers as default_tickers, SR_tickers, BASE_FEATURES,
+    FETCH_REQUESTS_PER_MINUTE, FETCH_MAX_CONCURRENCY, INTERVAL_PERIOD_MAP,
+    DATA_PROVIDER, DATA_PROVIDERS, REPLAY_DATA_DIR, SYNTHETIC_BARS, SYNTHETIC_SEED, SYNTHETIC_TICKERS,
+    UNIVERSE_CHUNK_SIZE, INDICATOR_ENGINE, COMPUTE_WORKERS, DERIVED_TIMEFRAME_BASES,
+    STREAM_URL, STREAM_TIMEFRAMES, STREAM_REPLAY_SPEED, CORRELATION_MAX_TICKERS,
+    BAR_STORE_DIR, RESULT_CACHE_PATH, UNIVERSE_CHECKPOINT_DIR, BACKFILL_DIR,
+)
 
-# Import configuration
-from config.config import tickers as default_tickers, SR_tickers, BASE_FEATURES
-from indicators.fetch_data import fetch_ticker_data
-from indicators.post_indicator_proccessing_functions import add_sumZZ, true_trend
-from analysis.summary import summarize_top_bottom_indicators
-from indicators.enhance_indicators import apply_derived_features
-from indicators.compute_passthroughs import compute_passthroughs
-from indicators.build_snapshots import build_full_snapshot
-from stockrover.extract_tickers import extract_tickers_from_pdf
-from data_processing.archive_utils import archive_good_enough_files
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Configure logging
 logging.basicConfig(
@@ -72,12 +79,190 @@ def parse_arguments() -> argparse.Namespace:
         help=f'Output directory for data files (default: {DATA_DIR})'
     )
     
+    parser.add_argument(
+        '--provider',
+        choices=DATA_PROVIDERS,
+        default=DATA_PROVIDER,
+        help=f'OHLCV data source (default: {DATA_PROVIDER}); replay/synthetic need no network'
+    )
+    
+    parser.add_argument(
+        '--replay-dir',
+        type=str,
+        default=REPLAY_DATA_DIR,
+        help=f'Recorded bars for --provider replay (default: {REPLAY_DATA_DIR})'
+    )
+    
+    parser.add_argument(
+        '--synthetic-tickers',
+        type=int,
+        default=SYNTHETIC_TICKERS,
+        help=f'Ticker count for --provider synthetic when -t is not given (default: {SYNTHETIC_TICKERS})'
+    )
+    
+    parser.add_argument(
+        '--synthetic-bars',
+        type=int,
+        default=SYNTHETIC_BARS,
+        help=f'Bars per ticker and timeframe for --provider synthetic (default: {SYNTHETIC_BARS})'
+    )
+    
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=SYNTHETIC_SEED,
+        help=f'Random seed for --provider synthetic (default: {SYNTHETIC_SEED})'
+    )
+    
+    parser.add_argument(
+        '--derive-timeframes',
+        action='store_true',
+        help='Fetch only base bars (5m, 1d) and resample 1h/1wk/1mo locally'
+    )
+    
+    parser.add_argument(
+        '--requests-per-minute',
+        type=float,
+        default=FETCH_REQUESTS_PER_MINUTE,
+        help=f'Data API rate limit for bar fetches (default: {FETCH_REQUESTS_PER_MINUTE})'
+    )
+    
+    parser.add_argument(
+        '--max-concurrency',
+        type=int,
+        default=FETCH_MAX_CONCURRENCY,
+        help=f'Maximum bar requests in flight (default: {FETCH_MAX_CONCURRENCY})'
+    )
+    
+    parser.add_argument(
+        '--indicator-engine',
+        choices=['ticker', 'panel'],
+        default=INDICATOR_ENGINE,
+        help=f'Per-ticker pandas_ta calls or one vectorized pass per timeframe (default: {INDICATOR_ENGINE})'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=COMPUTE_WORKERS,
+        help=f'Worker processes for the ticker engine\'s indicator compute (default: {COMPUTE_WORKERS})'
+    )
+    
+    parser.add_argument(
+        '--universe-file',
+        type=str,
+        help='Holdings CSV to stream in chunks (e.g. IWM_holdings.csv); equities only'
+    )
+    
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=UNIVERSE_CHUNK_SIZE,
+        help=f'Tickers per chunk for --universe-file (default: {UNIVERSE_CHUNK_SIZE})'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='With --universe-file, reuse chunk checkpoints from an interrupted run'
+    )
+    
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help='Hold bars and snapshots in float32 / categorical form and log memory per stage'
+    )
+    
+    parser.add_argument(
+        '--no-result-cache',
+        action='store_true',
+        help='Recompute every indicator and enhancer instead of reusing cached results'
+    )
+    
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Keep running and refresh each timeframe when a new bar closes (US-equity session calendar)'
+    )
+    
+    parser.add_argument(
+        '--backfill',
+        action='store_true',
+        help='Write as-of snapshot features at every historical bar to <output-dir>/backfill/asof_<TF>.parquet'
+    )
+    
+    parser.add_argument(
+        '--backfill-start',
+        type=str,
+        help='With --backfill, only emit timestamps from this date on (e.g. 2024-01-01); earlier bars still warm up the indicators'
+    )
+    
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help=f'Stream minute bars over websocket and update the {"/".join(tf.upper() for tf in STREAM_TIMEFRAMES)} snapshots as each bar closes'
+    )
+    
+    parser.add_argument(
+        '--stream-url',
+        type=str,
+        default=STREAM_URL,
+        help=f'Market-data websocket for --stream (default: {STREAM_URL})'
+    )
+    
+    parser.add_argument(
+        '--stream-replay',
+        type=float,
+        nargs='?',
+        const=STREAM_REPLAY_SPEED,
+        metavar='SPEED',
+        help=f'Stream the provider\'s last session of minute bars from a local stand-in server, SPEED× real time (default: {STREAM_REPLAY_SPEED:g}; 0 = no delay)'
+    )
+    
+    parser.add_argument(
+        '--import-profile',
+        action='store_true',
+        help='Report per-module import time at the end of the run'
+    )
+    
     parser.add_argument(
         '--verbose', '-v',
         action='store_true',
         help='Enable verbose logging'
     )
     
+    # Subcommands work on saved outputs instead of running the pipeline
+    subparsers = parser.add_subparsers(dest='command', metavar='{screen}')
+    screen = subparsers.add_parser(
+        'screen',
+        help='Filter the saved snapshots, e.g. screen "RSI_Z_1D > 2 and CMF_Z_1H < -1"'
+    )
+    screen.add_argument(
+        'expression',
+        help='Filter: <column> <op> <number> (op: > >= < <= == !=), <column> between <lo> and <hi>, combined with and / or / not and parentheses'
+    )
+    screen.add_argument(
+        '--columns', '-c',
+        nargs='+',
+        default=[],
+        help='Extra snapshot columns to show for the matches'
+    )
+    screen.add_argument(
+        '--sort',
+        type=str,
+        help='Sort the matches by this column (descending unless --ascending)'
+    )
+    screen.add_argument(
+        '--ascending',
+        action='store_true',
+        help='Sort ascending'
+    )
+    screen.add_argument(
+        '--limit',
+        type=int,
+        help='Show at most this many matches'
+    )
+    
     return parser.parse_args()
 
 def setup_directories(data_dir: Path = DATA_DIR) -> None:
@@ -88,17 +273,52 @@ def setup_directories(data_dir: Path = DATA_DIR) -> None:
     for directory in [data_dir, market_dir, price_dir]:
         directory.mkdir(parents=True, exist_ok=True)
         logger.info(f"Ensured directory exists: {directory}")
+    
+    # The bar store and result cache live under the output directory, not the cwd
+    from indicators.fetch_data import set_bar_store_root
+    from indicators import result_cache
+    set_bar_store_root(data_dir / BAR_STORE_DIR)
+    result_cache.set_path(data_dir / RESULT_CACHE_PATH)
+
+def setup_provider(args: argparse.Namespace) -> None:
+    """Select the OHLCV data provider the fetch layer dispatches to"""
+    from indicators.data_providers import set_provider
+    
+    if args.provider == "replay":
+        set_provider("replay", root=args.replay_dir)
+    elif args.provider == "synthetic":
+        set_provider("synthetic", n_bars=args.synthetic_bars, seed=args.seed)
+    else:
+        set_provider(args.provider)
+    logger.info(f"Using data provider: {args.provider}")
 
-def get_tickers(cli_tickers: Optional[List[str]] = None) -> List[str]:
+def get_tickers(
+    cli_tickers: Optional[List[str]] = None,
+    synthetic_count: Optional[int] = None,
+    universe_file: Optional[str] = None,
+) -> List[str]:
     """
     Get tickers based on priority:
     1. Command-line arguments (if provided)
-    2. StockRover PDF (if exists)
-    3. Default tickers from config
+    2. Universe holdings file (if provided)
+    3. Generated names when running on the synthetic provider
+    4. StockRover PDF (if exists)
+    5. Default tickers from config
     """
+    from indicators.data_providers import synthetic_tickers
+    from indicators.universe import load_universe
+    from stockrover.extract_tickers import extract_tickers_from_pdf
+    
     if cli_tickers:
         logger.info(f"Using {len(cli_tickers)} tickers from command line: {', '.join(cli_tickers[:5])}...")
         return cli_tickers
+    elif universe_file:
+        universe = load_universe(universe_file)
+        logger.info(f"Using {len(universe)} tickers from universe file: {universe_file}")
+        return universe
+    elif synthetic_count:
+        logger.info(f"Using {synthetic_count} synthetic tickers")
+        return synthetic_tickers(synthetic_count)
     elif STOCKROVER_PDF.exists():
         logger.info(f"Using tickers extracted from: {STOCKROVER_PDF}")
         return extract_tickers_from_pdf(STOCKROVER_PDF)
@@ -106,59 +326,59 @@ def get_tickers(cli_tickers: Optional[List[str]] = None) -> List[str]:
         logger.info(f"Using {len(default_tickers)} default tickers from config")
         return default_tickers
 
-def enhance_snapshot(df: pd.DataFrame, label: str) -> pd.DataFrame:
-    """Apply post-processing to a snapshot dataframe"""
+def enhance_snapshot(df: pd.DataFrame, label: str, plan=None) -> pd.DataFrame:
+    """Apply post-processing to a snapshot dataframe (only what the column plan needs)"""
+    from indicators.column_planner import get_column_plan
+    from indicators.enhance_indicators import apply_derived_features
+    from indicators.result_cache import get_result_cache
+    from indicators.post_indicator_proccessing_functions import add_sumZZ, rolling_slope
+    
+    plan = plan or get_column_plan()
     try:
         # Apply derived features
-        df = apply_derived_features(df, label)
+        df = apply_derived_features(df, label, plan.enhancers, cache=get_result_cache())
         
         # Add sumZZ
-        df = add_sumZZ(df, label)
+        if plan.sum_zz:
+            df = add_sumZZ(df, label)
         
         # Calculate trend slope
-        sum_col = f"sumZZ_{label}"
-        slope_col = f"slope_sumZZ_{label}"
-        win = TREND_WINDOWS.get(label, 20)
-        
-        df[slope_col] = (
-            df[sum_col]
-            .rolling(win)
-            .apply(lambda s: true_trend(s, window=win), raw=False)
-        )
+        if plan.slope_sum_zz:
+            sum_col = f"sumZZ_{label}"
+            slope_col = f"slope_sumZZ_{label}"
+            win = TREND_WINDOWS.get(label, 20)
+            
+            df[slope_col] = rolling_slope(df[sum_col], window=win)
         
         return df
     except Exception as e:
         logger.error(f"Error enhancing snapshot {label}: {str(e)}")
         return df
 
-def add_passthroughs(snapshots: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
-    """Add passthrough columns to each snapshot"""
-    enhanced_snapshots = {}
-    
-    for label, df in snapshots.items():
-        try:
-            passthrough_df = compute_passthroughs(df, label)
-            enhanced_snapshots[label] = pd.concat([df, passthrough_df], axis=1)
-            logger.info(f"Added passthroughs to {label} snapshot")
-        except Exception as e:
-            logger.error(f"Error applying passthroughs to {label}: {str(e)}")
-            enhanced_snapshots[label] = df
-            
-    return enhanced_snapshots
+def write_csv_atomic(df: pd.DataFrame, path: Path, **kwargs) -> None:
+    """Write a CSV via a temp file + rename so readers never see a half-written file"""
+    tmp = path.with_name(f".{path.name}.tmp")
+    df.to_csv(tmp, **kwargs)
+    os.replace(tmp, path)
 
 def save_snapshots(snapshots: Dict[str, pd.DataFrame], output_dir: Path = MARKET_DATA_DIR) -> None:
-    """Save all snapshot dataframes to CSV files"""
+    """Save all snapshot dataframes to CSV files (each file is replaced atomically)"""
     for label, df in snapshots.items():
         file_path = output_dir / f"marketData_{label}.csv"
-        df.to_csv(file_path, index=False)
+        write_csv_atomic(df, file_path, index=False)
         logger.info(f"Saved {label} snapshot to {file_path}")
 
 def save_ticker_ohlcv(ticker_list: List[str], timeframes: List[str], output_dir: Path = PRICE_VOLUME_DIR) -> None:
-    """Save OHLCV data for each ticker and timeframe"""
+    """Save up to one year of OHLCV data for each ticker and timeframe"""
+    from indicators.fetch_data import fetch_ticker_data
+    from indicators.periods import period_to_timedelta
+    
     for ticker in ticker_list:
         for tf in timeframes:
             try:
-                df = fetch_ticker_data(ticker, interval=tf, years=1)
+                # Never ask for more than the snapshot already pulled, so this is a BAR_CACHE hit
+                period = min("1y", INTERVAL_PERIOD_MAP.get(tf, "1y"), key=period_to_timedelta)
+                df = fetch_ticker_data(ticker, interval=tf, period=period)
                 if not df.empty:
                     filepath = output_dir / f"{ticker}_{tf.upper()}.csv"
                     df.to_csv(filepath)
@@ -168,8 +388,66 @@ def save_ticker_ohlcv(ticker_list: List[str], timeframes: List[str], output_dir:
             except Exception as e:
                 logger.error(f"Error fetching {ticker} {tf}: {str(e)}")
 
+def save_support_resistance(ticker_list: List[str], timeframes: List[str], output_dir: Path = MARKET_DATA_DIR) -> None:
+    """Volume-profile support / resistance levels per timeframe, all tickers and timeframes in one batch"""
+    from indicators.fetch_data import fetch_ticker_data
+    from indicators.periods import period_to_timedelta
+    from analysis.support_resistance import support_resistance_levels
+    
+    if not ticker_list:
+        return
+    frames = {}
+    for tf in timeframes:
+        # Same window as the OHLCV dump, so these are BAR_CACHE hits
+        period = min("1y", INTERVAL_PERIOD_MAP.get(tf, "1y"), key=period_to_timedelta)
+        for ticker in ticker_list:
+            try:
+                df = fetch_ticker_data(ticker, interval=tf, period=period)
+            except Exception as e:
+                logger.error(f"Error fetching {ticker} {tf}: {str(e)}")
+                continue
+            if not df.empty:
+                frames[(ticker, tf.upper())] = df
+    
+    levels = support_resistance_levels(frames)
+    for tf in timeframes:
+        label = tf.upper()
+        out_path = output_dir / f"supportResistance_{label}.csv"
+        write_csv_atomic(levels[levels["Timeframe"] == label], out_path, index=False)
+        logger.info(f"Saved {label} support/resistance levels → {out_path}")
+
+def update_correlations(
+    ticker_list: List[str],
+    timeframes: List[str],
+    batch_fetch_function,
+    closes: Optional[Dict[str, Dict[str, pd.DataFrame]]] = None,
+) -> Dict[str, Dict[str, list]]:
+    """
+    Advance the rolling return correlation matrices with this run's bars;
+    returns the summary pair cells. `closes` ({label: {ticker: Close-only
+    bars}}, kept by a universe build) replaces the fetch for its timeframes.
+    """
+    from analysis.correlation import close_panel, get_correlation_book
+
+    if len(ticker_list) > CORRELATION_MAX_TICKERS:
+        logger.info(f"Skipping pair correlations: {len(ticker_list)} tickers > CORRELATION_MAX_TICKERS ({CORRELATION_MAX_TICKERS})")
+        return {}
+    book = get_correlation_book()
+    for tf in timeframes:
+        if closes is not None and tf.upper() in closes:
+            bars = closes[tf.upper()]
+        else:
+            # Same request as the snapshot build, so this is a BAR_CACHE hit
+            bars = batch_fetch_function(ticker_list, interval=tf, period=INTERVAL_PERIOD_MAP.get(tf, "60d"))
+        state = book.update(tf.upper(), close_panel(bars, ticker_list))
+        if state is not None:
+            logger.info(f"{tf.upper()} correlations: {len(state.tickers)} tickers over the last {min(state.count, state.window)} returns")
+    return book.pair_summary()
+
 def save_good_enough_columns(snapshots: Dict[str, pd.DataFrame], output_dir: Path = MARKET_DATA_DIR) -> None:
     """Save 'good enough' columns for LLM consumption"""
+    from indicators.column_planner import ColumnPlan
+    
     good_enough_cols = BASE_FEATURES + ["Date", "Time"]
     
     for label, df in snapshots.items():
@@ -181,7 +459,7 @@ def save_good_enough_columns(snapshots: Dict[str, pd.DataFrame], output_dir: Pat
                 # already added or non-suffix columns we always keep
                 continue
             else:
-                col_with_label = f"{col}_{label}"
+                col_with_label = ColumnPlan.column(col, label)
                 if col_with_label in df.columns:
                     keep_cols.append(col_with_label)
                 else:
@@ -193,7 +471,7 @@ def save_good_enough_columns(snapshots: Dict[str, pd.DataFrame], output_dir: Pat
 
         # Save output
         out_path = output_dir / f"goodEnough_{label}.csv"
-        good_df.to_csv(out_path, index=False)
+        write_csv_atomic(good_df, out_path, index=False)
         logger.info(f"Saved {label} good-enough CSV → {out_path}")
 
 def main() -> None:
@@ -205,44 +483,185 @@ def main() -> None:
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
     
+    # Pipeline modules are only imported once we know we are running
+    profiler = None
+    if args.import_profile:
+        from utils.import_profile import ImportProfiler
+        profiler = ImportProfiler().start()
+    
+    try:
+        if args.command == "screen":
+            run_screen(args)
+        elif args.daemon:
+            from data_processing.scheduler import run_daemon
+            published: Dict[str, Any] = {}
+            
+            def refresh(due: Optional[List[str]]) -> None:
+                published.update(run_pipeline(args, due, published if due else None))
+            
+            run_daemon(refresh, args.timeframes, derived=args.derive_timeframes)
+        elif args.backfill:
+            run_backfill(args)
+        elif args.stream or args.stream_replay is not None:
+            run_stream(args)
+        else:
+            run_pipeline(args)
+    finally:
+        # Reported at the end so lazily imported modules (pandas_ta, API clients) show up too
+        if profiler is not None:
+            profiler.stop()
+            logger.info("Import profile (slowest first):\n" + profiler.report())
+
+def run_pipeline(
+    args: argparse.Namespace,
+    timeframes: Optional[List[str]] = None,
+    published: Optional[Dict[str, pd.DataFrame]] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Run fetch → snapshots → enhancements → outputs for parsed CLI arguments.
+
+    Daemon refreshes pass the `timeframes` whose bars just closed and the
+    `published` snapshots of the last run, which fill in the other timeframes
+    of the cross-timeframe summary. Returns this run's snapshots.
+    """
+    from indicators.fetch_data import fetch_ticker_data, fetch_bars_batched
+    from indicators.build_snapshots import build_full_snapshot
+    from indicators.universe import build_universe_snapshots
+    from indicators.resample_bars import DerivedTimeframeFetcher
+    from indicators.async_fetch import AsyncFetchEngine
+    from indicators.bar_cache import BAR_CACHE
+    from indicators import compact
+    from analysis.summary import summarize_top_bottom_indicators
+    from analysis.correlation import add_pairs_to_summary
+    from data_processing.archive_utils import archive_good_enough_files
+    
     # Setup directories
     data_dir = Path(args.output_dir)
     market_dir = data_dir / "marketData"
     price_dir = data_dir / "priceVolume"
     setup_directories(data_dir)
     
-    # Get tickers (with priority: CLI args > PDF > config defaults)
-    analysis_tickers = get_tickers(args.tickers)
+    # Select the data provider before anything fetches. Daemon refreshes keep
+    # it: set_provider() empties the whole bar cache, not just the closed intervals
+    refresh = published is not None
+    if not refresh:
+        setup_provider(args)
+    if args.compact:
+        compact.enable()
+        logger.info("Compact memory mode: float32 bars/snapshots, categorical tickers")
+    if args.no_result_cache:
+        from indicators import result_cache
+        result_cache.disable()
+    
+    # Get tickers (with priority: CLI args > synthetic > PDF > config defaults)
+    synthetic_count = args.synthetic_tickers if args.provider == "synthetic" else None
+    analysis_tickers = get_tickers(args.tickers, synthetic_count, args.universe_file)
     
     # Convert timeframes to lowercase for consistency
-    timeframes = [tf.lower() for tf in args.timeframes]
+    timeframes = [tf.lower() for tf in (timeframes or args.timeframes)]
+    if refresh:
+        # Only the refreshed intervals (and the bases they are derived from) are re-read
+        intervals = set(timeframes)
+        if args.derive_timeframes:
+            intervals |= {DERIVED_TIMEFRAME_BASES[tf] for tf in timeframes if tf in DERIVED_TIMEFRAME_BASES}
+        for interval in intervals:
+            BAR_CACHE.invalidate(interval)
+        logger.info(f"Refreshing {', '.join(tf.upper() for tf in timeframes)} after bar close")
+    
+    # Plan the columns this run's outputs need (BASE_FEATURES, SUMMARY_INDICATORS, SNAPSHOT_COLUMNS)
+    from indicators.column_planner import get_column_plan
+    plan = get_column_plan()
+    logger.info(f"Column plan: {len(plan.features)} features from {len(plan.indicators)} indicator(s)")
+    if plan.unknown:
+        logger.warning(f"Requested columns no registry produces: {', '.join(plan.unknown)}")
+    
+    # Resolve and validate INDICATOR_REGISTRY (+ plugins) once, before any fetching
+    indicator_table = None
+    if args.indicator_engine == "ticker":
+        from indicators.indicator_table import get_indicator_table
+        indicator_table = get_indicator_table()
+        logger.info(f"Indicator table compiled: {', '.join(spec.name for spec in indicator_table)}")
     
     # Build initial snapshots
     logger.info(f"Building market snapshots for {len(analysis_tickers)} tickers across {len(timeframes)} timeframes...")
-    snapshots = build_full_snapshot(analysis_tickers, timeframes, fetch_ticker_data)
-    
-    # Add passthrough columns
-    logger.info("Adding passthroughs...")
-    snapshots = add_passthroughs(snapshots)
+    fetch_function, batch_fetch_function = fetch_ticker_data, fetch_bars_batched
+    if args.derive_timeframes:
+        logger.info("Deriving 1h/1wk/1mo bars locally from base 5m/1d series")
+        fetch_function = DerivedTimeframeFetcher(fetch_ticker_data, fetch_bars_batched, timeframes)
+        batch_fetch_function = fetch_function.fetch_many
+    engine = AsyncFetchEngine(
+        requests_per_minute=args.requests_per_minute,
+        max_concurrency=args.max_concurrency,
+    )
+    closes = None
+    if args.universe_file:
+        # Chunked: bounded memory, checkpointed; cross-sectional steps run below on the gathered rows.
+        # Each chunk's bars leave BAR_CACHE with it, so the Close columns the correlations need are kept
+        if len(analysis_tickers) <= CORRELATION_MAX_TICKERS:
+            closes = {}
+        snapshots = build_universe_snapshots(
+            analysis_tickers, timeframes, fetch_function,
+            batch_fetch_function=batch_fetch_function,
+            engine=engine,
+            indicator_engine=args.indicator_engine,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            checkpoint_dir=data_dir / UNIVERSE_CHECKPOINT_DIR,
+            resume=args.resume and not refresh,
+            closes=closes,
+        )
+    else:
+        snapshots = build_full_snapshot(
+            analysis_tickers, timeframes, fetch_function,
+            batch_fetch_function=batch_fetch_function,
+            engine=engine,
+            indicator_engine=args.indicator_engine,
+            workers=args.workers
+        )
+    logger.info(f"Fetch engine stats: {engine.stats}")
+    if indicator_table is not None:
+        logger.info("Indicator timings:\n" + indicator_table.timing_report())
+    compact.log_memory("snapshot build", snapshots)
     
     # Enhance snapshots with derived features
     logger.info("Enhancing snapshots with derived features...")
     for label, df in snapshots.items():
-        snapshots[label] = enhance_snapshot(df, label)
+        snapshots[label] = enhance_snapshot(df, label, plan)
+        if args.compact:
+            snapshots[label] = compact.compact_snapshot(snapshots[label])
+    compact.log_memory("enhancement", snapshots)
+    if not args.no_result_cache:
+        from indicators.result_cache import get_result_cache
+        logger.info(f"Result cache stats: {get_result_cache().stats}")
     
     # Generate summary
     logger.info("Summarizing top and bottom ETFs by active indicators...")
-    summary_df = summarize_top_bottom_indicators(snapshots)
-    summary_df.to_csv(data_dir / "indicatorSummary.csv", index=False)
+    summary_snapshots = {**(published or {}), **snapshots}
+    summary_df = summarize_top_bottom_indicators(summary_snapshots)
+    logger.info("Updating rolling pair correlations...")
+    summary_df = add_pairs_to_summary(summary_df, update_correlations(analysis_tickers, timeframes, batch_fetch_function, closes))
+    write_csv_atomic(summary_df, data_dir / "indicatorSummary.csv", index=False)
     logger.info("Saved summary rankings to data/indicatorSummary.csv")
     
-    # Save snapshots
+    # Save snapshots (compact snapshots get their Date / Time strings back here)
     logger.info("Saving snapshot files...")
+    enhanced = snapshots
+    snapshots = {label: compact.expand_timestamps(df) for label, df in snapshots.items()}
     save_snapshots(snapshots, market_dir)
     
     # Save ticker OHLCV data
     logger.info("Saving individual ticker OHLCV data...")
-    save_ticker_ohlcv(SR_tickers, timeframes, price_dir)
+    if args.provider == "replay" and Path(args.replay_dir).resolve() == price_dir.resolve():
+        logger.info("Skipping OHLCV dump – it would overwrite the replay source files")
+    else:
+        save_ticker_ohlcv(SR_tickers, timeframes, price_dir)
+    
+    # Support / resistance levels next to the snapshots
+    if SR_tickers:
+        logger.info("Computing volume-profile support/resistance levels...")
+        save_support_resistance(SR_tickers, timeframes, market_dir)
+    logger.info(f"Bar cache stats: {BAR_CACHE.stats()}")
+    compact.log_memory("OHLCV dump")
     
     # Save good enough columns for LLM
     logger.info("Saving LLM-friendly dataframes...")
@@ -250,10 +669,148 @@ def main() -> None:
     
     # Archive goodEnough files for ML training
     logger.info("Archiving goodEnough files for ML training...")
-    archive_count = archive_good_enough_files(market_dir)
+    archive_count = archive_good_enough_files(market_dir, labels=list(snapshots) if refresh else None)
     logger.info(f"Archived {archive_count} goodEnough files to historical storage")
+    compact.log_memory("outputs")
     
     logger.info("✅ SignalCraft processing pipeline complete!")
+    return enhanced
+
+def run_screen(args: argparse.Namespace) -> None:
+    """Screen the saved snapshots in <output-dir>/marketData with a filter expression"""
+    import time
+    from analysis.screener import Screener, load_snapshots
+    
+    market_dir = Path(args.output_dir) / "marketData"
+    snapshots = load_snapshots(market_dir)
+    if not snapshots:
+        logger.error(f"No marketData_*.csv snapshots in {market_dir} – run the pipeline first")
+        return
+    screener = Screener(snapshots)
+    
+    start = time.perf_counter()
+    try:
+        result = screener.screen(args.expression, args.columns, args.sort, args.ascending)
+    except (ValueError, KeyError) as e:
+        logger.error(f"Invalid screen: {e}")
+        return
+    elapsed = time.perf_counter() - start
+    
+    shown = result.head(args.limit) if args.limit else result
+    print(shown.to_string(index=False) if len(shown) else "No matches")
+    logger.info(f"{len(result)} of {len(screener.tickers)} tickers matched in {elapsed * 1000:.1f} ms "
+                f"({', '.join(snapshots)} snapshots)")
+
+def run_backfill(args: argparse.Namespace) -> None:
+    """
+    As-of backfill: each timeframe's snapshot features (enhancers, sumZZ and
+    slope_sumZZ included) at every historical bar, as one Parquet panel per
+    timeframe for ML training.
+    """
+    from indicators.fetch_data import fetch_ticker_data, fetch_bars_batched
+    from indicators.resample_bars import DerivedTimeframeFetcher
+    from indicators.column_planner import get_column_plan
+    from data_processing.asof_backfill import backfill_timeframe
+    
+    data_dir = Path(args.output_dir)
+    setup_directories(data_dir)
+    setup_provider(args)
+    synthetic_count = args.synthetic_tickers if args.provider == "synthetic" else None
+    tickers = get_tickers(args.tickers, synthetic_count, args.universe_file)
+    timeframes = [tf.lower() for tf in args.timeframes]
+    plan = get_column_plan()
+    
+    fetch_many = fetch_bars_batched
+    if args.derive_timeframes:
+        fetch_many = DerivedTimeframeFetcher(fetch_ticker_data, fetch_bars_batched, timeframes).fetch_many
+    for tf in timeframes:
+        logger.info(f"Backfilling {tf.upper()} for {len(tickers)} tickers...")
+        bars = fetch_many(tickers, interval=tf, period=INTERVAL_PERIOD_MAP.get(tf, "60d"))
+        frames = {ticker: bars[ticker] for ticker in tickers if ticker in bars}     # snapshot row order
+        backfill_timeframe(
+            frames, tf, data_dir / BACKFILL_DIR, plan,
+            trend_window=TREND_WINDOWS.get(tf.upper(), 20),
+            start=args.backfill_start,
+        )
+    logger.info("✅ SignalCraft backfill complete!")
+
+def run_stream(args: argparse.Namespace) -> None:
+    """
+    Streaming mode: warm the STREAM_TIMEFRAMES state up from history once,
+    then update and publish those snapshots (plus goodEnough and the summary)
+    each time a bar closes on the minute-bar stream.
+    """
+    import asyncio
+    from indicators.fetch_data import fetch_bars_batched
+    from indicators.resample_bars import resample_ohlcv
+    from indicators.column_planner import get_column_plan
+    from indicators.stream_ingest import StreamingSnapshots, stream_snapshots
+    from analysis.summary import summarize_top_bottom_indicators
+    
+    data_dir = Path(args.output_dir)
+    market_dir = data_dir / "marketData"
+    setup_directories(data_dir)
+    setup_provider(args)
+    if args.no_result_cache:
+        from indicators import result_cache
+        result_cache.disable()
+    
+    synthetic_count = args.synthetic_tickers if args.provider == "synthetic" else None
+    tickers = get_tickers(args.tickers, synthetic_count, args.universe_file)
+    timeframes = [tf.lower() for tf in STREAM_TIMEFRAMES]
+    plan = get_column_plan()
+    state = StreamingSnapshots(tickers, timeframes, plan)
+    
+    # Replays start at the provider's last session; only history before it warms the state up
+    replay, cutoff = None, None
+    if args.stream_replay is not None:
+        from indicators.stream_replay import ReplayStreamServer, last_session
+        minute_bars = fetch_bars_batched(tickers, interval="1m", period=INTERVAL_PERIOD_MAP["1m"])
+        replay = ReplayStreamServer(last_session(minute_bars), speed=args.stream_replay or None)
+        cutoff = replay.start
+        logger.info(f"Replaying {len(replay.minutes)} minutes of bars from {cutoff} at {args.stream_replay:g}x")
+    
+    # One history fetch per timeframe; 1h is resampled from 5m so its buckets match the stream's
+    logger.info(f"Warming up {', '.join(tf.upper() for tf in timeframes)} state for {len(tickers)} tickers...")
+    for tf in timeframes:
+        base = DERIVED_TIMEFRAME_BASES.get(tf, tf)
+        history = fetch_bars_batched(tickers, interval=base, period=INTERVAL_PERIOD_MAP.get(tf, "60d"))
+        for ticker, bars in history.items():
+            if cutoff is not None:
+                bars = bars[bars.index < cutoff]
+            if base != tf:
+                bars = resample_ohlcv(bars, tf)
+            state.warm_up(ticker, tf, bars)
+    
+    published: Dict[str, pd.DataFrame] = {}
+    
+    def publish(snapshots: Dict[str, pd.DataFrame]) -> None:
+        for label, df in snapshots.items():
+            published[label] = enhance_snapshot(df, label, plan)
+        updated = {label: published[label] for label in snapshots}
+        save_snapshots(updated, market_dir)
+        save_good_enough_columns(updated, market_dir)
+        write_csv_atomic(summarize_top_bottom_indicators(published), data_dir / "indicatorSummary.csv", index=False)
+    
+    publish({label: df for label, df in ((tf.upper(), state.snapshot(tf)) for tf in timeframes) if df is not None})
+    
+    async def stream() -> None:
+        if replay is None:
+            from config.credentials import ALPACA_API_KEY, ALPACA_SECRET
+            await stream_snapshots(state, publish, args.stream_url, ALPACA_API_KEY, ALPACA_SECRET)
+            return
+        server, url = await replay.serve()
+        try:
+            await stream_snapshots(state, publish, url, idle_seconds=None)
+        finally:
+            server.close()
+            await server.wait_closed()
+    
+    try:
+        asyncio.run(stream())
+    except KeyboardInterrupt:
+        logger.info("Stream stopped")
+    logger.info("✅ SignalCraft stream ended")
 
 if __name__ == "__main__":
     main()
@@ -288,5 +845,46 @@ if __name__ == "__main__":
 #
 # 9. Focus on tech sector with fine-grained timeframes:
 #    python main.py -t AAPL MSFT GOOG AMZN META NVDA AMD -tf 5m 1h 1d
+#
+# 10. Fetch only 5m/1d bars and resample 1h/1wk/1mo locally:
+#    python main.py --derive-timeframes
+#
+# 11. Offline, repeatable runs (no network or API keys):
+#    python main.py --provider replay -t NEE -tf 5m 1h 1d 1wk 1mo
+#    python main.py --provider synthetic --synthetic-tickers 500 --synthetic-bars 2000 --seed 7
+#
+# 12. Universe-scale run with float32 / categorical frames and per-stage memory log:
+#    python main.py --provider synthetic --synthetic-tickers 2000 --compact
+#
+# 13. Stream the Russell 2000 holdings in checkpointed chunks (add --resume after an interruption):
+#    python main.py --universe-file IWM_holdings.csv --chunk-size 200 --compact
+#
+# 14. Compute each timeframe's indicators in one vectorized pass over all tickers:
+#    python main.py --indicator-engine panel
+#
+# 15. Spread per-ticker indicator compute over 16 worker processes:
+#    python main.py --universe-file IWM_holdings.csv --workers 16
+#
+# 16. Recompute everything, ignoring the indicator result cache:
+#    python main.py --no-result-cache
+#
+# 17. Stay running and refresh each timeframe as its bars close (5M every five minutes in session;
+#    1H on the clock hour, or at :30 in session with --derive-timeframes):
+#    python main.py --daemon -tf 5m 1h 1d 1wk 1mo
+#
+# 18. Update the 5M / 1H snapshots from the live minute-bar stream (or an accelerated local replay):
+#    python main.py --stream
+#    python main.py --provider synthetic --synthetic-tickers 50 --synthetic-bars 2000 --stream-replay 600
+#
+# 19. Build an ML training set: as-of snapshot features at every bar since 2023:
+#    python main.py --backfill --backfill-start 2023-01-01 -tf 1d 1wk
+#
+# 20. Screen the saved snapshots across timeframes (no fetching):
+#    python main.py screen "RSI_Z_1D > 2 and CMF_Z_1H < -1" --sort sumZZ_1D
+#    python main.py -o ./custom_data screen "not (VWAP_Z_5M between -1 and 1)" -c RSI_5M --limit 20
+#
+# 21. Rotation view: the most co-moving / diverging pairs land in indicatorSummary.csv
+#    (CoMoving_Pairs / Diverging_Pairs); a daemon only feeds the matrices the newly closed bars:
+#    python main.py --daemon -t XLK XLF XLE XLV XLY XLP XLI XLU XLB XLRE XLC -tf 5m 1h 1d
 # =====================================================
 
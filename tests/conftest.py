@@ -0,0 +1,21 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Run from anywhere: the packages (config, indicators, …) live at the repo root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture(autouse=True)
+def empty_bar_cache():
+    """Every test starts with an empty, zero-count BAR_CACHE."""
+    from indicators.bar_cache import BAR_CACHE
+
+    def reset():
+        BAR_CACHE.invalidate()
+        BAR_CACHE.hits = BAR_CACHE.misses = 0
+
+    reset()
+    yield BAR_CACHE
+    reset()
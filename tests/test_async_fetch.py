@@ -0,0 +1,191 @@
+"""AsyncFetchEngine against a local fake bars server that injects latency, 429s and pagination."""
+
+import json
+import random
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from indicators.async_fetch import AsyncFetchEngine, TokenBucket, metered
+
+fetch = metered(urllib.request.urlopen)
+
+
+class FakeBarsServer(ThreadingHTTPServer):
+    """
+    GET /<key>?page=N → {"key", "page", "next"}; `pages` pages per key. The first
+    `throttle[key]` hits of a key answer 429, the first hit of a key in `delay`
+    stalls that many seconds. Every hit is logged as (key, page, time, status).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, pages=1, throttle=None, delay=None):
+        super().__init__(("127.0.0.1", 0), FakeBarsHandler)
+        self.pages = pages
+        self.throttle = dict(throttle or {})
+        self.delay = dict(delay or {})
+        self.log = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def hits(self, key=None, status=None):
+        return [h for h in self.log if (key is None or h[0] == key) and (status is None or h[3] == status)]
+
+
+class FakeBarsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        key, page = url.path.strip("/"), int(parse_qs(url.query).get("page", ["0"])[0])
+        with server.lock:
+            stall = server.delay.pop(key, 0)
+            throttled = server.throttle.get(key, 0) > 0
+            if throttled:
+                server.throttle[key] -= 1
+            server.log.append((key, page, time.monotonic(), 429 if throttled else 200))
+        time.sleep(stall)
+        try:
+            if throttled:
+                self.send_error(429, "Too Many Requests")
+                return
+            body = json.dumps({"key": key, "page": page, "next": page + 1 if page + 1 < server.pages else None})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(body.encode())
+        except OSError:
+            pass                                # the client gave up on a stalled request
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(**kwargs) -> FakeBarsServer:
+        server = FakeBarsServer(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def fetch_pages(base_url: str, key: str) -> list:
+    """A paginated job: one metered HTTP call per page, like a batched bar request."""
+    pages, page = [], 0
+    while page is not None:
+        with fetch(f"{base_url}/{key}?page={page}") as response:
+            body = json.load(response)
+        pages.append(body["page"])
+        page = body["next"]
+    return pages
+
+
+def jobs(server, keys):
+    return [(key, lambda key=key: fetch_pages(server.url, key)) for key in keys]
+
+
+class MaxJitter(random.Random):
+    """Backoff always waits the full ceiling, so delays are predictable."""
+
+    def uniform(self, a, b):
+        return b
+
+
+def test_throttled_requests_are_retried(serve):
+    keys = ["A", "B", "C", "D"]
+    server = serve(pages=2, throttle={key: 2 for key in keys})
+    engine = AsyncFetchEngine(requests_per_minute=6000, max_concurrency=4, backoff_base=0.01)
+
+    results = {r.key: r for r in engine.iter_completed(jobs(server, keys))}
+
+    assert all(r.ok and r.value == [0, 1] and r.attempts == 3 for r in results.values())
+    assert engine.stats["throttled"] == engine.stats["retried"] == 2 * len(keys)
+    assert engine.stats["failed"] == 0
+    assert engine.stats["http_calls"] == len(server.log) == len(keys) * (2 + 2)
+
+
+def test_gives_up_after_max_retries(serve):
+    server = serve(throttle={"A": 10})
+    engine = AsyncFetchEngine(requests_per_minute=6000, max_retries=2, backoff_base=0.01)
+
+    [result] = engine.iter_completed(jobs(server, ["A"]))
+
+    assert not result.ok and result.attempts == 3
+    assert len(server.hits("A")) == 3 and engine.stats["failed"] == 1
+
+
+def test_backoff_grows_exponentially(serve):
+    server = serve(throttle={"A": 3})
+    engine = AsyncFetchEngine(requests_per_minute=6000, backoff_base=0.1, rng=MaxJitter())
+
+    [result] = engine.iter_completed(jobs(server, ["A"]))
+
+    assert result.ok and result.attempts == 4
+    times = [h[2] for h in server.hits("A")]
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    for attempt, gap in enumerate(gaps, start=1):
+        assert engine.backoff_delay(attempt) <= gap < engine.backoff_delay(attempt) + 0.25
+
+
+def test_token_bucket_bounds_every_http_call(serve):
+    server = serve(pages=4)
+    rate = 1200 / 60                                          # tokens per second; burst = one second's worth
+    engine = AsyncFetchEngine(requests_per_minute=1200, max_concurrency=10)
+
+    results = list(engine.iter_completed(jobs(server, [f"K{i}" for i in range(10)])))
+
+    assert all(r.ok for r in results)
+    assert engine.stats["requests"] == 10 and engine.stats["http_calls"] == 40
+    # Pages count against the rate too: the 40 calls need ≥ (40 - burst) / rate seconds
+    times = sorted(h[2] for h in server.log)
+    for i, t in enumerate(times):
+        assert t - times[0] >= (i + 1 - rate) / rate - 0.05
+
+
+def test_token_bucket_rate():
+    bucket = TokenBucket(requests_per_minute=600, burst=5)      # 10 per second
+    started = time.monotonic()
+    for _ in range(15):
+        bucket.acquire_blocking()
+    assert 0.95 <= time.monotonic() - started < 1.5
+
+
+def test_stalled_call_times_out_and_retry_never_overlaps(serve):
+    server = serve(pages=2, delay={"SLOW": 2.0})
+    engine = AsyncFetchEngine(requests_per_minute=6000, backoff_base=0.01, timeout=0.2)
+    active, peak = defaultdict(int), defaultdict(int)
+    lock = threading.Lock()
+
+    def job(key):
+        with lock:
+            active[key] += 1
+            peak[key] = max(peak[key], active[key])
+        try:
+            return fetch_pages(server.url, key)
+        finally:
+            with lock:
+                active[key] -= 1
+
+    started = time.monotonic()
+    results = {r.key: r for r in engine.iter_completed([(k, lambda k=k: job(k)) for k in ("SLOW", "FAST")])}
+
+    assert results["SLOW"].ok and results["SLOW"].attempts == 2
+    assert results["FAST"].ok and results["FAST"].attempts == 1
+    assert time.monotonic() - started < 1.5                 # retried well before the stalled reply
+    assert peak["SLOW"] == 1                                 # the timed-out attempt had ended first
@@ -0,0 +1,58 @@
+"""--compact mode keeps the fetched float64 bars of one ticker per interval for the accuracy check."""
+
+import logging
+import sys
+
+import pandas as pd
+import pytest
+
+from indicators import compact
+from indicators.data_providers import SyntheticProvider, set_provider
+from indicators.fetch_data import fetch_bars_batched, fetch_ticker_data
+from indicators.resample_bars import DerivedTimeframeFetcher, resample_ohlcv
+
+
+@pytest.fixture
+def compact_mode():
+    provider = set_provider(SyntheticProvider(n_bars=300, seed=11))
+    compact.enable()
+    compact._references.clear()
+    yield provider
+    compact.enable(False)
+    compact._references.clear()
+    set_provider(SyntheticProvider())
+
+
+def test_reference_is_the_bars_before_compaction(compact_mode):
+    bars = fetch_bars_batched(["SYN0000", "SYN0001"], "1d", "5y")
+
+    reference = compact.reference_bars("SYN0000", "1d")
+    assert bars["SYN0000"]["Close"].dtype == "float32"
+    pd.testing.assert_frame_equal(reference, compact_mode.generate("SYN0000", "1d"))
+    assert compact.reference_bars("SYN0001", "1d") is None            # one ticker per interval
+
+
+def test_derived_timeframes_get_a_derived_reference(compact_mode):
+    fetcher = DerivedTimeframeFetcher(fetch_ticker_data, fetch_bars_batched, ["1d", "1wk"])
+    weekly = fetcher.fetch_many(["SYN0000"], "1wk", "10y")["SYN0000"]
+
+    reference = compact.reference_bars("SYN0000", "1wk")
+    pd.testing.assert_frame_equal(reference, resample_ohlcv(compact_mode.generate("SYN0000", "1d"), "1wk"))
+    assert weekly["Close"].dtype == "float32" and reference["Close"].dtype == "float64"
+
+
+def test_memory_logging_without_the_resource_module(monkeypatch, caplog):
+    monkeypatch.setitem(sys.modules, "resource", None)             # as on Windows: import fails
+    assert compact._peak_rss_bytes() is None
+    with caplog.at_level(logging.DEBUG, logger="indicators.compact"):
+        compact.log_memory("fetch")
+    assert "memory after fetch" in caplog.text
+
+
+def test_peak_rss_scale_follows_the_platform(monkeypatch):
+    resource = pytest.importorskip("resource")
+    raw = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    monkeypatch.setattr(compact.sys, "platform", "darwin")
+    assert compact._peak_rss_bytes() in range(raw, raw + 2**24)     # already bytes
+    monkeypatch.setattr(compact.sys, "platform", "linux")
+    assert compact._peak_rss_bytes() >= raw * 1024
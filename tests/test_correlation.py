@@ -0,0 +1,45 @@
+"""CorrelationBook updates across refreshes equal a rebuild over the final bars."""
+
+import numpy as np
+import pandas as pd
+
+from analysis.correlation import CorrelationBook, RollingCorrelation
+
+
+def panel(n=120, tickers=("AAA", "BBB", "CCC", "DDD"), seed=4):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2025-01-02 14:30", periods=n, freq="5min", tz="UTC")
+    common = rng.normal(0, 0.01, (n, 1))
+    closes = 100 * np.exp(np.cumsum(common + rng.normal(0, 0.01, (n, len(tickers))), axis=0))
+    return pd.DataFrame(closes, index=index, columns=list(tickers))
+
+
+def rebuilt(closes: pd.DataFrame, window: int) -> np.ndarray:
+    state = RollingCorrelation(list(closes.columns), window, 10)
+    state.fill(closes.pct_change(fill_method=None).iloc[1:].to_numpy())
+    return state.correlation()
+
+
+def test_provisional_last_bar_is_replaced():
+    final = panel(n=100)
+    forming = final.iloc[:80].copy()
+    forming.iloc[-1] *= [1.03, 0.97, 1.01, 0.99]           # bar 80 seen mid-way; still inside the window at 100
+    book = CorrelationBook({"5m": 30})
+
+    book.update("5M", forming)
+    state = book.update("5M", final)
+
+    np.testing.assert_allclose(state.correlation(), rebuilt(final, 30), rtol=1e-9, atol=1e-12)
+
+
+def test_refresh_without_new_bars_only_revises_the_last_one():
+    final = panel(n=50)
+    forming = final.copy()
+    forming.iloc[-1, 0] = np.nan                            # AAA had no bar yet
+    book = CorrelationBook({"5m": 60})
+
+    book.update("5M", forming)
+    state = book.update("5M", final)
+
+    assert state.count == len(final) - 1
+    np.testing.assert_allclose(state.correlation(), rebuilt(final, 60), rtol=1e-9, atol=1e-12)
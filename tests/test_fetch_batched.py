@@ -0,0 +1,139 @@
+"""fetch_bars_batched() against a local stub of the Alpaca bars client."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("alpaca.data.requests")          # AlpacaProvider builds real StockBarsRequests
+
+from config.config import FETCH_BATCH_SIZE
+from indicators import fetch_data
+from indicators.bar_store import BarStore
+from indicators.data_providers import AlpacaProvider
+from indicators.fetch_data import fetch_bars_batched
+
+END = pd.Timestamp.now(tz="UTC").floor("D")
+
+
+class StubBarSet:
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+
+class StubBarsClient:
+    """get_stock_bars() answers from generated bars and records every request."""
+
+    def __init__(self, n_bars: int = 30, missing=()):
+        self.n_bars = n_bars
+        self.missing = set(missing)
+        self.requests = []
+
+    def bars(self, symbol: str) -> pd.DataFrame:
+        seed = sum(map(ord, symbol))
+        close = 100 + np.cumsum(np.random.default_rng(seed).normal(0, 1, self.n_bars))
+        index = pd.date_range(end=END, periods=self.n_bars, freq="D", name="timestamp")
+        return pd.DataFrame({
+            "open": close - 0.5, "high": close + 1, "low": close - 1, "close": close,
+            "volume": np.full(self.n_bars, 1000.0), "trade_count": 10, "vwap": close,
+        }, index=index)
+
+    def get_stock_bars(self, request):
+        symbols = list(request.symbol_or_symbols)
+        self.requests.append((symbols, request.start))
+        frames = []
+        for symbol in symbols:
+            if symbol in self.missing:
+                continue
+            bars = self.bars(symbol)
+            bars = bars[bars.index >= pd.Timestamp(request.start)]
+            frames.append(pd.concat({symbol: bars}, names=["symbol"]))
+        return StubBarSet(pd.concat(frames) if frames else pd.DataFrame())
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = BarStore(tmp_path / "barStore")
+    monkeypatch.setattr(fetch_data, "_bar_store", store)
+    monkeypatch.setattr(fetch_data, "BAR_STORE_ENABLED", True)
+    return store
+
+
+def tickers(n: int):
+    return [f"T{i:03d}" for i in range(n)]
+
+
+def test_requests_are_chunked_at_max_symbols(store):
+    client = StubBarsClient()
+    symbols = tickers(2 * FETCH_BATCH_SIZE + 50)
+    bars = fetch_bars_batched(symbols, "1d", "60d", provider=AlpacaProvider(client=client))
+
+    assert [len(r[0]) for r in client.requests] == [FETCH_BATCH_SIZE, FETCH_BATCH_SIZE, 50]
+    assert [s for r in client.requests for s in r[0]] == symbols
+    assert list(bars) == symbols
+
+
+def test_multi_index_frame_is_split_per_ticker(store):
+    client = StubBarsClient()
+    bars = fetch_bars_batched(["AAA", "BBB"], "1d", "60d", provider=AlpacaProvider(client=client))
+
+    for symbol in ("AAA", "BBB"):
+        expected = client.bars(symbol)
+        frame = bars[symbol]
+        assert list(frame.columns) == ["Open", "High", "Low", "Close", "Volume"]
+        assert frame.index.name == "Date"
+        np.testing.assert_array_equal(frame["Close"].to_numpy(), expected["close"].to_numpy())
+        np.testing.assert_array_equal(frame.index.asi8, expected.index.asi8)
+
+
+def test_symbols_without_bars_are_left_out(store):
+    client = StubBarsClient(missing={"BBB", "DDD"})
+    bars = fetch_bars_batched(["AAA", "BBB", "CCC", "DDD"], "1d", "60d", provider=AlpacaProvider(client=client))
+    assert list(bars) == ["AAA", "CCC"]
+
+
+def test_duplicate_tickers_are_requested_once(store):
+    client = StubBarsClient()
+    fetch_bars_batched(["AAA", "BBB", "AAA"], "1d", "60d", provider=AlpacaProvider(client=client))
+    assert client.requests[0][0] == ["AAA", "BBB"]
+
+
+def test_second_fetch_is_served_from_bar_cache(store, empty_bar_cache):
+    client = StubBarsClient()
+    provider = AlpacaProvider(client=client)
+    first = fetch_bars_batched(tickers(5), "1d", "60d", provider=provider)
+    second = fetch_bars_batched(tickers(5), "1d", "30d", provider=provider)
+
+    assert len(client.requests) == 1
+    assert empty_bar_cache.hits == 5
+    for symbol, frame in second.items():
+        assert frame.index[0] >= first[symbol].index[0]
+        pd.testing.assert_frame_equal(frame, first[symbol].loc[frame.index[0]:])
+
+
+def test_bar_store_refresh_requests_only_from_last_stored_bar(store, empty_bar_cache):
+    client = StubBarsClient()
+    provider = AlpacaProvider(client=client)
+    first = fetch_bars_batched(tickers(3), "1d", "60d", provider=provider)
+    assert all((store.root / "1d" / f"{s}.parquet").exists() for s in tickers(3))
+
+    empty_bar_cache.invalidate()                     # a new run: only the store is warm
+    again = fetch_bars_batched(tickers(3), "1d", "60d", provider=provider)
+
+    symbols, since = client.requests[-1]
+    assert symbols == tickers(3)                     # one incremental group
+    assert pd.Timestamp(since) == END                # from the last stored bar, not the window start
+    for symbol in tickers(3):
+        pd.testing.assert_frame_equal(again[symbol], first[symbol], check_freq=False)
+
+
+def test_store_covers_new_tickers_with_full_window(store, empty_bar_cache):
+    client = StubBarsClient()
+    provider = AlpacaProvider(client=client)
+    fetch_bars_batched(["AAA"], "1d", "60d", provider=provider)
+    empty_bar_cache.invalidate()
+    client.requests.clear()
+
+    fetch_bars_batched(["AAA", "NEW"], "1d", "60d", provider=provider)
+    starts = {tuple(symbols): pd.Timestamp(since) for symbols, since in client.requests}
+    assert starts[("AAA",)] == END
+    assert starts[("NEW",)] < END - pd.Timedelta(days=50)
@@ -0,0 +1,84 @@
+"""Streaming kernels (warm-up + one update per bar) against compute_indicators() on the full history."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pandas_ta")
+
+from indicators.compute_indicators import compute_indicators
+from indicators.data_providers import SyntheticProvider
+from indicators.incremental import IncrementalIndicatorEngine
+
+RTOL = 1e-6
+ATOL = 1e-9
+INDICATORS = ("RSI", "MACD", "OBV", "ATR", "CMF", "VWAP", "BB_POS")
+
+
+@pytest.fixture(scope="module")
+def bars():
+    return SyntheticProvider(n_bars=400, seed=21).generate("INC", "5m")
+
+
+def streamed_row(bars: pd.DataFrame, interval: str, stream_last: int) -> pd.Series:
+    """Warm up on all but the last `stream_last` bars, then push those one at a time."""
+    engine = IncrementalIndicatorEngine()
+    split = len(bars) - stream_last
+    engine.warm_up("INC", interval, bars.iloc[:split])
+    for ts, bar in bars.iloc[split:].iterrows():
+        engine.update("INC", interval, bar, ts)
+    return pd.Series(engine.values("INC", interval), dtype="float64")
+
+
+def assert_matches_batch(bars: pd.DataFrame, interval: str, stream_last: int) -> None:
+    streamed = streamed_row(bars, interval, stream_last)
+    # pandas_ta returns None for series shorter than its window, so the batch
+    # has no column at all where the kernel reports NaN
+    batch = compute_indicators(bars.copy(), interval).iloc[-1]
+    batch = batch.reindex(streamed.index).astype("float64")
+    np.testing.assert_allclose(streamed.to_numpy(), batch.to_numpy(), rtol=RTOL, atol=ATOL, equal_nan=True,
+                               err_msg=f"columns: {list(streamed.index)}")
+
+
+def test_engine_covers_every_registry_indicator():
+    engine = IncrementalIndicatorEngine()
+    assert engine.skipped == []
+    assert set(INDICATORS) <= set(engine._new_state())
+
+
+@pytest.mark.parametrize("stream_last", [0, 1, 50, 200])
+def test_warm_up_plus_stream_equals_batch(bars, stream_last):
+    assert_matches_batch(bars, "5m", stream_last)
+
+
+@pytest.mark.parametrize("name", INDICATORS)
+def test_each_indicator_after_streaming(bars, name):
+    registry = {name: IncrementalIndicatorEngine().registry[name]}
+    engine = IncrementalIndicatorEngine(registry)
+    engine.warm_up("INC", "5m", bars.iloc[:300])
+    for ts, bar in bars.iloc[300:].iterrows():
+        engine.update("INC", "5m", bar, ts)
+    streamed = pd.Series(engine.values("INC", "5m"), dtype="float64")
+
+    batch = compute_indicators(bars.copy(), "5m", names={name}).iloc[-1].reindex(streamed.index)
+    assert streamed.notna().all()
+    np.testing.assert_allclose(streamed.to_numpy(), batch.to_numpy("float64"), rtol=RTOL, atol=ATOL)
+
+
+@pytest.mark.parametrize("n_bars, stream_last", [
+    (5, 0),          # shorter than every window
+    (5, 5),          # no warm-up history at all
+    (14, 3),         # RSI / ATR length reached mid-stream
+    (20, 20),        # CMF / VWAP / BBANDS window exactly full
+    (26, 10),        # slow EMA seeded, MACD signal not yet
+    (35, 1),         # MACD signal seeded by the last bar
+])
+def test_short_history(bars, n_bars, stream_last):
+    assert_matches_batch(bars.iloc[:n_bars], "5m", stream_last)
+
+
+def test_flat_bars(bars):
+    # Zero ranges and zero price changes: pandas_ta guards these with EPS / non_zero_range
+    flat = bars.iloc[:60].copy()
+    flat.iloc[30:, :4] = flat["Close"].iloc[29]
+    assert_matches_batch(flat, "5m", 40)
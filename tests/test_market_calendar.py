@@ -0,0 +1,76 @@
+"""Bar-close schedules for the daemon: fetched (clock-hour) vs derived (session-anchored) 1h bars."""
+
+from datetime import date, datetime, time
+
+import pytest
+
+from config.config import INTERVAL_PERIOD_MAP
+from data_processing.market_calendar import MARKET_TZ, bar_closes, next_bar_close
+from data_processing.scheduler import RefreshScheduler, run_daemon
+
+DAY = date(2025, 3, 12)                 # an ordinary Wednesday
+EARLY = date(2025, 12, 24)              # early close
+
+
+def at(day, hour, minute=0):
+    return datetime.combine(day, time(hour, minute), MARKET_TZ)
+
+
+def test_fetched_hourly_bars_close_on_the_clock_hour_with_extended_hours():
+    closes = bar_closes("1h", DAY)
+    assert closes == [at(DAY, h) for h in range(5, 21)]
+    assert bar_closes("1h", EARLY)[-1] == at(EARLY, 17)
+
+
+def test_derived_hourly_bars_follow_the_session_buckets():
+    closes = bar_closes("1h", DAY, derived=True)
+    assert closes == [at(DAY, h, 30) for h in range(10, 16)] + [at(DAY, 16)]
+    assert bar_closes("1h", EARLY, derived=True)[-1] == at(EARLY, 13)
+
+
+def test_other_intervals_do_not_depend_on_the_bar_source():
+    for interval in ("5m", "1d", "1wk", "1mo"):
+        assert bar_closes(interval, DAY) == bar_closes(interval, DAY, derived=True)
+    assert bar_closes("1h", date(2025, 3, 15)) == []                  # Saturday
+
+
+def test_next_bar_close_uses_the_active_schedule():
+    after = at(DAY, 10, 5)
+    assert next_bar_close("1h", after) == at(DAY, 11)
+    assert next_bar_close("1h", after, derived=True) == at(DAY, 10, 30)
+    assert next_bar_close("1h", at(DAY, 20)) == at(date(2025, 3, 13), 5)
+
+
+def test_scheduler_refreshes_fetched_hourly_bars_on_the_hour():
+    start = at(DAY, 10, 50)
+    fetched = RefreshScheduler(["5m", "1h"], clock=lambda: start)
+    derived = RefreshScheduler(["5m", "1h"], clock=lambda: start, derived=True)
+
+    assert fetched.next_refresh() == (at(DAY, 10, 55), ["5m"])
+    fetched.refreshed["5m"] = at(DAY, 10, 55)
+    assert fetched.next_refresh() == (at(DAY, 11), ["5m", "1h"])
+    derived.refreshed["5m"] = at(DAY, 11, 25)
+    assert derived.next_refresh() == (at(DAY, 11, 30), ["5m", "1h"])
+
+
+def test_every_minute_interval_has_a_schedule():
+    assert bar_closes("15m", DAY)[:2] == [at(DAY, 9, 45), at(DAY, 10)]
+    assert len(bar_closes("15m", DAY)) == 26 and bar_closes("15m", DAY)[-1] == at(DAY, 16)
+    assert bar_closes("30m", EARLY)[-1] == at(EARLY, 13) and len(bar_closes("30m", EARLY)) == 7
+    assert bar_closes("90m", DAY) == [at(DAY, 11), at(DAY, 12, 30), at(DAY, 14), at(DAY, 15, 30), at(DAY, 16)]
+    assert bar_closes("60m", DAY) == bar_closes("1h", DAY)
+
+
+def test_scheduler_handles_every_configured_timeframe():
+    start = at(DAY, 10, 50)
+    for tf in INTERVAL_PERIOD_MAP:
+        close, due = RefreshScheduler([tf], clock=lambda: start).next_refresh()
+        assert close > start and due == [tf]
+    assert RefreshScheduler(["15m"], clock=lambda: start).next_refresh() == (at(DAY, 11), ["15m"])
+
+
+def test_scheduler_rejects_unknown_timeframes_before_the_first_run():
+    refreshed = []
+    with pytest.raises(ValueError, match="3d"):
+        run_daemon(refreshed.append, ["1d", "3d"])
+    assert refreshed == []
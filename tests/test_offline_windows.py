@@ -0,0 +1,66 @@
+"""Look-back windows on offline providers, whose data ends in the past."""
+
+import pandas as pd
+import pytest
+
+from indicators.data_providers import ReplayProvider, SyntheticProvider, set_provider
+from indicators.fetch_data import fetch_bars_batched, fetch_ticker_data
+from indicators.periods import period_to_start
+from indicators.resample_bars import DerivedTimeframeFetcher, resample_ohlcv
+
+
+@pytest.fixture
+def synthetic():
+    provider = set_provider(SyntheticProvider(n_bars=400, seed=3))
+    yield provider
+    set_provider(SyntheticProvider())
+
+
+@pytest.fixture
+def replay(tmp_path):
+    bars = SyntheticProvider(n_bars=800, seed=5).generate("REP", "1d")
+    bars.to_csv(tmp_path / "REP_1D.csv")
+    provider = set_provider(ReplayProvider(tmp_path))
+    yield provider, bars
+    set_provider(SyntheticProvider())
+
+
+def test_derived_hourly_bars_from_synthetic_base(synthetic):
+    fetcher = DerivedTimeframeFetcher(fetch_ticker_data, fetch_bars_batched, ["5m", "1h"])
+
+    hourly = fetcher.fetch_many(["SYN0002"], "1h", "60d")["SYN0002"]
+    base = synthetic.generate("SYN0002", "5m")
+
+    assert len(hourly) > 0
+    pd.testing.assert_frame_equal(hourly, resample_ohlcv(base, "1h"))
+    pd.testing.assert_frame_equal(fetcher("SYN0002", "1h", "60d"), hourly)
+
+
+def test_derived_weekly_bars_from_replay_are_cut_back_from_the_last_bar(replay):
+    provider, bars = replay
+    fetcher = DerivedTimeframeFetcher(fetch_ticker_data, fetch_bars_batched, ["1d", "1wk"])
+
+    weekly = fetcher("REP", "1wk", "1y")
+
+    expected = resample_ohlcv(bars[bars.index >= bars.index[-1] - pd.Timedelta(days=365)], "1wk")
+    assert 50 <= len(weekly) <= 54
+    pd.testing.assert_frame_equal(weekly, expected, check_freq=False)
+
+
+def test_bar_cache_hits_use_the_provider_window(replay, empty_bar_cache):
+    provider, bars = replay
+    full = fetch_ticker_data("REP", "1d", "5y")
+    recent = fetch_ticker_data("REP", "1d", "60d")                 # served from the 5y entry
+
+    assert empty_bar_cache.hits == 1
+    pd.testing.assert_frame_equal(recent, provider.window(full, period_to_start("60d")), check_freq=False)
+    assert recent.index[-1] == bars.index[-1] and 35 <= len(recent) <= 45
+
+
+def test_empty_cache_slice_is_a_miss(empty_bar_cache):
+    bars = SyntheticProvider(n_bars=50).generate("OLD", "1d")       # ends in 2025
+    start = period_to_start("5y")
+    empty_bar_cache.put("OLD", "1d", start, bars)
+
+    assert empty_bar_cache.get("OLD", "1d", period_to_start("30d")) is None
+    assert empty_bar_cache.misses == 1 and empty_bar_cache.hits == 0
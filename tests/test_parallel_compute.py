@@ -0,0 +1,56 @@
+"""ComputePool shared-memory transport and its bound on in-flight blocks."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from indicators import parallel_compute
+from indicators.data_providers import SyntheticProvider
+from indicators.parallel_compute import ComputePool, _read_shared, _write_shared
+
+
+@pytest.mark.parametrize("interval, dtype", [("5m", "float64"), ("1d", "float32")])
+def test_bars_round_trip_through_shared_memory(interval, dtype):
+    bars = SyntheticProvider(n_bars=300).generate("SHM", interval).astype(dtype)
+    shm = _write_shared(bars)
+    try:
+        pd.testing.assert_frame_equal(_read_shared(shm.name, shm.size), bars, check_freq=False)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_submit_waits_for_a_free_block(monkeypatch):
+    gate = threading.Event()
+    live, peak = set(), [0]
+    lock = threading.Lock()
+
+    def unit(shm_name, size, tf, names, passthroughs):
+        with lock:
+            live.add(shm_name)
+            peak[0] = max(peak[0], len(live))
+        gate.wait(5)
+        bars = _read_shared(shm_name, size)
+        with lock:
+            live.discard(shm_name)
+        return len(bars), {}
+
+    monkeypatch.setattr(parallel_compute, "_compute_unit", unit)
+    monkeypatch.setattr("indicators.indicator_table.get_indicator_table", dict)    # no timings to merge
+    bars = SyntheticProvider(n_bars=50).generate("SHM", "1d")
+    pool = ComputePool(1)                                   # two blocks in flight
+    pool._executor = ThreadPoolExecutor(max_workers=8)      # the transport, without spawning processes
+
+    futures = [pool.submit(bars, "1d", [], ()) for _ in range(2)]
+    third = threading.Thread(target=lambda: futures.append(pool.submit(bars, "1d", [], ())))
+    third.start()
+    third.join(0.3)
+    assert third.is_alive() and len(futures) == 2          # blocked until a unit finishes
+
+    gate.set()
+    third.join(5)
+    assert [pool.result(f) for f in futures] == [50, 50, 50]
+    assert peak[0] == 2
+    pool._executor.shutdown()
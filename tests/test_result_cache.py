@@ -0,0 +1,75 @@
+"""Result-cache keys follow the code and library versions a result was computed with."""
+
+import types
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from indicators import result_cache
+from indicators.result_cache import ResultCache, code_digest, entry_digest
+
+
+@pytest.fixture(autouse=True)
+def fresh_digests():
+    code_digest.cache_clear()
+    yield
+    code_digest.cache_clear()
+
+
+def spec(func, name="RSI"):
+    return SimpleNamespace(name=name, func=func, source="ta.rsi", columns=("Close",), params={"length": 14})
+
+
+def rsi_v1(close, length=14):
+    return close.diff()
+
+
+def rsi_v2(close, length=14):
+    return close.diff(2)
+
+
+def helper_one(x):
+    return x + 1
+
+
+def helper_two(x):
+    return x + 2
+
+
+def uses_helper(x):
+    return helper_one(x)
+
+
+def test_entry_key_follows_the_function_code():
+    assert entry_digest(spec(rsi_v1), "1D") == entry_digest(spec(rsi_v1), "1D")
+    assert entry_digest(spec(rsi_v1), "1D") != entry_digest(spec(rsi_v2), "1D")
+
+
+def test_entry_key_follows_helpers_called_by_name():
+    # Same source text, but `helper_one` now resolves to a different function
+    patched = types.FunctionType(uses_helper.__code__, {**uses_helper.__globals__, "helper_one": helper_two})
+    assert code_digest(uses_helper) != code_digest(patched)
+
+
+def test_entry_key_follows_library_versions(monkeypatch):
+    before = entry_digest(spec(rsi_v1), "1D")
+    code_digest.cache_clear()
+    monkeypatch.setattr(result_cache, "_library_version", lambda package: f"{package}-next")
+    assert entry_digest(spec(rsi_v1), "1D") != before
+
+
+def test_changed_indicator_misses_the_cache(tmp_path):
+    cache = ResultCache(tmp_path / "results.sqlite")
+    cache.put_indicators("bars", {"RSI": spec(rsi_v1)}, "1D", {"RSI": {"RSI_1D": 55.0}})
+
+    assert cache.get_indicators("bars", {"RSI": spec(rsi_v1)}, "1D") == {"RSI": {"RSI_1D": 55.0}}
+    assert cache.get_indicators("bars", {"RSI": spec(rsi_v2)}, "1D") == {}
+    cache.close()
+
+
+def test_enhancer_key_follows_the_kernel():
+    column = np.arange(30, dtype="float64")
+    key = ResultCache.enhancer_key("z_score", rsi_v1, "1D", column)
+    assert key == ResultCache.enhancer_key("z_score", rsi_v1, "1D", column)
+    assert key != ResultCache.enhancer_key("z_score", rsi_v2, "1D", column)
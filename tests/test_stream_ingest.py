@@ -0,0 +1,228 @@
+"""stream_snapshots() against ReplayStreamServer(speed=None): bucket closing, gaps, and batch equality."""
+
+import asyncio
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("websockets.asyncio.client")
+
+from indicators import result_cache
+from indicators.data_providers import SyntheticProvider
+from indicators.resample_bars import OHLCV_AGG, resample_ohlcv
+from indicators.stream_ingest import MINUTE, MinuteBarAggregator, StreamingSnapshots, stream_snapshots
+from indicators.stream_replay import ReplayStreamServer, last_session
+
+TICKERS = ["SYN0000", "SYN0001"]
+TIMEFRAMES = ["5m", "1h"]
+SESSION_OPEN = pd.Timestamp("2025-01-31 09:30", tz="America/New_York").tz_convert("UTC")
+
+
+def et(hhmm: str) -> pd.Timestamp:
+    return pd.Timestamp(f"2025-01-31 {hhmm}", tz="America/New_York").tz_convert("UTC")
+
+
+@pytest.fixture(scope="module")
+def minutes():
+    """The synthetic provider's last session (Fri 2025-01-31) of minute bars."""
+    provider = SyntheticProvider(n_bars=960, seed=7)
+    return last_session({t: provider.generate(t, "1m") for t in TICKERS})
+
+
+@pytest.fixture(scope="module")
+def history():
+    provider = SyntheticProvider(n_bars=3000, seed=7)
+    return {t: provider.generate(t, "5m") for t in TICKERS}
+
+
+def expected_bars(minute_bars: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """Session buckets built independently of the aggregator, stamped with the bucket start."""
+    step = pd.Timedelta(minutes=5) if interval == "5m" else pd.Timedelta(hours=1)
+    start = SESSION_OPEN + ((minute_bars.index - SESSION_OPEN) // step) * step
+    out = minute_bars.groupby(start).agg(OHLCV_AGG)
+    out.index.name = "Date"
+    return out
+
+
+def warm_history(history: dict, ticker: str, interval: str, cutoff) -> pd.DataFrame:
+    bars = history[ticker][history[ticker].index < cutoff]
+    return resample_ohlcv(bars, "1h") if interval == "1h" else bars
+
+
+class RecordingSnapshots(StreamingSnapshots):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.applied = []
+
+    def update(self, closed):
+        accepted = super().update(closed)
+        if accepted:
+            self.applied.append(closed)
+        return accepted
+
+
+def run_stream(minute_bars: dict, history: dict, tamper=None):
+    """Warm up on the history before the replay, stream it, return (state, published snapshots)."""
+    replay = ReplayStreamServer(minute_bars, speed=None)
+    if tamper is not None:
+        tamper(replay)
+    state = RecordingSnapshots(TICKERS, TIMEFRAMES)
+    for tf in TIMEFRAMES:
+        for ticker in TICKERS:
+            state.warm_up(ticker, tf, warm_history(history, ticker, tf, replay.start))
+    published = []
+
+    async def go():
+        server, url = await replay.serve()
+        try:
+            await stream_snapshots(state, published.append, url, idle_seconds=None)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(go())
+    return state, published
+
+
+def applied_frame(state, ticker: str, interval: str) -> pd.DataFrame:
+    closed = [c for c in state.applied if c.symbol == ticker and c.interval == interval]
+    frame = pd.DataFrame([c.bar for c in closed], index=pd.DatetimeIndex([c.timestamp for c in closed], name="Date"))
+    return frame[list(OHLCV_AGG)]
+
+
+def drop_minutes(minute_bars: dict, ticker: str, *hhmm: str) -> dict:
+    gone = pd.DatetimeIndex([et(t) for t in hhmm])
+    return {t: df[~df.index.isin(gone)] if t == ticker else df for t, df in minute_bars.items()}
+
+
+# ── Bucket closing ─────────────────────────────────────────────────────────
+def test_buckets_close_on_their_last_minute(minutes):
+    aggregator = MinuteBarAggregator(TIMEFRAMES)
+    closed_at = {}
+    for ts, row in minutes["SYN0000"].iterrows():
+        for bar in aggregator.add("SYN0000", ts, row.to_dict()):
+            closed_at[(bar.interval, bar.timestamp)] = ts + MINUTE
+
+    five, hour = pd.Timedelta(minutes=5), pd.Timedelta(hours=1)
+    assert sum(tf == "5m" for tf, _ in closed_at) == 78
+    assert all(end == start + five for (tf, start), end in closed_at.items() if tf == "5m")
+    hourly = sorted((start, end) for (tf, start), end in closed_at.items() if tf == "1h")
+    assert [start for start, _ in hourly] == [SESSION_OPEN + i * hour for i in range(7)]
+    assert [end for _, end in hourly] == [SESSION_OPEN + (i + 1) * hour for i in range(6)] + [et("16:00")]
+
+
+def test_streamed_buckets_match_the_minutes(minutes, history):
+    state, published = run_stream(minutes, history)
+
+    for ticker in TICKERS:
+        for tf in TIMEFRAMES:
+            pd.testing.assert_frame_equal(applied_frame(state, ticker, tf), expected_bars(minutes[ticker], tf))
+    assert sum("5M" in p for p in published) == 78            # one publish per closing minute
+    assert sum("1H" in p for p in published) == 7
+
+
+def test_missing_minutes_close_on_stream_time(minutes, history):
+    # last minute of a 5m bucket, a whole 5m bucket, last minute of a 1h bucket, last minute of the session
+    gappy = drop_minutes(minutes, "SYN0000", "10:04", "10:10", "10:11", "10:12", "10:13", "10:14", "11:29", "15:59")
+    state, _ = run_stream(gappy, history)
+
+    for tf in TIMEFRAMES:
+        got = applied_frame(state, "SYN0000", tf)
+        pd.testing.assert_frame_equal(got, expected_bars(gappy["SYN0000"], tf))
+        pd.testing.assert_frame_equal(applied_frame(state, "SYN0001", tf), expected_bars(minutes["SYN0001"], tf))
+    assert et("10:10") not in applied_frame(state, "SYN0000", "5m").index
+    assert len(applied_frame(state, "SYN0000", "5m")) == 77
+
+
+def test_late_minutes_are_ignored(minutes, history):
+    def send_late(replay):
+        at = replay.minutes.index(et("10:20"))
+        late = dict(replay.messages[at][0], S="SYN0000", t=et("10:02").strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    o=1e6, h=1e6, l=1e6, c=1e6, v=1e9)
+        replay.messages[at] = replay.messages[at] + [late]
+
+    state, _ = run_stream(minutes, history, tamper=send_late)
+
+    for tf in TIMEFRAMES:
+        pd.testing.assert_frame_equal(applied_frame(state, "SYN0000", tf), expected_bars(minutes["SYN0000"], tf))
+
+
+class DroppingReplay(ReplayStreamServer):
+    """Aborts the first connection after `drop_after` minutes; later connections replay from the start."""
+
+    def __init__(self, *args, drop_after: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.drop_after = drop_after
+        self.connections = 0
+        self.done = asyncio.Event()
+
+    async def _handler(self, ws) -> None:
+        self.connections += 1
+        if self.connections > 2:
+            self.done.set()
+            await ws.wait_closed()
+            return
+        if self.connections == 1:
+            self.minutes, full = self.minutes[:self.drop_after], self.minutes
+            try:
+                await super()._handler(ws)
+            finally:
+                self.minutes = full
+            await ws.close(code=1011, reason="internal error")      # ConnectionClosedError on the client
+            return
+        await super()._handler(ws)                                  # then a clean close: reconnect again
+
+
+def test_live_stream_reconnects_and_keeps_open_buckets(minutes, history):
+    # Dropped after 10:01, mid-bucket and mid-hour; the second connection resends
+    # the minutes already seen, which the aggregator drops as repeats
+    replay = DroppingReplay(minutes, speed=None, drop_after=32)
+    state = RecordingSnapshots(TICKERS, TIMEFRAMES)
+    for tf in TIMEFRAMES:
+        for ticker in TICKERS:
+            state.warm_up(ticker, tf, warm_history(history, ticker, tf, replay.start))
+
+    async def go():
+        server, url = await replay.serve()
+        stream = asyncio.create_task(stream_snapshots(
+            state, lambda snapshots: None, url, idle_seconds=5, clock=lambda: replay.start,
+            reconnect_base=0.01,
+        ))
+        try:
+            await asyncio.wait_for(replay.done.wait(), timeout=30)
+            assert not stream.done()                                 # a live stream outlives the server closing
+        finally:
+            stream.cancel()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(go())
+    assert replay.connections == 3
+    for ticker in TICKERS:
+        for tf in TIMEFRAMES:
+            pd.testing.assert_frame_equal(applied_frame(state, ticker, tf), expected_bars(minutes[ticker], tf))
+
+
+# ── Streamed vs batch ──────────────────────────────────────────────────────
+@pytest.mark.parametrize("gaps", [(), ("10:04", "10:10", "10:11", "11:29", "15:59")])
+def test_streamed_snapshot_equals_batch(minutes, history, monkeypatch, gaps):
+    pytest.importorskip("pandas_ta")
+    from indicators.build_snapshots import build_full_snapshot
+
+    monkeypatch.setattr(result_cache, "_enabled", False)
+    minute_bars = drop_minutes(minutes, "SYN0000", *gaps)
+    _, published = run_stream(minute_bars, history)
+    streamed = {}
+    for snapshots in published:
+        streamed.update(snapshots)
+
+    cutoff = min(df.index[0] for df in minute_bars.values())
+    same_bars = {
+        (ticker, tf): pd.concat([warm_history(history, ticker, tf, cutoff), expected_bars(minute_bars[ticker], tf)])
+        for ticker in TICKERS for tf in TIMEFRAMES
+    }
+    batch = build_full_snapshot(TICKERS, TIMEFRAMES, lambda ticker, interval, period: same_bars[(ticker, interval)])
+
+    for tf in TIMEFRAMES:
+        label = tf.upper()
+        pd.testing.assert_frame_equal(streamed[label], batch[label], rtol=1e-6, check_dtype=False)
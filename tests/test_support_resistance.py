@@ -0,0 +1,34 @@
+"""Support / resistance levels around the last close, including degenerate (flat) price ranges."""
+
+import pandas as pd
+import pytest
+
+from analysis.support_resistance import get_support_resistance, volume_profiles
+
+NO_LEVELS = {"strong_support": [], "weak_support": [], "strong_resistance": [], "weak_resistance": []}
+
+
+def bars(closes, volumes) -> pd.DataFrame:
+    return pd.DataFrame({"Close": closes, "High": closes, "Low": closes, "Volume": volumes})
+
+
+@pytest.mark.parametrize("spread", ["close", "range"])
+@pytest.mark.parametrize("n_bars", [1, 20])
+def test_flat_series_has_no_levels(spread, n_bars):
+    df = bars([100.1065] * n_bars, [1000.0] * n_bars)
+    assert get_support_resistance(df, spread=spread) == NO_LEVELS
+
+
+def test_flat_range_is_centred_on_the_close():
+    profiles = volume_profiles({"FLAT": bars([100.1065] * 3, [1.0] * 3)}, bins=10)
+    assert profiles.low[0] == pytest.approx(100.1015)
+    assert profiles.low[0] + 10 * profiles.step[0] == pytest.approx(100.1115)
+
+
+def test_level_at_the_close_is_neither_side():
+    # Bins 98–99 … 101–102; the busiest one (midpoint 100.50) is where the last bar closed
+    df = bars([98.0, 102.0, 100.503], [1.0, 1.0, 10.0])
+    levels = get_support_resistance(df, bins=4)
+    assert levels["strong_support"] == [98.5]
+    assert levels["strong_resistance"] == [101.5]
+    assert 100.5 not in levels["weak_support"] + levels["weak_resistance"]
@@ -0,0 +1,36 @@
+"""build_universe_snapshots() keeps each chunk's Close columns before its bars leave BAR_CACHE."""
+
+import pandas as pd
+
+from config.config import INTERVAL_PERIOD_MAP
+from indicators import universe
+from indicators.data_providers import set_provider
+from indicators.fetch_data import fetch_bars_batched, fetch_ticker_data
+
+TICKERS = [f"SYN{i:04d}" for i in range(7)]
+TIMEFRAMES = ["5m", "1d"]
+
+
+def fetch_only(chunk, timeframes, fetch_function, batch_fetch_function=None, **kwargs):
+    """Stands in for build_full_snapshot(): the same bar requests, no indicators."""
+    for tf in timeframes:
+        batch_fetch_function(chunk, interval=tf, period=INTERVAL_PERIOD_MAP.get(tf, "60d"))
+    return {}
+
+
+def test_chunk_closes_are_kept_without_a_second_fetch(tmp_path, monkeypatch, empty_bar_cache):
+    set_provider("synthetic", n_bars=120, seed=3)
+    monkeypatch.setattr(universe, "build_full_snapshot", fetch_only)
+    closes = {}
+    universe.build_universe_snapshots(
+        TICKERS, TIMEFRAMES, fetch_ticker_data, batch_fetch_function=fetch_bars_batched,
+        chunk_size=3, checkpoint_dir=tmp_path, closes=closes,
+    )
+
+    assert empty_bar_cache.misses == len(TICKERS) * len(TIMEFRAMES)     # one fetch per series
+    assert empty_bar_cache.stats()["entries"] == 0                     # and still dropped per chunk
+    for tf in TIMEFRAMES:
+        assert list(closes[tf.upper()]) == TICKERS
+        expected = fetch_bars_batched(TICKERS, interval=tf, period=INTERVAL_PERIOD_MAP.get(tf, "60d"))
+        for ticker in TICKERS:
+            pd.testing.assert_frame_equal(closes[tf.upper()][ticker], expected[ticker][["Close"]])
@@ -0,0 +1,59 @@
+# === import_profile.py ===
+#
+# Per-module import timing for `main.py --import-profile`.
+#
+# While active, builtins.__import__ is wrapped so every *first* import of a
+# module is timed. "self" excludes time spent importing that module's own
+# first-time dependencies; "cumulative" includes it (same split as
+# `python -X importtime`, but reported inside the running program).
+
+import builtins
+import sys
+import threading
+import time
+
+
+class ImportProfiler:
+    def __init__(self):
+        self.records = {}                      # module -> (self_s, cumulative_s)
+        self._local = threading.local()
+        self._original_import = None
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        stack = self._stack()
+        stack.append(0.0)                      # accumulates children's cumulative time
+        started = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = time.perf_counter() - started
+            children = stack.pop()
+            if stack:
+                stack[-1] += cumulative
+            self.records.setdefault(name, (cumulative - children, cumulative))
+
+    def start(self) -> "ImportProfiler":
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+        return self
+
+    def stop(self) -> None:
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def report(self, top: int = 25) -> str:
+        rows = sorted(self.records.items(), key=lambda kv: kv[1][1], reverse=True)[:top]
+        total = sum(self_s for self_s, _ in self.records.values())
+        lines = [f"{'cumulative ms':>14} {'self ms':>10}  module"]
+        lines += [f"{cum * 1000:14.1f} {own * 1000:10.1f}  {name}" for name, (own, cum) in rows]
+        lines.append(f"{total * 1000:14.1f} {'':>10}  total ({len(self.records)} modules)")
+        return "\n".join(lines)